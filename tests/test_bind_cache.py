@@ -0,0 +1,86 @@
+import os
+
+import numpy as np
+
+from transfer_shape_keys_via_deform import bind_cache
+
+
+def arrays(size=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    return {'indices': np.arange(size, dtype=np.int64), 'data': rng.standard_normal(size).astype(np.float32)}
+
+
+def set_age(cache, key, seconds_ago):
+    path = os.path.join(cache.directory, key)
+    t = os.stat(path).st_mtime - seconds_ago
+    os.utime(path, (t, t))
+
+
+def test_round_trip(tmp_path):
+    cache = bind_cache.BindCache(str(tmp_path))
+    assert cache.get('a') is None
+    stored = arrays()
+    cache.put('a', stored)
+    loaded = cache.get('a')
+    assert sorted(loaded) == ['data', 'indices']
+    for name in stored:
+        assert np.array_equal(loaded[name], stored[name])
+
+
+def test_hash_key():
+    a = np.arange(6, dtype=np.float32)
+    assert bind_cache.hash_key('x', a, 1.0) == bind_cache.hash_key('x', a.copy(), 1.0)
+    assert bind_cache.hash_key('x', a, 1.0) != bind_cache.hash_key('x', a.reshape(2, 3), 1.0)
+    assert bind_cache.hash_key('x', a, 1.0) != bind_cache.hash_key('x', a.astype(np.float64), 1.0)
+    assert bind_cache.hash_key('x', a, 1.0) != bind_cache.hash_key('x', a, 2.0)
+
+
+def test_least_recently_used_are_evicted(tmp_path):
+    cache = bind_cache.BindCache(str(tmp_path))
+    for i, key in enumerate('abc'):
+        cache.put(key, arrays(seed=i))
+    entry_size = cache.size() // 3
+    # a is the oldest but used again, so b goes first
+    set_age(cache, 'a', 30)
+    set_age(cache, 'b', 20)
+    set_age(cache, 'c', 10)
+    assert cache.get('a') is not None
+
+    cache.max_bytes = 2 * entry_size + entry_size // 2
+    cache.put('d', arrays(seed=3))
+    assert cache.get('b') is None and cache.get('c') is None
+    assert cache.get('a') is not None and cache.get('d') is not None
+    assert cache.size() <= cache.max_bytes
+
+
+def test_clear(tmp_path):
+    cache = bind_cache.BindCache(str(tmp_path))
+    cache.put('a', arrays())
+    cache.put('b', arrays())
+    cache.clear()
+    assert cache.entries() == [] and cache.size() == 0
+    assert cache.get('a') is None
+
+
+def test_partial_entry_is_a_miss(tmp_path):
+    cache = bind_cache.BindCache(str(tmp_path))
+    cache.put('a', arrays())
+    os.remove(os.path.join(str(tmp_path), 'a', 'data.npy'))
+    assert cache.get('a') is None
+    # the broken entry is dropped, so it can be stored again
+    assert not os.path.exists(os.path.join(str(tmp_path), 'a'))
+    cache.put('a', arrays())
+    assert cache.get('a') is not None
+
+
+def test_damaged_entry_is_a_miss(tmp_path):
+    cache = bind_cache.BindCache(str(tmp_path))
+    cache.put('a', arrays())
+    with open(os.path.join(str(tmp_path), 'a', 'indices.npy'), 'r+b') as f:
+        f.truncate(100)
+    assert cache.get('a') is None
+
+    # an entry without its index, e.g. half removed, is not complete either
+    cache.put('b', arrays())
+    os.remove(os.path.join(str(tmp_path), 'b', bind_cache.INDEX_NAME))
+    assert cache.get('b') is None
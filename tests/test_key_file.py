@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from transfer_shape_keys_via_deform import key_file
+
+
+def settings(name, relative_key='Basis'):
+    return {'name': name, 'relative_key': relative_key, 'vertex_group': '', 'slider_min': -1.0,
+            'slider_max': 2.0, 'value': 0.0, 'mute': False}
+
+
+def sample_keys(num_verts=100):
+    rng = np.random.default_rng(0)
+    deltas = np.zeros((3, num_verts, 3), dtype=np.float32)
+    deltas[0, :10] = rng.standard_normal((10, 3))
+    deltas[2, 50:] = rng.standard_normal((num_verts - 50, 3))
+    return [(settings('A'), deltas[0]), (settings('Empty'), deltas[1]), (settings('B', 'A'), deltas[2])], deltas
+
+
+def test_round_trip_float32(tmp_path):
+    path = str(tmp_path / "keys.tskd")
+    keys, deltas = sample_keys()
+    assert key_file.write_key_file(path, 100, 'topo', keys) == 3
+
+    f = key_file.KeyFile(path)
+    assert f.topology == 'topo' and f.num_verts == 100
+    assert [entry['name'] for entry in f.keys] == ['A', 'Empty', 'B']
+    assert f.keys[0]['slider_min'] == -1.0 and f.keys[2]['relative_key'] == 'A'
+    assert [entry['count'] for entry in f.keys] == [10, 0, 50]
+
+    rest = np.arange(300, dtype=np.float32).reshape(100, 3)
+    for i in range(3):
+        assert np.array_equal(f.key_coords(i, rest), rest + deltas[i])
+
+
+def test_float16_and_threshold(tmp_path):
+    path = str(tmp_path / "keys.tskd")
+    keys, deltas = sample_keys()
+    deltas[0, 5] = 1e-6
+    key_file.write_key_file(path, 100, 'topo', keys, 'FLOAT16', threshold=1e-4)
+    f = key_file.KeyFile(path)
+    assert f.keys[0]['count'] == 9
+    indices, offsets = f.key_offsets(2)
+    assert np.abs(offsets - deltas[2, indices]).max() < 1e-2
+
+
+def test_import_order_puts_relative_keys_first():
+    keys = [settings('C', 'B'), settings('B', 'A'), settings('A'), settings('D')]
+    order = key_file.import_order(keys)
+    assert sorted(order) == [0, 1, 2, 3]
+    assert order.index(2) < order.index(1) < order.index(0)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other.tskd"
+    path.write_bytes(b"not a key file at all")
+    with pytest.raises(ValueError):
+        key_file.KeyFile(str(path))
+
+
+def test_topology_hash():
+    loops = np.array([0, 1, 2, 0, 2, 3])
+    totals = np.array([3, 3])
+    assert key_file.topology_hash(4, loops, totals) == key_file.topology_hash(4, loops.copy(), totals)
+    assert key_file.topology_hash(4, loops, totals) != key_file.topology_hash(4, loops[::-1], totals)
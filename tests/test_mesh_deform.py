@@ -0,0 +1,110 @@
+import numpy as np
+
+from transfer_shape_keys_via_deform import mesh_deform
+from transfer_shape_keys_via_deform.benchmark import shape_key_deltas, sphere_mesh
+
+
+def closed_sphere(num_verts):
+    # sphere_mesh is open at the poles; close it with a fan at each end
+    co, tris, _ = sphere_mesh(num_verts)
+    z = co[:, 2]
+    top = np.flatnonzero(np.isclose(z, z.max()))
+    bottom = np.flatnonzero(np.isclose(z, z.min()))
+    n = len(co)
+    co = np.concatenate((co, [[0.0, 0.0, 1.0], [0.0, 0.0, -1.0]])).astype(np.float32)
+    top_fan = np.stack((top, np.full_like(top, n), np.roll(top, -1)), axis=1)
+    bottom_fan = np.stack((np.roll(bottom, -1), np.full_like(bottom, n + 1), bottom), axis=1)
+    return co, np.concatenate((tris, top_fan, bottom_fan))
+
+
+def dense(bind):
+    return bind.vert_weights.dot(np.eye(bind.num_source_verts))
+
+
+def test_mean_value_coordinates_linear_precision():
+    cage_co, cage_tris = closed_sphere(100)
+    points = np.concatenate((sphere_mesh(50, 0.9)[0], sphere_mesh(20, 0.2)[0], cage_co[:3]))
+    coords = mesh_deform.mean_value_coordinates(cage_co, cage_tris, points)
+    assert np.allclose(coords.sum(axis=1), 1.0)
+    assert np.abs(coords @ cage_co.astype(np.float64) - points).max() < 1e-6
+    # points on a cage vertex are bound to it alone
+    assert np.allclose(coords[-3:], np.eye(len(cage_co))[:3])
+
+
+def test_every_triangle_matches_exact_coordinates():
+    cage_co, cage_tris = closed_sphere(100)
+    tgt_co = sphere_mesh(60, 0.8)[0]
+    bind = mesh_deform.bind_mesh_deform(cage_co, cage_tris, tgt_co, prune=0.0, num_triangles=len(cage_tris),
+                                        max_weights=len(cage_co))
+    exact = mesh_deform.mean_value_coordinates(cage_co, cage_tris, tgt_co)
+    assert np.abs(dense(bind) - exact).max() < 1e-5
+
+
+def test_local_bind_near_cage_follows_exact_coordinates():
+    cage_co, cage_tris = closed_sphere(800)
+    tgt_co = sphere_mesh(400, 0.98)[0]
+    bind = mesh_deform.bind_mesh_deform(cage_co, cage_tris, tgt_co)
+    deltas = shape_key_deltas(cage_co, 4)
+    exact = np.einsum('pv,kvc->kpc', mesh_deform.mean_value_coordinates(cage_co, cage_tris, tgt_co), deltas)
+    assert np.abs(bind.deform_batch(deltas) - exact).max() < 0.1 * np.abs(exact).max()
+
+
+def test_sparse_rows_sum_to_one():
+    cage_co, cage_tris = closed_sphere(800)
+    tgt_co = sphere_mesh(500, 0.7)[0]
+    bind = mesh_deform.bind_mesh_deform(cage_co, cage_tris, tgt_co, max_weights=12)
+    assert np.diff(bind.vert_weights.indptr).max() <= 12
+    assert np.allclose(dense(bind).sum(axis=1), 1.0, atol=1e-6)
+
+
+def test_rest_pose_and_translation():
+    cage_co, cage_tris = closed_sphere(400)
+    tgt_co = sphere_mesh(200, 0.9)[0]
+    bind = mesh_deform.bind_mesh_deform(cage_co, cage_tris, tgt_co)
+    assert np.abs(bind.deform(np.zeros_like(cage_co))).max() == 0.0
+    move = np.array([0.3, -0.2, 0.1], dtype=np.float32)
+    assert np.abs(bind.deform(np.broadcast_to(move, cage_co.shape)) - move).max() < 1e-5
+
+
+def test_batch_matches_per_key():
+    cage_co, cage_tris = closed_sphere(400)
+    bind = mesh_deform.bind_mesh_deform(cage_co, cage_tris, sphere_mesh(200, 0.9)[0])
+    deltas = shape_key_deltas(cage_co, 5)
+    batch = bind.deform_batch(deltas, 0.5)
+    for d, b in zip(deltas, batch):
+        assert np.allclose(bind.deform(d, 0.5), b, atol=1e-6)
+
+
+def test_vertex_group_subset():
+    cage_co, cage_tris = closed_sphere(400)
+    tgt_co = sphere_mesh(200, 0.9)[0]
+    weights = np.where(tgt_co[:, 2] > 0.0, 0.5, 0.0).astype(np.float32)
+    full = mesh_deform.bind_mesh_deform(cage_co, cage_tris, tgt_co)
+    subset = mesh_deform.bind_mesh_deform(cage_co, cage_tris, tgt_co, weights=weights)
+    assert len(subset.target_verts) == np.count_nonzero(weights)
+
+    delta = shape_key_deltas(cage_co, 1)[0]
+    assert np.allclose(subset.deform(delta), full.deform(delta) * weights[:, None], atol=1e-6)
+
+
+def test_solidified_open_surface():
+    # an open tube thickened into a shell; both layers follow their source vertex
+    src_co, tris, _ = sphere_mesh(400)
+    tgt_co = sphere_mesh(200, 1.02)[0]
+    bind = mesh_deform.bind_mesh_deform(src_co, tris, tgt_co, thickness=0.2, offset=0.0)
+    assert bind.vert_weights.shape == (len(tgt_co), len(src_co))
+    move = np.array([0.0, 0.5, 0.0], dtype=np.float32)
+    assert np.abs(bind.deform(np.broadcast_to(move, src_co.shape)) - move).max() < 1e-5
+
+
+def test_cached_bind_round_trip(tmp_path):
+    from transfer_shape_keys_via_deform import bind_cache
+
+    cage_co, cage_tris = closed_sphere(200)
+    tgt_co = sphere_mesh(100, 0.9)[0]
+    cache = bind_cache.BindCache(str(tmp_path))
+    bind, cached = mesh_deform.cached_bind_mesh_deform(cache, cage_co, cage_tris, tgt_co)
+    again, cached_again = mesh_deform.cached_bind_mesh_deform(cache, cage_co, cage_tris, tgt_co)
+    assert not cached and cached_again
+    delta = shape_key_deltas(cage_co, 1)[0]
+    assert np.allclose(bind.deform(delta), again.deform(delta))
@@ -0,0 +1,79 @@
+import numpy as np
+
+from transfer_shape_keys_via_deform import pipeline, surface_deform
+from transfer_shape_keys_via_deform.benchmark import shape_key_deltas, sphere_mesh
+
+
+def transfer(jobs, deltas, chunk_size=3, workers=2, threshold=0.0):
+    written = {}
+
+    def write_keys(job, keys, coords):
+        for key, co in zip(keys, coords):
+            written[job.name, key] = co.copy()
+
+    pipeline.run_transfer(jobs, lambda job, keys, out: deltas[keys], write_keys, chunk_size, workers,
+                          threshold=threshold)
+    return written
+
+
+def test_run_transfer_matches_direct_deform():
+    src_co, tris, _ = sphere_mesh(300)
+    deltas = shape_key_deltas(src_co, 7)
+    targets = [sphere_mesh(200, 1.05 + 0.05 * i)[0] for i in range(2)]
+    jobs = [pipeline.TargetJob(None, list(range(7)), surface_deform.bind_surface_deform, (src_co, tris, tgt_co),
+                               tgt_co, name=i) for i, tgt_co in enumerate(targets)]
+    written = transfer(jobs, deltas)
+    assert len(written) == 14
+    for i, tgt_co in enumerate(targets):
+        bind = surface_deform.bind_surface_deform(src_co, tris, tgt_co)
+        expected = pipeline.deformed_coords(bind, tgt_co, deltas)
+        for k in range(7):
+            assert np.allclose(written[i, k], expected[k], atol=1e-5)
+
+
+def test_threshold_skips_keys_without_effect():
+    src_co, tris, _ = sphere_mesh(300)
+    deltas = shape_key_deltas(src_co, 4)
+    deltas[1] = 0.0
+    tgt_co = sphere_mesh(200, 1.05)[0]
+    job = pipeline.TargetJob(None, [0, 1, 2, 3], surface_deform.bind_surface_deform, (src_co, tris, tgt_co),
+                             tgt_co, name='t')
+    written = transfer([job], deltas, threshold=1e-5)
+    assert sorted(k for _, k in written) == [0, 2, 3]
+    assert job.skipped == [1]
+
+
+def test_chained_job_matches_composed_binds():
+    src_co, tris, _ = sphere_mesh(300)
+    deltas = shape_key_deltas(src_co, 5)
+    lod0, lod0_tris, _ = sphere_mesh(200, 1.05)
+    lod1 = sphere_mesh(100, 1.1)[0]
+    parent = pipeline.TargetJob(None, list(range(5)), surface_deform.bind_surface_deform, (src_co, tris, lod0),
+                                lod0, name='lod0')
+    child = pipeline.TargetJob(None, [1, 3], surface_deform.bind_surface_deform, (lod0, lod0_tris, lod1), lod1,
+                               name='lod1', parent=parent)
+    written = transfer([parent, child], deltas, chunk_size=2)
+
+    bind1 = surface_deform.bind_surface_deform(lod0, lod0_tris, lod1)
+    for k in (1, 3):
+        expected = bind1.deform(written['lod0', k] - lod0) + lod1
+        assert np.allclose(written['lod1', k], expected, atol=1e-5)
+
+
+def test_lod_parents():
+    names = ['Shirt_LOD2', 'Shirt_LOD0', 'Shirt_LOD1', 'Pants_LOD1', 'Pants_LOD3', 'Hat']
+    assert pipeline.lod_parents(names) == {'Shirt_LOD1': 'Shirt_LOD0', 'Shirt_LOD2': 'Shirt_LOD1',
+                                           'Pants_LOD3': 'Pants_LOD1'}
+
+
+def test_duplicate_candidates():
+    rng = np.random.default_rng(0)
+    deltas = rng.standard_normal((4, 50, 3)).astype(np.float32)
+    deltas[2] = deltas[0]
+    deltas[3] = deltas[1] * -0.5
+    sketches = pipeline.key_sketches(deltas)
+    assert pipeline.duplicate_candidates(sketches, allow_scaled=False) == {2: (0, 1.0)}
+    candidates = pipeline.duplicate_candidates(sketches)
+    assert candidates[2] == (0, 1.0)
+    assert candidates[3][0] == 1 and abs(candidates[3][1] + 0.5) < 1e-4
+    assert pipeline.is_scaled_copy(deltas[3], deltas[1], candidates[3][1])
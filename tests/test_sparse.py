@@ -0,0 +1,48 @@
+import numpy as np
+
+from transfer_shape_keys_via_deform import sparse
+from transfer_shape_keys_via_deform.sparse import CSRMatrix
+
+
+def random_coo(rng, shape, nnz):
+    rows = rng.integers(0, shape[0], nnz)
+    cols = rng.integers(0, shape[1], nnz)
+    return rows, cols, rng.standard_normal(nnz)
+
+
+def test_from_coo_sums_duplicates():
+    m = CSRMatrix.from_coo([0, 0, 2], [1, 1, 0], [1.0, 2.0, 5.0], (3, 2))
+    x = np.array([[1.0], [10.0]])
+    assert np.allclose(m.dot(x)[:, 0], [30.0, 0.0, 5.0])
+    assert m.nnz == 2
+
+
+def test_dot_matches_dense():
+    rng = np.random.default_rng(0)
+    shape = (50, 40)
+    rows, cols, data = random_coo(rng, shape, 300)
+    dense = np.zeros(shape)
+    np.add.at(dense, (rows, cols), data)
+    m = CSRMatrix.from_coo(rows, cols, data, shape)
+
+    x = rng.standard_normal((40, 6)).astype(np.float32)
+    assert np.allclose(m.dot(x), dense @ x, atol=1e-4)
+    assert np.allclose(m.dot(x[:, 0]), dense @ x[:, 0], atol=1e-4)
+
+
+def test_dot_in_small_blocks(monkeypatch):
+    # rows are processed in blocks; blocks of a few products give the same result
+    rng = np.random.default_rng(1)
+    shape = (30, 20)
+    rows, cols, data = random_coo(rng, shape, 200)
+    m = CSRMatrix.from_coo(rows, cols, data, shape)
+    x = rng.standard_normal((20, 3))
+    expected = m.dot(x)
+    monkeypatch.setattr(sparse, 'DOT_CHUNK_ELEMENTS', 7)
+    assert np.allclose(m.dot(x), expected)
+
+
+def test_empty_rows_and_round_trip():
+    m = CSRMatrix.from_coo([3], [1], [2.0], (5, 2))
+    restored = CSRMatrix.from_arrays(m.to_arrays('m_'), 'm_')
+    assert np.allclose(restored.dot(np.ones(2)), [0.0, 0.0, 0.0, 2.0, 0.0])
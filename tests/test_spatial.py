@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from transfer_shape_keys_via_deform import spatial
+from transfer_shape_keys_via_deform.benchmark import sphere_mesh
+
+
+def nearest_distances(points, queries, indices):
+    return np.sort(np.linalg.norm(points[indices] - queries[:, None, :], axis=-1), axis=1)
+
+
+def check_against_brute_force(points, queries, k, grid=None):
+    grid = spatial.PointGrid(points) if grid is None else grid
+    found = grid.k_nearest(queries, k)
+    expected = spatial.brute_force_k_nearest(points, queries, k)
+    assert found.shape == expected.shape
+    # ties may be broken differently, so compare distances
+    assert np.allclose(nearest_distances(points, queries, found), nearest_distances(points, queries, expected))
+    # and no point twice for a query
+    assert all(len(np.unique(row)) == len(row) for row in found)
+
+
+@pytest.mark.parametrize('k', [1, 4, 16])
+def test_surface_points(k):
+    points = sphere_mesh(2000)[0].astype(np.float64)
+    queries = sphere_mesh(500, 1.05)[0]
+    check_against_brute_force(points, queries, k)
+
+
+def test_far_queries_go_to_coarser_grids():
+    points = sphere_mesh(2000)[0].astype(np.float64)
+    queries = np.random.default_rng(0).uniform(-20.0, 20.0, (300, 3))
+    check_against_brute_force(points, queries, 8)
+
+
+def test_uneven_density():
+    # a dense cluster next to sparse points, so k exceeds what many cells hold
+    rng = np.random.default_rng(1)
+    points = np.concatenate((rng.normal(0.0, 0.01, (2000, 3)), rng.uniform(-1.0, 1.0, (200, 3))))
+    queries = rng.uniform(-1.2, 1.2, (400, 3))
+    check_against_brute_force(points, queries, 24)
+
+
+def test_fine_cells():
+    points = np.random.default_rng(2).uniform(-1.0, 1.0, (500, 3))
+    queries = np.random.default_rng(3).uniform(-1.0, 1.0, (200, 3))
+    check_against_brute_force(points, queries, 6, spatial.PointGrid(points, cell_size=0.02))
+
+
+def test_k_larger_than_points():
+    points = np.random.default_rng(4).uniform(-1.0, 1.0, (5, 3))
+    found = spatial.PointGrid(points).k_nearest(points, 10)
+    assert found.shape == (5, 5)
+    assert all(sorted(row) == list(range(5)) for row in found)
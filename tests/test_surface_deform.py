@@ -0,0 +1,68 @@
+import numpy as np
+
+from transfer_shape_keys_via_deform import surface_deform
+from transfer_shape_keys_via_deform.benchmark import shape_key_deltas, sphere_mesh
+
+
+def rotation(angle):
+    c, s = np.cos(angle), np.sin(angle)
+    return np.array([[c, -s, 0.0], [s, c, 0.0], [0.0, 0.0, 1.0]])
+
+
+def setup(num_verts=400):
+    src_co, tris, _ = sphere_mesh(num_verts)
+    tgt_co = sphere_mesh(num_verts // 2, 1.05)[0]
+    return src_co, tris, tgt_co
+
+
+def test_rest_pose_reproduces_target():
+    src_co, tris, tgt_co = setup()
+    bind = surface_deform.bind_surface_deform(src_co, tris, tgt_co)
+    rest = bind.vert_weights.dot(src_co.astype(np.float64)) + bind.normal_weights.dot(bind.rest_normals)
+    assert np.abs(rest - tgt_co).max() < 1e-5
+    assert np.abs(bind.deform(np.zeros_like(src_co))).max() < 1e-6
+
+
+def test_rigid_motion_moves_target_rigidly():
+    src_co, tris, tgt_co = setup()
+    bind = surface_deform.bind_surface_deform(src_co, tris, tgt_co)
+
+    move = np.array([0.3, -0.2, 0.1], dtype=np.float32)
+    assert np.abs(bind.deform(np.broadcast_to(move, src_co.shape)) - move).max() < 1e-5
+
+    r = rotation(0.4)
+    delta = (src_co @ r.T - src_co).astype(np.float32)
+    assert np.abs(bind.deform(delta) - (tgt_co @ r.T - tgt_co)).max() < 1e-4
+
+
+def test_batch_matches_per_key():
+    src_co, tris, tgt_co = setup()
+    bind = surface_deform.bind_surface_deform(src_co, tris, tgt_co)
+    deltas = shape_key_deltas(src_co, 5)
+    batch = bind.deform_batch(deltas, 0.5)
+    for d, b in zip(deltas, batch):
+        assert np.allclose(bind.deform(d, 0.5), b, atol=1e-6)
+
+
+def test_vertex_group_subset():
+    src_co, tris, tgt_co = setup()
+    weights = np.where(tgt_co[:, 2] > 0.0, 0.5, 0.0).astype(np.float32)
+    full = surface_deform.bind_surface_deform(src_co, tris, tgt_co)
+    subset = surface_deform.bind_surface_deform(src_co, tris, tgt_co, weights=weights)
+    assert len(subset.target_verts) == np.count_nonzero(weights)
+
+    delta = shape_key_deltas(src_co, 1)[0]
+    expected = full.deform(delta) * weights[:, None]
+    assert np.allclose(subset.deform(delta), expected, atol=1e-6)
+
+
+def test_cached_bind_round_trip(tmp_path):
+    from transfer_shape_keys_via_deform import bind_cache
+
+    src_co, tris, tgt_co = setup()
+    cache = bind_cache.BindCache(str(tmp_path))
+    bind, cached = surface_deform.cached_bind_surface_deform(cache, src_co, tris, tgt_co)
+    again, cached_again = surface_deform.cached_bind_surface_deform(cache, src_co, tris, tgt_co)
+    assert not cached and cached_again
+    delta = shape_key_deltas(src_co, 1)[0]
+    assert np.allclose(bind.deform(delta), again.deform(delta))
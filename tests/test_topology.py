@@ -0,0 +1,80 @@
+import numpy as np
+
+from transfer_shape_keys_via_deform import topology
+from transfer_shape_keys_via_deform.benchmark import sphere_mesh
+
+
+def test_vertex_index_map_reordered():
+    co = sphere_mesh(500)[0].astype(np.float64)
+    order = np.random.default_rng(0).permutation(len(co))
+    index_map = topology.vertex_index_map(co, co[order])
+    assert np.array_equal(index_map, order)
+
+
+def test_vertex_index_map_with_noise():
+    # positions on a 1e-5 lattice, half a step off, would straddle any
+    # rounding to the tolerance
+    rng = np.random.default_rng(1)
+    co = (rng.integers(-1000, 1000, (500, 3)) + 0.5) * 1e-5
+    order = rng.permutation(len(co))
+    for noise in (1e-8, 1e-7):
+        tgt = co[order] + rng.uniform(-noise, noise, co.shape)
+        assert np.array_equal(topology.vertex_index_map(co, tgt), order)
+
+
+def test_vertex_index_map_coincident():
+    co = np.array([[0.0, 0.0, 0.0], [0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.0, 0.0, 0.0]])
+    index_map = topology.vertex_index_map(co, co[::-1])
+    assert sorted(index_map) == [0, 1, 2, 3]
+    assert np.array_equal(co[index_map], co[::-1])
+
+
+def test_vertex_index_map_mismatch():
+    co = sphere_mesh(200)[0].astype(np.float64)
+    moved = co.copy()
+    moved[7] += 1e-3
+    assert topology.vertex_index_map(co, moved) is None
+    assert topology.vertex_index_map(co, co[:-1]) is None
+    # two target vertices on the same source vertex don't pair up
+    doubled = co.copy()
+    doubled[3] = doubled[4]
+    assert topology.vertex_index_map(co, doubled) is None
+
+
+def symmetric_points(rng, count, step=None):
+    # count points on each side of x = 0 and a few on the plane itself,
+    # optionally half a step off a lattice of that step
+    half = rng.uniform(-1.0, 1.0, (count, 3))
+    half[:, 0] = np.abs(half[:, 0]) + 1e-3
+    if step is not None:
+        half = (np.floor(half / step) + 0.5) * step
+    mirrored = half * [-1.0, 1.0, 1.0]
+    plane = rng.uniform(-1.0, 1.0, (10, 3)) * [0.0, 1.0, 1.0]
+    return np.concatenate((half, plane, mirrored))
+
+
+def test_mirror_vertex_map_with_noise():
+    rng = np.random.default_rng(2)
+    co = symmetric_points(rng, 300, step=1e-4)
+    co += rng.uniform(-1e-7, 1e-7, co.shape)
+    mirror_map = topology.mirror_vertex_map(co)
+    expected = np.concatenate((np.arange(310, 610), np.arange(300, 310), np.arange(300)))
+    assert np.array_equal(mirror_map, expected)
+    assert np.array_equal(mirror_map[mirror_map], np.arange(len(co)))
+
+
+def test_mirror_vertex_map_asymmetric():
+    rng = np.random.default_rng(3)
+    co = symmetric_points(rng, 300)
+    co[5, 1] += 1e-2
+    assert topology.mirror_vertex_map(co) is None
+    assert topology.mirror_vertex_map(symmetric_points(rng, 300), axis=1) is None
+
+
+def test_mirrored_offsets():
+    co = symmetric_points(np.random.default_rng(4), 50)
+    mirror_map = topology.mirror_vertex_map(co)
+    offsets = np.zeros_like(co)
+    offsets[:50] = [0.1, 0.2, 0.3]
+    mirrored = topology.mirrored_offsets(offsets, mirror_map)
+    assert np.allclose(mirrored[60:], [-0.1, 0.2, 0.3]) and not mirrored[:60].any()
@@ -0,0 +1,46 @@
+#-*- coding: utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+
+bl_info={
+    "name" : "Transfer Shape Keys Via Deform",
+    "description": "Transfer shape keys from active to selected via deform modifier",
+    "author" : "konoha18537007",
+    "version" : (1, 2),
+    "blender": (3, 0, 0),
+    "category": "Object",
+    "location": "View3D > Object",
+    #"wiki_url": "",
+    #"tracker_url": "",
+}
+
+
+# The add-on is split so that the array engine modules (sparse, surface_deform,
+# mesh_deform) can be imported without bpy, e.g. from worker processes or
+# plain Python.
+# Only the operators need Blender, so they are imported on registration.
+
+def register():
+    from . import operators
+    operators.register()
+
+def unregister():
+    from . import operators
+    operators.unregister()
@@ -0,0 +1,328 @@
+#-*- coding: utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Reproducible benchmarks on procedurally generated meshes and key stacks.
+#
+# The array phases run in plain Python:
+#
+#   python -m transfer_shape_keys_via_deform.benchmark --verts 10000 100000 --keys 10 100 \
+#       --targets 1 4 --output bench.json
+#
+# Inside Blender (blender -b --python benchmark.py -- <args>) the same cases
+# are also built as objects and both operators are timed end to end, with
+# target key block creation, driver creation and shape key restore timed separately. The
+# keys the Array engine makes are compared with the modifier's, and the
+# largest vertex difference per engine is reported as "deviation".
+#
+# --baseline compares against an earlier JSON file and exits with 1 when a
+# phase got slower than the tolerance allows.
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+
+def sphere_mesh(num_verts, radius=1.0):
+    # UV sphere with about num_verts vertices. Returns (co, tris, quads)
+    rings = max(3, int(round(np.sqrt(num_verts / 2.0))))
+    segments = max(3, int(round(num_verts / rings)))
+    theta = np.linspace(0.0, np.pi, rings + 2)[1:-1]
+    phi = np.linspace(0.0, 2.0 * np.pi, segments, endpoint=False)
+    t, p = np.meshgrid(theta, phi, indexing='ij')
+    co = np.stack((np.sin(t) * np.cos(p), np.sin(t) * np.sin(p), np.cos(t)), axis=-1).reshape(-1, 3) * radius
+
+    r, s = np.meshgrid(np.arange(rings - 1), np.arange(segments), indexing='ij')
+    a = (r * segments + s).ravel()
+    b = (r * segments + (s + 1) % segments).ravel()
+    quads = np.stack((a, b, b + segments, a + segments), axis=-1)
+    tris = np.concatenate((quads[:, [0, 1, 2]], quads[:, [0, 2, 3]]))
+    return co.astype(np.float32), tris.astype(np.int32), quads.astype(np.int32)
+
+
+def shape_key_deltas(co, num_keys, seed=0):
+    # Smooth, local bumps along the normal; like facial keys each moves a region
+    rng = np.random.default_rng(seed)
+    normals = co / np.maximum(np.linalg.norm(co, axis=1, keepdims=True), 1e-12)
+    centers = rng.normal(size=(num_keys, 3))
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    deltas = np.empty((num_keys, len(co), 3), dtype=np.float32)
+    for i, c in enumerate(centers):
+        falloff = np.exp(-np.sum((normals - c) ** 2, axis=1) / 0.05)
+        deltas[i] = normals * (0.1 * falloff)[:, None]
+    return deltas
+
+
+class Timer:
+    """Accumulates wall time per phase"""
+
+    def __init__(self):
+        self.phases = {}
+
+    def __call__(self, name):
+        timer = self
+
+        class Phase:
+            def __enter__(self):
+                self.start = time.perf_counter()
+
+            def __exit__(self, *exc):
+                timer.phases[name] = timer.phases.get(name, 0.0) + time.perf_counter() - self.start
+
+        return Phase()
+
+
+def run_array_case(num_verts, num_keys, num_targets, chunk_size, workers, seed=0):
+    from . import pipeline, surface_deform
+
+    src_co, src_tris, _ = sphere_mesh(num_verts)
+    deltas = shape_key_deltas(src_co, num_keys, seed)
+    targets = [sphere_mesh(num_verts, 1.02 + 0.02 * i)[0] for i in range(num_targets)]
+    timer = Timer()
+
+    with timer('bind'):
+        binds = [surface_deform.bind_surface_deform(src_co, src_tris, tgt_co) for tgt_co in targets]
+
+    with timer('evaluate_per_key'):
+        for bind, tgt_co in zip(binds, targets):
+            for d in deltas:
+                co = bind.deform(d)
+                co += tgt_co
+
+    with timer('evaluate_batched'):
+        for bind, tgt_co in zip(binds, targets):
+            for start in range(0, num_keys, chunk_size):
+                pipeline.deformed_coords(bind, tgt_co, deltas[start:start + chunk_size])
+
+    # bind and evaluate everything through the worker pool, as the operator does
+    jobs = [pipeline.TargetJob(None, list(range(num_keys)), surface_deform.bind_surface_deform,
+                               (src_co, src_tris, tgt_co), tgt_co) for tgt_co in targets]
+    with timer('pipeline'):
+        pipeline.run_transfer(jobs, lambda job, keys, out: deltas[keys], lambda job, keys, coords: None,
+                              chunk_size, workers)
+
+    return timer.phases
+
+
+def run_cage_case(num_cage_verts, num_verts, num_keys, num_targets, chunk_size, seed=0):
+    # Array Mesh Deform: a coarse sphere solidified into a cage around the targets
+    from . import mesh_deform, pipeline
+
+    cage_co, cage_tris, _ = sphere_mesh(num_cage_verts)
+    deltas = shape_key_deltas(cage_co, num_keys, seed)
+    targets = [sphere_mesh(num_verts, 1.02 + 0.02 * i)[0] for i in range(num_targets)]
+    timer = Timer()
+
+    with timer('cage_bind'):
+        binds = [mesh_deform.bind_mesh_deform(cage_co, cage_tris, tgt_co, thickness=0.4, offset=0.0)
+                 for tgt_co in targets]
+
+    with timer('cage_evaluate_batched'):
+        for bind, tgt_co in zip(binds, targets):
+            for start in range(0, num_keys, chunk_size):
+                pipeline.deformed_coords(bind, tgt_co, deltas[start:start + chunk_size])
+
+    return timer.phases
+
+
+def run_blender_case(num_verts, num_keys, num_targets, seed=0, cage=False):
+    import bpy
+    from . import mesh_data, operators
+
+    if not operators.TransferShapeKeysViaSurfaceDeform.is_registered:
+        operators.register()
+
+    def new_object(name, co, quads):
+        mesh = bpy.data.meshes.new(name)
+        mesh.vertices.add(len(co))
+        mesh.vertices.foreach_set("co", co.ravel())
+        mesh.loops.add(quads.size)
+        mesh.loops.foreach_set("vertex_index", quads.ravel())
+        mesh.polygons.add(len(quads))
+        mesh.polygons.foreach_set("loop_start", np.arange(0, quads.size, 4, dtype=np.int32))
+        mesh.polygons.foreach_set("loop_total", np.full(len(quads), 4, dtype=np.int32))
+        mesh.update()
+        obj = bpy.data.objects.new(name, mesh)
+        bpy.context.scene.collection.objects.link(obj)
+        return obj
+
+    src_co, _, src_quads = sphere_mesh(num_verts)
+    source = new_object("BenchSource", src_co, src_quads)
+    timer = Timer()
+
+    with timer('source_keys'):
+        source.shape_key_add(name="Basis", from_mix=False)
+        for i, d in enumerate(shape_key_deltas(src_co, num_keys, seed)):
+            mesh_data.add_key_block(source, "Key{0:03d}".format(i), src_co + d)
+
+    targets = []
+    target_meshes = []
+    for i in range(num_targets):
+        tgt_co, _, tgt_quads = sphere_mesh(num_verts, 1.02 + 0.02 * i)
+        targets.append(new_object("BenchTarget{0}".format(i), tgt_co, tgt_quads))
+        target_meshes.append((tgt_co, tgt_quads))
+
+    def run_operator(phase, op, **kwargs):
+        for o in bpy.context.view_layer.objects:
+            o.select_set(o == source or o in targets)
+        bpy.context.view_layer.objects.active = source
+        with timer(phase):
+            # the targets share the source's topology, which the fast path
+            # would copy keys to instead of deforming
+            op(use_fast_path=False, **kwargs)
+
+    def target_keys():
+        return {(o.name, kb.name): mesh_data.key_block_coords(kb)
+                for o in targets for kb in o.data.shape_keys.key_blocks[1:]}
+
+    def largest_difference(keys, other):
+        return max((float(np.abs(co - other[name]).max()) for name, co in keys.items() if name in other),
+                   default=0.0)
+
+    deviation = {}
+    run_operator('surface_modifier', bpy.ops.object.transfer_shape_keys_via_surface_deform,
+                 engine='MODIFIER', add_drivers=False)
+    modifier_keys = target_keys()
+    run_operator('surface_array', bpy.ops.object.transfer_shape_keys_via_surface_deform,
+                 engine='ARRAY', add_drivers=False, use_bind_cache=False)
+    deviation['surface_array'] = largest_difference(target_keys(), modifier_keys)
+
+    # the transferred keys written again as new key blocks of fresh targets,
+    # the way the Array engine writes them
+    array_keys = target_keys()
+    copies = [new_object(o.name + "_Keys", co, quads) for o, (co, quads) in zip(targets, target_meshes)]
+    with timer('key_creation'):
+        for o, copy in zip(targets, copies):
+            for kb in o.data.shape_keys.key_blocks[1:]:
+                mesh_data.add_key_block(copy, kb.name, array_keys[(o.name, kb.name)])
+    run_operator('surface_array_drivers', bpy.ops.object.transfer_shape_keys_via_surface_deform,
+                 engine='ARRAY', add_drivers=True, use_bind_cache=False)
+    timer.phases['driver_creation'] = timer.phases['surface_array_drivers'] - timer.phases['surface_array']
+    run_operator('mesh_modifier', bpy.ops.object.transfer_shape_keys_via_mesh_deform, add_drivers=False)
+    if cage:
+        modifier_keys = target_keys()
+        run_operator('mesh_array', bpy.ops.object.transfer_shape_keys_via_mesh_deform,
+                     engine='ARRAY', add_drivers=False, use_bind_cache=False)
+        deviation['mesh_array'] = largest_difference(target_keys(), modifier_keys)
+
+    with timer('restore'):
+        snapshot = mesh_data.ShapeKeySnapshot(source.data)
+        mesh_data.set_all_key_blocks(source.data, 'value', 0.0)
+        snapshot.restore()
+
+    for obj in [source] + targets + copies:
+        mesh = obj.data
+        bpy.data.objects.remove(obj)
+        bpy.data.meshes.remove(mesh)
+    return timer.phases, deviation
+
+
+def compare(results, baseline, tolerance):
+    # Phases slower than the baseline by more than tolerance (a fraction)
+    def key(case):
+        return (case['verts'], case['keys'], case['targets'])
+
+    old = {key(case): case['phases'] for case in baseline['cases']}
+    regressions = []
+    for case in results['cases']:
+        for phase, seconds in case['phases'].items():
+            before = old.get(key(case), {}).get(phase)
+            if before and seconds > before * (1.0 + tolerance):
+                regressions.append({'case': key(case), 'phase': phase, 'baseline': before, 'seconds': seconds})
+    return regressions
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+        if '--' in argv:
+            argv = argv[argv.index('--') + 1:]
+    parser = argparse.ArgumentParser(description="Benchmark shape key transfer")
+    parser.add_argument('--verts', type=int, nargs='+', default=[10000, 100000],
+                        help="vertex counts (source and every target), e.g. 10000 100000 2000000")
+    parser.add_argument('--keys', type=int, nargs='+', default=[10, 100], help="shape key counts, e.g. 10 100 500")
+    parser.add_argument('--targets', type=int, nargs='+', default=[1], help="target counts")
+    parser.add_argument('--chunk-size', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cage-verts', type=int, default=0,
+                        help="also time the Array Mesh Deform engine with a cage of this many vertices")
+    parser.add_argument('--output', help="write JSON results here instead of stdout")
+    parser.add_argument('--baseline', help="earlier JSON results to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed slowdown against the baseline")
+    args = parser.parse_args(argv)
+
+    try:
+        import bpy
+    except ImportError:
+        bpy = None
+
+    results = {
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'blender': bpy.app.version_string if bpy else None,
+        },
+        'settings': {'chunk_size': args.chunk_size, 'workers': args.workers, 'seed': args.seed,
+                     'cage_verts': args.cage_verts},
+        'cases': [],
+    }
+    for num_verts, num_keys, num_targets in itertools.product(args.verts, args.keys, args.targets):
+        phases = run_array_case(num_verts, num_keys, num_targets, args.chunk_size, args.workers, args.seed)
+        if args.cage_verts:
+            phases.update(run_cage_case(args.cage_verts, num_verts, num_keys, num_targets, args.chunk_size, args.seed))
+        case = {'verts': num_verts, 'keys': num_keys, 'targets': num_targets, 'phases': phases}
+        if bpy is not None:
+            blender_phases, case['deviation'] = run_blender_case(num_verts, num_keys, num_targets, args.seed,
+                                                                 args.cage_verts > 0)
+            phases.update(blender_phases)
+        results['cases'].append(case)
+        print("verts={0} keys={1} targets={2}: ".format(num_verts, num_keys, num_targets) +
+              ", ".join("{0} {1:.3f}s".format(k, v) for k, v in phases.items()), file=sys.stderr)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            results['regressions'] = compare(results, json.load(f), args.tolerance)
+        status = 1 if results['regressions'] else 0
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+    return status
+
+
+if __name__ == "__main__":
+    if __package__:
+        sys.exit(main())
+    # started as a script by Blender: import as part of the package
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from transfer_shape_keys_via_deform import benchmark
+    benchmark.main()
@@ -0,0 +1,136 @@
+#-*- coding: utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# On-disk cache of bind data.
+#
+# Each entry is a directory of .npy files named after a hash of everything the
+# bind depends on (topology, rest coordinates, settings). Entries are loaded
+# memory-mapped, so a cache hit costs almost nothing until the data is used.
+# Every entry lists its arrays in an index file, and only entries with all of
+# them readable are hits: one partly written or partly removed (eviction by
+# another process, files locked by a memory map) is dropped instead.
+# The cache is capped in size and evicts the least recently used entries.
+
+import hashlib
+import os
+import shutil
+import tempfile
+import uuid
+
+import numpy as np
+
+
+DEFAULT_DIRECTORY = os.path.join(tempfile.gettempdir(), "transfer_shape_keys_bind_cache")
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+INDEX_NAME = "arrays.txt"       # names of an entry's arrays, one per line
+
+
+def hash_key(*items):
+    # Hash arrays and plain values into a cache key
+    h = hashlib.sha1()
+    for item in items:
+        if isinstance(item, np.ndarray):
+            h.update(str((item.dtype.str, item.shape)).encode())
+            h.update(np.ascontiguousarray(item).tobytes())
+        else:
+            h.update(repr(item).encode())
+        h.update(b'|')
+    return h.hexdigest()
+
+
+class BindCache:
+    """Size-capped LRU cache of named arrays, stored as memory-mappable .npy files"""
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def __entry_path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        # Arrays of an entry, None when there is no complete entry for key
+        path = self.__entry_path(key)
+        if not os.path.isdir(path):
+            return None
+        try:
+            with open(os.path.join(path, INDEX_NAME)) as f:
+                names = f.read().split()
+            arrays = {}
+            for name in names:
+                arrays[name] = np.load(os.path.join(path, name + '.npy'), mmap_mode='r')
+            os.utime(path)     # mark as recently used
+        except (OSError, ValueError, EOFError):
+            # incomplete or damaged, it is bound again and stored anew
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        return arrays
+
+    def put(self, key, arrays):
+        path = self.__entry_path(key)
+        if os.path.isdir(path):
+            return
+        os.makedirs(self.directory, exist_ok=True)
+
+        # write to a temporary directory first, so readers never see partial entries
+        tmp_path = self.__entry_path('.tmp_' + uuid.uuid4().hex)
+        os.makedirs(tmp_path)
+        try:
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp_path, name + '.npy'), np.ascontiguousarray(array))
+            with open(os.path.join(tmp_path, INDEX_NAME), 'w') as f:
+                f.write("\n".join(arrays))
+            os.replace(tmp_path, path)
+        except OSError:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        self.evict()
+
+    def entries(self):
+        # (mtime, bytes, path) for every entry, oldest first
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for name in os.listdir(self.directory):
+            path = self.__entry_path(name)
+            if name.startswith('.tmp_') or not os.path.isdir(path):
+                continue
+            try:
+                size = sum(f.stat().st_size for f in os.scandir(path))
+                entries.append((os.stat(path).st_mtime, size, path))
+            except OSError:
+                pass
+        entries.sort()
+        return entries
+
+    def size(self):
+        return sum(e[1] for e in self.entries())
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(e[1] for e in entries)
+        for mtime, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        for mtime, size, path in self.entries():
+            shutil.rmtree(path, ignore_errors=True)
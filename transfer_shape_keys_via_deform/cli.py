@@ -0,0 +1,246 @@
+#-*- coding: utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Headless batch transfer over many .blend files.
+#
+# Run from any Python (Blender's own included) to process a list or glob of
+# files, each in its own background Blender instance:
+#
+#   python -m transfer_shape_keys_via_deform.cli --blender /path/to/blender \
+#       --source Body --target "Shirt*" --target Pants --jobs 4 \
+#       --set engine=ARRAY --set falloff=6.0 --report report.json assets/*.blend
+#
+# Every instance runs this file again in worker mode, which transfers the keys
+# in the open file, saves it and writes a JSON result. The results of all
+# files are gathered into one report.
+
+import argparse
+import ast
+import concurrent.futures
+import fnmatch
+import glob
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+OPERATORS = {
+    'surface': 'transfer_shape_keys_via_surface_deform',
+    'mesh': 'transfer_shape_keys_via_mesh_deform',
+}
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Transfer shape keys via deform in many .blend files")
+    parser.add_argument('files', nargs='*', help=".blend files or glob patterns")
+    parser.add_argument('--blender', default='blender', help="Blender executable")
+    parser.add_argument('--source', required=True, help="name of the source object")
+    parser.add_argument('--target', action='append', default=[],
+                        help="name or fnmatch pattern of target objects (repeatable, default: all other meshes)")
+    parser.add_argument('--operator', choices=sorted(OPERATORS), default='surface')
+    parser.add_argument('--set', dest='options', action='append', default=[], metavar='NAME=VALUE',
+                        help="operator option, e.g. engine=ARRAY or falloff=6.0 (repeatable)")
+    parser.add_argument('--output-dir', help="save results here instead of overwriting the input files")
+    parser.add_argument('--jobs', type=int, default=1, help="number of Blender instances run in parallel")
+    parser.add_argument('--timeout', type=float, default=None, help="seconds before a file is given up")
+    parser.add_argument('--report', help="write the JSON report to this file instead of stdout")
+    # used internally by the Blender instances
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def parse_options(options):
+    # "name=value" strings to operator keyword arguments
+    kwargs = {}
+    for option in options:
+        name, sep, value = option.partition('=')
+        if not sep:
+            raise ValueError("Invalid option {0!r}, expected NAME=VALUE".format(option))
+        try:
+            kwargs[name.strip()] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            kwargs[name.strip()] = value     # bare strings, e.g. engine=ARRAY
+    return kwargs
+
+
+def expand_files(patterns):
+    files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for f in matches:
+            if f not in files:
+                files.append(f)
+    return files
+
+
+def output_path(args, blend_file):
+    if args.output_dir:
+        return os.path.join(args.output_dir, os.path.basename(blend_file))
+    return blend_file
+
+
+# Blender side
+
+def run_worker(args):
+    import bpy
+    from . import operators
+
+    result = {'file': bpy.data.filepath, 'targets': {}, 'errors': []}
+    start = time.perf_counter()
+    try:
+        if not operators.TransferShapeKeysViaSurfaceDeform.is_registered:
+            operators.register()
+
+        source = bpy.data.objects.get(args.source)
+        if source is None:
+            raise RuntimeError("Source object {0!r} not found".format(args.source))
+        patterns = args.target or ['*']
+        targets = [o for o in bpy.context.view_layer.objects
+                   if o != source and o.type == 'MESH' and any(fnmatch.fnmatchcase(o.name, p) for p in patterns)]
+        if not targets:
+            raise RuntimeError("No target objects match {0}".format(patterns))
+
+        for o in bpy.context.view_layer.objects:
+            o.select_set(o == source or o in targets)
+        bpy.context.view_layer.objects.active = source
+
+        kwargs = parse_options(args.options)
+        operators.vg_enum_callback(bpy.context)
+        if kwargs.get('vg_name') and kwargs['vg_name'] != 'NONE':
+            kwargs['vg_name'] += '_id'      # enum identifiers, see vg_enum_callback
+
+        op_start = time.perf_counter()
+        getattr(bpy.ops.object, OPERATORS[args.operator])(**kwargs)
+        result['transfer_seconds'] = time.perf_counter() - op_start
+
+        # a source key missing on a target means its transfer failed, unless
+        # the operator skipped it for having no effect (skip_empty)
+        src_names = [kb.name for kb in source.data.shape_keys.key_blocks[1:]]
+        skipped_prop = operators.TransferShapeKeys.KEY_SKIPPED_PROP
+        for o in targets:
+            tgt_names = set(o.data.shape_keys.key_blocks.keys()) if o.data.shape_keys else set()
+            skipped = set(o[skipped_prop].to_dict().get(source.name, ())) if skipped_prop in o else set()
+            missing = [name for name in src_names if name not in tgt_names and name not in skipped]
+            if kwargs.get('ignore_muted'):
+                muted = {kb.name for kb in source.data.shape_keys.key_blocks if kb.mute}
+                missing = [name for name in missing if name not in muted]
+            result['targets'][o.name] = {'shape_keys': len(tgt_names), 'missing': missing,
+                                         'skipped': sorted(skipped & set(src_names) - tgt_names)}
+            if missing:
+                result['errors'].append("{0}: {1} shape keys missing".format(o.name, len(missing)))
+
+        save_path = output_path(args, bpy.data.filepath)
+        if os.path.dirname(save_path):
+            os.makedirs(os.path.dirname(save_path), exist_ok=True)
+        bpy.ops.wm.save_as_mainfile(filepath=save_path, copy=save_path != bpy.data.filepath)
+        result['saved'] = save_path
+    except Exception as e:
+        result['errors'].append("{0}: {1}".format(type(e).__name__, e))
+    result['seconds'] = time.perf_counter() - start
+
+    with open(args.result, 'w') as f:
+        json.dump(result, f)
+
+
+# Orchestrator side
+
+def run_file(args, blend_file, argv):
+    fd, result_path = tempfile.mkstemp(suffix='.json', prefix='transfer_shape_keys_')
+    os.close(fd)
+    cmd = [args.blender, '-b', blend_file, '--python-exit-code', '1', '--python', os.path.abspath(__file__), '--',
+           '--worker', '--result', result_path] + argv
+
+    start = time.perf_counter()
+    report = {'file': blend_file}
+    try:
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                              universal_newlines=True, timeout=args.timeout)
+        report['returncode'] = proc.returncode
+        try:
+            with open(result_path) as f:
+                report.update(json.load(f))
+        except (OSError, ValueError):
+            report['errors'] = ["No result from Blender"]
+            report['log'] = proc.stdout[-4000:]
+    except subprocess.TimeoutExpired:
+        report['errors'] = ["Timed out after {0} seconds".format(args.timeout)]
+    except OSError as e:
+        report['errors'] = ["Could not run Blender: {0}".format(e)]
+    finally:
+        os.remove(result_path)
+    report['file'] = blend_file
+    report['wall_seconds'] = time.perf_counter() - start
+    report['ok'] = report.get('returncode') == 0 and not report.get('errors')
+    return report
+
+
+def run_batch(args):
+    files = expand_files(args.files)
+    # the workers get the same arguments minus the file list and orchestrator options
+    worker_argv = ['--source', args.source, '--operator', args.operator]
+    for t in args.target:
+        worker_argv += ['--target', t]
+    for o in args.options:
+        worker_argv += ['--set', o]
+    if args.output_dir:
+        worker_argv += ['--output-dir', os.path.abspath(args.output_dir)]
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        reports = list(pool.map(lambda f: run_file(args, f, worker_argv), files))
+
+    summary = {
+        'files': len(reports),
+        'failed': sum(1 for r in reports if not r['ok']),
+        'seconds': time.perf_counter() - start,
+        'results': reports,
+    }
+    text = json.dumps(summary, indent=2)
+    if args.report:
+        with open(args.report, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+    return 1 if summary['failed'] else 0
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+        if '--' in argv:        # blender ... --python cli.py -- <args>
+            argv = argv[argv.index('--') + 1:]
+    args = parse_args(argv)
+    if args.worker:
+        run_worker(args)
+        return 0
+    return run_batch(args)
+
+
+if __name__ == "__main__":
+    if __package__:
+        sys.exit(main())
+    # started as a script by Blender: import as part of the package
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from transfer_shape_keys_via_deform import cli
+    cli.main()
@@ -0,0 +1,183 @@
+#-*- coding: utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Shape key deltas stored outside the .blend.
+#
+# A key file holds the offsets of a mesh's shape keys from their relative
+# keys, so keys transferred once can be put on the same mesh in other files
+# without transferring them again. Only the vertices a key moves are stored.
+# Layout:
+#   MAGIC, header size (uint64 little endian), header (UTF-8 JSON),
+#   vertex indices of all keys back to back (int32),
+#   offsets of those vertices ((n, 3) float16 or float32).
+# Both arrays start on an ALIGNMENT boundary, so they are memory-mapped
+# as they are. The header has the topology hash of the mesh, and the name,
+# relative key, vertex group, slider range, value and mute of every key.
+
+import json
+import os
+import uuid
+
+import numpy as np
+
+from . import bind_cache
+
+
+MAGIC = b"TSKDELTA"
+VERSION = 1
+ALIGNMENT = 64
+PRECISIONS = {'FLOAT16': '<f2', 'FLOAT32': '<f4'}
+
+
+def topology_hash(num_verts, loops, loop_totals):
+    # Vertex count and polygons of a mesh: keys only fit meshes with the same
+    return bind_cache.hash_key('topology', num_verts, np.asarray(loops, dtype=np.int32),
+                               np.asarray(loop_totals, dtype=np.int32))
+
+
+def sparse_offsets(delta, threshold=0.0):
+    # (indices, offsets) of the vertices a (verts, 3) delta moves by more than threshold
+    if threshold > 0.0:
+        moved = np.einsum('ij,ij->i', delta, delta) > threshold * threshold
+    else:
+        moved = np.any(delta != 0.0, axis=1)
+    indices = np.flatnonzero(moved).astype(np.int32)
+    return indices, delta[indices]
+
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_key_file(path, num_verts, topology, keys, precision='FLOAT32', threshold=0.0):
+    """Write shape keys to a key file.
+
+    keys: (settings, delta) pairs, settings a dict of the key's name,
+    relative_key, vertex_group, slider_min, slider_max, value and mute,
+    delta its (verts, 3) offsets from the relative key. Returns the number
+    of keys written.
+    """
+    dtype = np.dtype(PRECISIONS[precision])
+    entries = []
+    indices = []
+    offsets = []
+    start = 0
+    for settings, delta in keys:
+        idx, off = sparse_offsets(np.asarray(delta, dtype=np.float32), threshold)
+        entries.append(dict(settings, start=start, count=len(idx)))
+        indices.append(idx)
+        offsets.append(off.astype(dtype))
+        start += len(idx)
+
+    header = json.dumps({
+        'version': VERSION,
+        'num_verts': num_verts,
+        'topology': topology,
+        'dtype': dtype.str,
+        'keys': entries,
+    }).encode('utf-8')
+    indices_start = _aligned(len(MAGIC) + 8 + len(header))
+    offsets_start = _aligned(indices_start + 4 * start)
+
+    # write next to the file first, so a failed export leaves no partial file
+    tmp_path = "{0}.tmp_{1}".format(path, uuid.uuid4().hex)
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(np.uint64(len(header)).tobytes())
+            f.write(header)
+            f.seek(indices_start)
+            for idx in indices:
+                f.write(idx.astype('<i4').tobytes())
+            f.seek(offsets_start)
+            for off in offsets:
+                f.write(off.tobytes())
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return len(entries)
+
+
+class KeyFile:
+    """A key file opened for reading, its arrays memory-mapped"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            magic = f.read(len(MAGIC))
+            size = np.frombuffer(f.read(8), dtype='<u8')
+            if magic != MAGIC or len(size) != 1:
+                raise ValueError("{0} is not a shape key file".format(path))
+            try:
+                header = json.loads(f.read(int(size[0])).decode('utf-8'))
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                raise ValueError("{0} has a damaged header".format(path))
+        if header.get('version') != VERSION:
+            raise ValueError("{0} has unsupported version {1}".format(path, header.get('version')))
+
+        self.num_verts = header['num_verts']
+        self.topology = header['topology']
+        self.keys = header['keys']
+        dtype = np.dtype(header['dtype'])
+        total = sum(entry['count'] for entry in self.keys)
+        indices_start = _aligned(len(MAGIC) + 8 + int(size[0]))
+        offsets_start = _aligned(indices_start + 4 * total)
+        if total:
+            self.indices = np.memmap(path, dtype='<i4', mode='r', offset=indices_start, shape=(total,))
+            self.offsets = np.memmap(path, dtype=dtype, mode='r', offset=offsets_start, shape=(total, 3))
+        else:
+            self.indices = np.empty(0, dtype=np.int32)
+            self.offsets = np.empty((0, 3), dtype=dtype)
+
+    def key_offsets(self, i):
+        # (vertex indices, float32 offsets) of the i-th key
+        entry = self.keys[i]
+        start = entry['start']
+        stop = start + entry['count']
+        return self.indices[start:stop], self.offsets[start:stop].astype(np.float32)
+
+    def key_coords(self, i, relative_co, out=None):
+        # Coordinates of the i-th key on a mesh whose relative key has relative_co
+        if out is None:
+            out = relative_co.copy()
+        else:
+            out[:] = relative_co
+        indices, offsets = self.key_offsets(i)
+        out[indices] += offsets
+        return out
+
+
+def import_order(keys):
+    # Indices of keys (dicts with name and relative_key) so that a key comes
+    # after the key it is relative to, when that is in keys too
+    by_name = {entry['name']: i for i, entry in enumerate(keys)}
+    order = []
+    seen = set()
+    for i in range(len(keys)):
+        # walk up the relative keys not added yet, then add them from the top down
+        chain = []
+        j = i
+        while j is not None and j not in seen:
+            seen.add(j)
+            chain.append(j)
+            j = by_name.get(keys[j]['relative_key'])
+        order.extend(reversed(chain))
+    return order
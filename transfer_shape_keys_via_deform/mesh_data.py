@@ -0,0 +1,269 @@
+#-*- coding: utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Bulk reads and writes between Blender data and NumPy arrays.
+# Everything goes through foreach_get/foreach_set; nothing here loops over
+# vertices in Python except vertex group weights, which have no bulk accessor.
+
+import numpy as np
+
+
+def vertex_coords(mesh):
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    return co.reshape(-1, 3)
+
+def key_block_coords(key_block, out=None):
+    # out: optional contiguous float32 (verts, 3) array to read into
+    co = np.empty((len(key_block.data), 3), dtype=np.float32) if out is None else out
+    key_block.data.foreach_get("co", co.reshape(-1))
+    return co
+
+def rest_coords(mesh):
+    # Coordinates of the reference (basis) key, or of the mesh if it has no keys
+    if mesh.shape_keys is not None:
+        return key_block_coords(mesh.shape_keys.reference_key)
+    return vertex_coords(mesh)
+
+def evaluated_coords(obj, depsgraph):
+    # Coordinates of obj with its modifiers and shape keys evaluated, None
+    # when the modifiers change the number of vertices
+    obj_eval = obj.evaluated_get(depsgraph)
+    mesh = obj_eval.to_mesh()
+    try:
+        if len(mesh.vertices) != len(obj.data.vertices):
+            return None
+        return vertex_coords(mesh)
+    finally:
+        obj_eval.to_mesh_clear()
+
+def triangles(mesh):
+    mesh.calc_loop_triangles()
+    tris = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("vertices", tris)
+    return tris.reshape(-1, 3)
+
+def loop_topology(mesh):
+    # (vertex index of every loop, loop count of every polygon)
+    loops = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loops)
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+    return loops, loop_totals
+
+def vertex_group_weights(obj, vg_name, invert=False):
+    # Per vertex weights of a vertex group, None when there is no such group
+    vg = obj.vertex_groups.get(vg_name) if vg_name else None
+    if vg is None:
+        return None
+    weights = np.zeros(len(obj.data.vertices), dtype=np.float32)
+    index = vg.index
+    for v in obj.data.vertices:
+        for g in v.groups:
+            if g.group == index:
+                weights[v.index] = g.weight
+                break
+    if invert:
+        weights = 1.0 - weights
+    return weights
+
+def key_block_delta(key_block, obj):
+    # Offset of a key from its relative key, scaled by the key's vertex group,
+    # i.e. what the key contributes at value 1.0
+    delta = key_block_coords(key_block)
+    relative_key = key_block.relative_key
+    if relative_key is not None and relative_key != key_block:
+        delta -= key_block_coords(relative_key)
+    else:
+        delta[:] = 0.0
+    weights = vertex_group_weights(obj, key_block.vertex_group)
+    if weights is not None:
+        delta *= weights[:, None]
+    return delta
+
+def key_block_deltas(key_blocks, obj, matrix=None, out=None):
+    # Deltas of several keys stacked into one (keys, verts, 3) array,
+    # optionally transformed by matrix. Without matrix they are read straight
+    # into out when it is given and has room for them
+    num_keys = len(key_blocks)
+    num_verts = len(obj.data.vertices)
+    if out is None or len(out) < num_keys or out.shape[1:] != (num_verts, 3):
+        out = np.empty((num_keys, num_verts, 3), dtype=np.float32)
+    deltas = out[:num_keys]
+    relative = np.empty((num_verts, 3), dtype=np.float32)
+    weights = {}
+    for i, key_block in enumerate(key_blocks):
+        key_block_coords(key_block, deltas[i])
+        relative_key = key_block.relative_key
+        if relative_key is not None and relative_key != key_block:
+            deltas[i] -= key_block_coords(relative_key, relative)
+        else:
+            deltas[i] = 0.0
+        vg_name = key_block.vertex_group
+        if vg_name:
+            if vg_name not in weights:
+                weights[vg_name] = vertex_group_weights(obj, vg_name)
+            if weights[vg_name] is not None:
+                deltas[i] *= weights[vg_name][:, None]
+    if matrix is not None:
+        m = matrix_to_array(matrix)[:3, :3].astype(np.float32)
+        deltas = deltas @ m.T
+    return deltas
+
+def merged_key_block_deltas(merged, names, matrices, out=None):
+    # Deltas of keys merged by name across several objects, stacked into one
+    # (keys, verts of all objects, 3) array: every object's key of that name
+    # on the object's own vertices, transformed by its matrix, zero where it
+    # has no such key. merged: [(obj, {name: key block})]
+    num_verts = [len(obj.data.vertices) for obj, _ in merged]
+    num_keys = len(names)
+    if out is None or len(out) < num_keys or out.shape[1:] != (sum(num_verts), 3):
+        out = np.empty((num_keys, sum(num_verts), 3), dtype=np.float32)
+    deltas = out[:num_keys]
+    start = 0
+    for (obj, stack), n, matrix in zip(merged, num_verts, matrices):
+        part = deltas[:, start:start + n]
+        rows = [i for i, name in enumerate(names) if name in stack]
+        part[[i for i, name in enumerate(names) if name not in stack]] = 0.0
+        if rows:
+            part[rows] = key_block_deltas([stack[names[i]] for i in rows], obj, matrix)
+        start += n
+    return deltas
+
+def merged_rest_geometry(objs, matrices):
+    # Rest coordinates, transformed by matrices, and triangles of several
+    # meshes joined into one
+    coords = []
+    tris = []
+    offset = 0
+    for obj, matrix in zip(objs, matrices):
+        coords.append(transform_coords(matrix, rest_coords(obj.data)))
+        tris.append(triangles(obj.data) + offset)
+        offset += len(coords[-1])
+    return np.concatenate(coords), np.concatenate(tris)
+
+def matrix_to_array(matrix):
+    return np.array([list(row) for row in matrix], dtype=np.float64)
+
+def transform_coords(matrix, co):
+    m = matrix_to_array(matrix)
+    return (co @ m[:3, :3].T + m[:3, 3]).astype(np.float32)
+
+def add_key_block(obj, name, coords, replace=False):
+    # Create a shape key without touching the active object or running operators.
+    # With replace, an existing key of that name (except the basis) gets the
+    # coordinates instead, keeping its drivers and settings
+    if obj.data.shape_keys is None:
+        obj.shape_key_add(name="Basis", from_mix=False)
+    shape_keys = obj.data.shape_keys
+    key_block = shape_keys.key_blocks.get(name) if replace else None
+    if key_block is None or key_block == shape_keys.reference_key:
+        key_block = obj.shape_key_add(name=name, from_mix=False)
+    key_block.data.foreach_set("co", np.ascontiguousarray(coords, dtype=np.float32).ravel())
+    if replace:
+        tag_shape_keys_update(obj.data)
+    return key_block
+
+
+def set_all_key_blocks(mesh, prop, value):
+    # Set one property of every key block in a single foreach_set
+    shape_keys = mesh.shape_keys
+    if shape_keys is None:
+        return
+    key_blocks = shape_keys.key_blocks
+    dtype = np.bool_ if isinstance(value, bool) else np.float32
+    key_blocks.foreach_set(prop, np.full(len(key_blocks), value, dtype=dtype))
+    tag_shape_keys_update(mesh)
+
+def copy_key_block_settings(pairs, props=('slider_max', 'slider_min', 'slider_max', 'mute')):
+    # Copy settings of source key blocks to key blocks of one Key, given as
+    # (key block, source key block) pairs, with one foreach_set per property.
+    # slider_max comes again after slider_min, since each clamps the other
+    if not pairs:
+        return
+    shape_keys = pairs[0][0].id_data
+    key_blocks = shape_keys.key_blocks
+    index = {name: i for i, name in enumerate(key_blocks.keys())}
+    rows = np.array([index[kb.name] for kb, _ in pairs], dtype=np.int64)
+    for prop in props:
+        values = np.empty(len(key_blocks), dtype=np.bool_ if prop == 'mute' else np.float32)
+        key_blocks.foreach_get(prop, values)
+        values[rows] = [getattr(src, prop) for _, src in pairs]
+        key_blocks.foreach_set(prop, values)
+    tag_shape_keys_update(shape_keys.user)
+
+def tag_shape_keys_update(mesh):
+    # foreach_set bypasses the RNA update callbacks
+    mesh.shape_keys.update_tag()
+    mesh.update_tag()
+
+
+class ShapeKeySnapshot:
+    """Value, mute and slider range of every key block of a mesh, as arrays"""
+    
+    FLOAT_PROPS = ('slider_min', 'slider_max', 'value')
+    
+    def __init__(self, mesh):
+        self.mesh = mesh
+        self.names = []
+        self.arrays = {}
+        shape_keys = mesh.shape_keys
+        if shape_keys is None:
+            return
+        key_blocks = shape_keys.key_blocks
+        self.names = [kb.name for kb in key_blocks]
+        self.arrays = self.__read(key_blocks)
+    
+    def __read(self, key_blocks):
+        arrays = {}
+        for prop in self.FLOAT_PROPS:
+            arrays[prop] = np.empty(len(key_blocks), dtype=np.float32)
+            key_blocks.foreach_get(prop, arrays[prop])
+        arrays['mute'] = np.empty(len(key_blocks), dtype=np.bool_)
+        key_blocks.foreach_get('mute', arrays['mute'])
+        return arrays
+    
+    def restore(self):
+        shape_keys = self.mesh.shape_keys
+        if shape_keys is None or not self.names:
+            return
+        key_blocks = shape_keys.key_blocks
+        
+        # Key blocks may have been added or removed since the snapshot. Unless
+        # only new keys were appended, match the stored keys by name and keep
+        # the current state of keys that did not exist back then.
+        names = [kb.name for kb in key_blocks]
+        if names[:len(self.names)] == self.names:
+            src = np.arange(len(self.names))
+            dst = src
+        else:
+            index = {name: i for i, name in enumerate(self.names)}
+            dst = np.array([i for i, name in enumerate(names) if name in index], dtype=np.int64)
+            src = np.array([index[names[i]] for i in dst], dtype=np.int64)
+        
+        arrays = self.__read(key_blocks)
+        for prop, array in arrays.items():
+            array[dst] = self.arrays[prop][src]
+        
+        # slider_min is clamped below slider_max, so it is set again once the
+        # range is in place; value is clamped to the range, so it comes last
+        for prop in ('slider_min', 'slider_max', 'slider_min', 'value', 'mute'):
+            key_blocks.foreach_set(prop, arrays[prop])
+        tag_shape_keys_update(self.mesh)
@@ -0,0 +1,353 @@
+#-*- coding: utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Array implementation of cage deformation, for the Mesh Deform operator.
+#
+# The Mesh Deform modifier solves for harmonic coordinates on a voxel grid,
+# which is what makes binding at high precision so slow. Here every target
+# vertex gets mean value coordinates of the closed source cage instead (Ju,
+# Schaefer, Warren 2005), a closed form interpolant, so a source shape key
+# turns into
+#
+#   target_delta = W @ source_delta
+#
+# with W (target verts x source verts) a sparse matrix computed once per
+# target. Exact mean value coordinates depend on every cage triangle, which
+# would make W dense and the bind O(target verts x cage triangles). Only the
+# triangles nearest to a vertex (by centroid, through spatial.PointGrid) are
+# summed, only its largest coordinates are kept, and those are normalized to
+# sum to one. The rest pose and translations of the cage still map exactly;
+# other motions are approximated, closely for vertices near the cage and
+# more coarsely deep inside it, where far parts of the cage no longer pull.
+#
+# No bpy in here: inputs and outputs are plain NumPy arrays.
+
+import numpy as np
+
+from . import bind_cache, spatial
+from .sparse import CSRMatrix
+
+
+DEFAULT_PRUNE = 1e-3            # coordinates below this times the row's largest are dropped
+DEFAULT_NUM_TRIANGLES = 64      # nearest cage triangles summed per target vertex
+DEFAULT_MAX_WEIGHTS = 16        # cage vertices kept per target vertex
+BIND_CHUNK_ELEMENTS = 1 << 18   # target verts x candidate triangles per bind chunk
+
+
+def vertex_normals(co, tris):
+    # Area weighted vertex normals of a triangle mesh
+    tri_co = co[tris]
+    face_normals = np.cross(tri_co[:, 1] - tri_co[:, 0], tri_co[:, 2] - tri_co[:, 0])
+    normals = np.zeros_like(co)
+    for k in range(3):
+        np.add.at(normals, tris[:, k], face_normals)
+    return normals / np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-12)
+
+
+def solidified_cage(co, tris, thickness, offset=-1.0):
+    """Closed shell around an open surface, like the Solidify modifier.
+
+    The two layers lie at thickness * (offset - 1) / 2 and
+    thickness * (offset + 1) / 2 along the vertex normals, joined along the
+    boundary edges. Returns (co, tris); vertex i + len(co) is the copy of
+    vertex i in the second layer.
+    """
+    co = np.asarray(co, dtype=np.float64)
+    tris = np.asarray(tris, dtype=np.int64).reshape(-1, 3)
+    n = len(co)
+    normals = vertex_normals(co, tris)
+    inner = co + normals * (thickness * (offset - 1.0) * 0.5)
+    outer = co + normals * (thickness * (offset + 1.0) * 0.5)
+
+    # boundary edges are the ones used by a single triangle, in its winding
+    edges = np.concatenate((tris[:, [0, 1]], tris[:, [1, 2]], tris[:, [2, 0]]))
+    undirected = np.sort(edges, axis=1)
+    _, inverse, counts = np.unique(undirected, axis=0, return_inverse=True, return_counts=True)
+    boundary = edges[counts[inverse.ravel()] == 1]
+    a, b = boundary[:, 0], boundary[:, 1]
+    rim = np.concatenate((np.stack((b, a, a + n), axis=1), np.stack((b, a + n, b + n), axis=1)))
+
+    shell_tris = np.concatenate((tris, tris[:, ::-1] + n, rim))
+    return np.concatenate((outer, inner)), shell_tris
+
+
+def triangle_weights(u, d, eps=1e-8):
+    """Mean value weights every triangle gives its corners.
+
+    u: (..., 3 corners, 3) unit vectors from the point to the corners, d:
+    (..., 3) distances to them. Returns (weights (..., 3), on_tri (...),
+    bary (..., 3)): on_tri marks triangles the point lies on, for which bary
+    are (unnormalized) barycentric coordinates and weights are zero.
+    """
+    nxt = [1, 2, 0]
+    prv = [2, 0, 1]
+    l = np.linalg.norm(u[..., nxt, :] - u[..., prv, :], axis=-1)
+    theta = 2.0 * np.arcsin(np.clip(l * 0.5, 0.0, 1.0))
+    h = theta.sum(axis=-1) * 0.5
+    sin_theta = np.sin(theta)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # point on the triangle: barycentric from the opposite angles
+        on_tri = np.pi - h < eps
+        bary = sin_theta * d[..., prv] * d[..., nxt]
+
+        c = 2.0 * np.sin(h)[..., None] * np.sin(h[..., None] - theta) / (sin_theta[..., nxt] * sin_theta[..., prv]) - 1.0
+        sign = np.sign(np.linalg.det(u))[..., None]
+        s = sign * np.sqrt(np.maximum(1.0 - c * c, 0.0))
+        # triangles whose plane contains the point don't contribute
+        valid = np.all(np.abs(s) > eps, axis=-1) & ~on_tri
+        w = (theta - c[..., nxt] * theta[..., prv] - c[..., prv] * theta[..., nxt]) / \
+            (d * sin_theta[..., nxt] * s[..., prv])
+        weights = np.where(valid[..., None], w, 0.0)
+    return weights, on_tri, bary
+
+
+def mean_value_coordinates(cage_co, cage_tris, points, eps=1e-8):
+    """Exact mean value coordinates (points x cage verts) of points in a
+    closed triangle cage, summed over every triangle. Points on the cage get
+    the barycentric coordinates of their triangle. Every row sums to one.
+    """
+    cage_co = np.asarray(cage_co, dtype=np.float64)
+    cage_tris = np.asarray(cage_tris, dtype=np.int64).reshape(-1, 3)
+    points = np.asarray(points, dtype=np.float64)
+    num_cage = len(cage_co)
+
+    # every triangle corner scattered to its cage vertex: (verts x tris * 3)
+    corners = CSRMatrix.from_coo(cage_tris.ravel(), np.arange(cage_tris.size),
+                                 np.ones(cage_tris.size), (num_cage, cage_tris.size))
+
+    u = cage_co[None, :, :] - points[:, None, :]            # (p, verts, 3)
+    d = np.linalg.norm(u, axis=-1)
+    on_vertex = d < eps
+    u /= np.maximum(d, eps)[..., None]
+
+    weights, on_tri, bary = triangle_weights(u[:, cage_tris], d[:, cage_tris], eps)
+    result = corners.dot(weights.reshape(len(points), -1).T).T
+
+    # points on the cage are interpolated on it
+    special = on_tri.any(axis=1)
+    if special.any():
+        rows = np.flatnonzero(special)
+        tri = on_tri[rows].argmax(axis=1)
+        b = bary[rows, tri]
+        result[rows] = 0.0
+        np.add.at(result, (np.repeat(rows, 3), cage_tris[tri].ravel()), (b / b.sum(axis=1, keepdims=True)).ravel())
+    if on_vertex.any():
+        rows, verts = np.nonzero(on_vertex)
+        result[rows] = 0.0
+        result[rows, verts] = 1.0
+
+    return result / result.sum(axis=1, keepdims=True)
+
+
+def local_coordinates(cage_co, cage_tris, points, candidates, max_weights=DEFAULT_MAX_WEIGHTS,
+                      prune=DEFAULT_PRUNE, eps=1e-8):
+    """Mean value coordinates of points summed over their candidate
+    triangles (points, k) only, the max_weights largest per point kept and
+    normalized to sum to one.
+
+    Returns (cols, weights), both (points, max_weights); unused slots have
+    weight zero.
+    """
+    num_points, k = candidates.shape
+    corners = cage_tris[candidates]                         # (p, k, 3)
+    u = cage_co[corners] - points[:, None, None, :]
+    d = np.linalg.norm(u, axis=-1)
+    u /= np.maximum(d, eps)[..., None]
+    w, on_tri, bary = triangle_weights(u, d, eps)
+
+    # the corners of a point's triangles as one row, repeated vertices summed
+    rows = np.repeat(np.arange(num_points), k * 3)
+    flat, inverse = np.unique(rows * len(cage_co) + corners.ravel(), return_inverse=True)
+    values = np.bincount(inverse.ravel(), weights=w.ravel(), minlength=len(flat))
+    rows = flat // len(cage_co)
+
+    # largest first within every row, then the first max_weights of each
+    order = np.lexsort((-np.abs(values), rows))
+    rows = rows[order]
+    rank = np.arange(len(rows)) - np.searchsorted(rows, np.arange(num_points))[rows]
+    keep = rank < max_weights
+    slot_cols = np.zeros((num_points, max_weights), dtype=np.int64)
+    slot_w = np.zeros((num_points, max_weights))
+    slot_cols[rows[keep], rank[keep]] = (flat[order] % len(cage_co))[keep]
+    slot_w[rows[keep], rank[keep]] = values[order][keep]
+
+    largest = np.abs(slot_w).max(axis=1, keepdims=True)
+    slot_w[np.abs(slot_w) < largest * prune] = 0.0
+
+    # points on the cage are interpolated on it; points that got no weight
+    # (in the plane of all their triangles) on their nearest triangle
+    total = slot_w.sum(axis=1)
+    on_cage = on_tri.any(axis=1)
+    lost = ~on_cage & (np.abs(total) < eps)
+    if lost.any():
+        centroid_d = np.linalg.norm(cage_co[corners[lost]].mean(axis=2) - points[lost, None, :], axis=-1)
+        on_tri[lost, centroid_d.argmin(axis=1)] = True
+        bary[lost] = 1.0
+        on_cage |= lost
+    if on_cage.any():
+        rows = np.flatnonzero(on_cage)
+        tri = on_tri[rows].argmax(axis=1)
+        b = bary[rows, tri]
+        slot_w[rows] = 0.0
+        slot_w[rows, :3] = b / b.sum(axis=1, keepdims=True)
+        slot_cols[rows, :3] = corners[rows, tri]
+        total[rows] = 1.0
+    on_vertex = np.nonzero(d.reshape(num_points, -1) < eps)
+    if len(on_vertex[0]):
+        rows, first = np.unique(on_vertex[0], return_index=True)
+        slot_w[rows] = 0.0
+        slot_w[rows, 0] = 1.0
+        slot_cols[rows, 0] = corners.reshape(num_points, -1)[rows, on_vertex[1][first]]
+        total[rows] = 1.0
+    return slot_cols, slot_w / total[:, None]
+
+
+class MeshDeformBind:
+    """Cage deform bind data of one target against one source cage"""
+
+    def __init__(self, vert_weights, weights=None, target_verts=None, num_target_verts=None):
+        self.vert_weights = vert_weights        # CSR (bound target verts x source verts)
+        self.weights = weights                  # per bound target vertex influence (vertex group) or None
+        self.target_verts = target_verts        # indices of the bound target verts, None when all are bound
+        self.num_target_verts = vert_weights.shape[0] if num_target_verts is None else num_target_verts
+
+    def to_arrays(self):
+        arrays = self.vert_weights.to_arrays('vert_weights_')
+        if self.weights is not None:
+            arrays['weights'] = self.weights
+        if self.target_verts is not None:
+            arrays['target_verts'] = self.target_verts
+            arrays['num_target_verts'] = np.array([self.num_target_verts])
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(CSRMatrix.from_arrays(arrays, 'vert_weights_'), arrays.get('weights'),
+                   arrays.get('target_verts'),
+                   int(arrays['num_target_verts'][0]) if 'num_target_verts' in arrays else None)
+
+    @property
+    def num_source_verts(self):
+        return self.vert_weights.shape[1]
+
+    @property
+    def source_verts(self):
+        # Source vertices that can move the target at all
+        return np.unique(self.vert_weights.indices)
+
+    def deform(self, src_delta, strength=1.0):
+        # src_delta: (source verts, 3) -> target delta (target verts, 3)
+        return self.deform_batch(np.asarray(src_delta)[None], strength)[0]
+
+    def deform_batch(self, src_deltas, strength=1.0):
+        # src_deltas: (keys, source verts, 3) -> (keys, target verts, 3), one sparse product
+        src_deltas = np.asarray(src_deltas, dtype=np.float32)
+        num_keys = len(src_deltas)
+        x = src_deltas.transpose(1, 0, 2).reshape(self.num_source_verts, 3 * num_keys)
+        tgt_deltas = self.vert_weights.dot(x)
+        tgt_deltas = tgt_deltas.reshape(self.vert_weights.shape[0], num_keys, 3).transpose(1, 0, 2)
+        if strength != 1.0:
+            tgt_deltas *= strength
+        if self.weights is not None:
+            tgt_deltas *= self.weights[:, None]
+        if self.target_verts is None:
+            return tgt_deltas
+
+        full = np.zeros((num_keys, self.num_target_verts, 3), dtype=tgt_deltas.dtype)
+        full[:, self.target_verts] = tgt_deltas
+        return full
+
+
+def bind_key(src_co, tris, tgt_co, weights=None, thickness=0.0, offset=-1.0, prune=DEFAULT_PRUNE,
+             num_triangles=DEFAULT_NUM_TRIANGLES, max_weights=DEFAULT_MAX_WEIGHTS):
+    # Cache key of the bind computed by bind_mesh_deform for these inputs
+    return bind_cache.hash_key('mesh_deform', np.asarray(src_co, dtype=np.float32),
+                               np.asarray(tris, dtype=np.int32), np.asarray(tgt_co, dtype=np.float32),
+                               None if weights is None else np.asarray(weights, dtype=np.float32),
+                               float(thickness), float(offset), float(prune), int(num_triangles), int(max_weights))
+
+
+def cached_bind_mesh_deform(cache, src_co, tris, tgt_co, weights=None, thickness=0.0, offset=-1.0,
+                            prune=DEFAULT_PRUNE, num_triangles=DEFAULT_NUM_TRIANGLES, max_weights=DEFAULT_MAX_WEIGHTS):
+    # bind_mesh_deform through a BindCache. Returns (bind, was_cached)
+    key = bind_key(src_co, tris, tgt_co, weights, thickness, offset, prune, num_triangles, max_weights)
+    arrays = cache.get(key)
+    if arrays is not None:
+        return MeshDeformBind.from_arrays(arrays), True
+    bind = bind_mesh_deform(src_co, tris, tgt_co, weights, thickness, offset, prune, num_triangles, max_weights)
+    cache.put(key, bind.to_arrays())
+    return bind, False
+
+
+def bind_mesh_deform(src_co, tris, tgt_co, weights=None, thickness=0.0, offset=-1.0, prune=DEFAULT_PRUNE,
+                     num_triangles=DEFAULT_NUM_TRIANGLES, max_weights=DEFAULT_MAX_WEIGHTS):
+    """Bind target vertices to a closed source cage.
+
+    src_co and tgt_co must be in the same space. With a thickness, the cage
+    is the source solidified like the Solidify modifier, so open surfaces
+    work too; both layers follow the source vertex they were made from.
+    weights are the optional per target vertex influence (vertex group).
+    Only vertices with nonzero weight are bound and deformed.
+    """
+    src_co = np.asarray(src_co, dtype=np.float64)
+    tgt_co = np.asarray(tgt_co, dtype=np.float64)
+    tris = np.asarray(tris, dtype=np.int64).reshape(-1, 3)
+    num_source_verts = len(src_co)
+    num_target_verts = len(tgt_co)
+
+    target_verts = None
+    if weights is not None:
+        weights = np.asarray(weights, dtype=np.float32)
+        if not weights.all():
+            target_verts = np.flatnonzero(weights)
+            tgt_co = tgt_co[target_verts]
+            weights = weights[target_verts]
+    num_tgt = len(tgt_co)
+
+    cage_co, cage_tris = src_co, tris
+    if thickness != 0.0:
+        cage_co, cage_tris = solidified_cage(src_co, tris, thickness, offset)
+
+    eps = 1e-9 * max(float(np.ptp(cage_co, axis=0).max()) if len(cage_co) else 1.0, 1e-9)
+    num_triangles = min(num_triangles, len(cage_tris))
+    chunk = max(1, BIND_CHUNK_ELEMENTS // max(1, num_triangles))
+    grid = spatial.PointGrid(cage_co[cage_tris].mean(axis=1))
+
+    rows = []
+    cols = []
+    data = []
+    for start in range(0, num_tgt, chunk):
+        points = tgt_co[start:start + chunk]
+        c, w = local_coordinates(cage_co, cage_tris, points, grid.k_nearest(points, num_triangles),
+                                 max_weights, prune, eps)
+        # both layers of a solidified cage move with their source vertex
+        c %= num_source_verts
+        nonzero = w != 0.0
+        rows.append(np.nonzero(nonzero)[0] + start)
+        cols.append(c[nonzero])
+        data.append(w[nonzero])
+
+    if rows:
+        vert_weights = CSRMatrix.from_coo(np.concatenate(rows), np.concatenate(cols), np.concatenate(data),
+                                          (num_tgt, num_source_verts))
+    else:
+        vert_weights = CSRMatrix.from_coo([], [], [], (num_tgt, num_source_verts))
+    return MeshDeformBind(vert_weights, weights, target_verts, num_target_verts)
@@ -0,0 +1,2172 @@
+#-*- coding: utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+
+import re
+import time
+
+import bpy
+from bpy_extras.io_utils import ExportHelper, ImportHelper
+
+from . import bind_cache, key_file, mesh_data, mesh_deform, pipeline, profiling, surface_deform, topology
+
+
+# Abstract base class
+# Child classes: 
+#   TransferShapeKeysViaSurfaceDeform
+#   TransferShapeKeysViaMeshDeform
+class TransferShapeKeys(bpy.types.Operator):
+    
+    DEBUG = False
+    profiler = profiling.NULL_PROFILER
+    KEY_HASHES_PROP = "transfer_shape_keys_hashes"    # custom property on the target's Key
+    KEY_SKIPPED_PROP = "transfer_shape_keys_skipped"  # custom property on the target object
+    TIME_SLICE = 0.1                                  # seconds of work per modal step
+    NAVIGATION_EVENTS = {'MIDDLEMOUSE', 'WHEELUPMOUSE', 'WHEELDOWNMOUSE', 'TRACKPADPAN', 'TRACKPADZOOM'}
+    progress_total = 0
+    source_hashes = None                              # per transfer, see get_source_key_hash
+    # Operators called during a transfer get no undo push of their own, the
+    # whole transfer is a single undo step
+    NESTED_OP = ('EXEC_DEFAULT', False)
+    DRIVEN_PROPS = ('value', 'mute', 'slider_min', 'slider_max')
+    
+    # Child classes implement iter_process(context, ...), a generator doing the
+    # transfer that yields the number of shape keys done since its last yield,
+    # sets progress_total and returns False on errors. Closing it restores
+    # everything it changed. start_process(context) calls it with the
+    # operator's properties.
+    
+    def process(self, context, *args, **kwargs):
+        work = self.iter_process(context, *args, **kwargs)
+        while True:
+            try:
+                next(work)
+            except StopIteration as e:
+                return e.value
+    
+    def execute(self, context):
+        self.begin_profiling(self.profile, self.use_cprofile)
+        self.keys_transferred = sum(self.start_process(context))
+        self.end_profiling(self.trace_path)
+        
+        return {'FINISHED'}
+    
+    def invoke(self, context, event):
+        if not self.use_modal:
+            return self.execute(context)
+        
+        self.begin_profiling(self.profile, self.use_cprofile)
+        self.process_work = self.start_process(context)
+        self.keys_done = 0
+        self.keys_transferred = 0
+        self.start_time = time.perf_counter()
+        wm = context.window_manager
+        self.timer = wm.event_timer_add(0.01, window=context.window)
+        wm.progress_begin(0, 100)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+    
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self.process_work.close()
+            self.finish_modal(context)
+            self.report({"WARNING"}, "Cancelled after {0} shape keys".format(self.keys_done))
+            # finished, so the keys transferred so far get an undo step
+            return {'FINISHED'}
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'} if event.type in self.NAVIGATION_EVENTS else {'RUNNING_MODAL'}
+        
+        deadline = time.perf_counter() + self.TIME_SLICE
+        try:
+            while time.perf_counter() < deadline:
+                self.keys_done += next(self.process_work)
+        except StopIteration:
+            self.finish_modal(context)
+            return {'FINISHED'}
+        except:
+            self.finish_modal(context)
+            raise
+        self.update_progress(context)
+        return {'RUNNING_MODAL'}
+    
+    def redo_locked(self):
+        return self.redo_limit > 0 and self.keys_transferred > self.redo_limit
+    
+    def draw_redo_locked(self, context):
+        # Instead of the settings: changing any of them would silently rerun the whole transfer
+        layout = self.layout
+        layout.label(text = "{0} shape keys transferred.".format(self.keys_transferred))
+        layout.label(text = "Redo is off above {0} shape keys, undo and run again instead.".format(self.redo_limit))
+    
+    def update_progress(self, context):
+        total = max(self.progress_total, self.keys_done, 1)
+        elapsed = time.perf_counter() - self.start_time
+        rate = self.keys_done / elapsed if elapsed > 0.0 else 0.0
+        eta = (total - self.keys_done) / rate if rate > 0.0 else 0.0
+        context.window_manager.progress_update(100.0 * self.keys_done / total)
+        s = "Transferring shape keys: {0}/{1}, {2:.1f} keys/s, {3:.0f}s left (Esc to cancel)"
+        context.workspace.status_text_set(s.format(self.keys_done, total, rate, eta))
+    
+    def finish_modal(self, context):
+        self.keys_transferred = self.keys_done
+        wm = context.window_manager
+        wm.event_timer_remove(self.timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+        self.end_profiling(self.trace_path)
+    
+    def validate_selection(self, context, selected, active):
+        if active is None:
+            self.report({"ERROR"},"Please set an active object")
+            return False
+        if active.type != "MESH":
+            self.report({"ERROR"},"Active object is not a mesh")
+            return False
+        if active.data.shape_keys is None:
+            self.report({"ERROR"},"Active object has no shape keys")
+            return False
+        if len(selected) < 1:
+            self.report({"ERROR"},"Please select more than 1 object (active = source, selected = target)")
+            return False
+        return True
+    
+    def store_shape_key_settings(self, context, obj):
+        return mesh_data.ShapeKeySnapshot(obj.data)
+         
+    def restore_shape_key_settings(self, context, obj, settings):
+        settings.restore()
+
+    def mute_all_shape_keys(self, context, obj):
+        mesh_data.set_all_key_blocks(obj.data, 'mute', True)
+
+    def unmute_all_shape_keys(self, context, obj):
+        mesh_data.set_all_key_blocks(obj.data, 'mute', False)
+
+    def zero_all_shape_keys(self, context, obj):
+        mesh_data.set_all_key_blocks(obj.data, 'value', 0.0)
+    
+    def add_driver(self, context, fcurve, target_id, target_data_path):
+        # Point a driver F-curve at one property of a source key block. A driver
+        # left from an earlier transfer is only corrected where it differs
+        driver = fcurve.driver
+        if driver.type != 'AVERAGE':
+            driver.type = 'AVERAGE'
+        variables = driver.variables
+        if len(variables) != 1 or variables[0].type != 'SINGLE_PROP':
+            for var in list(variables):
+                variables.remove(var)
+            variables.new()
+        target = variables[0].targets[0]
+        if target.id_type != 'KEY':
+            target.id_type = 'KEY'
+        if target.id != target_id:
+            target.id = target_id
+        if target.data_path != target_data_path:
+            target.data_path = target_data_path
+    
+    def add_sk_drivers(self, context, sk_map, driver_mode='ALL'):
+        # ALL drives value, mute and the slider range. VALUE drives only the
+        # value and copies the rest once, which is much cheaper to evaluate.
+        # Every key is driven by the source key block it was made from.
+        # Driver F-curves are made on the Key's AnimData directly (no driver_add
+        # and its default modifier). The existing ones are indexed in one pass
+        # and reused, instead of a linear drivers.find per key and property,
+        # and the copied settings are written with one foreach_set each
+        if not sk_map:
+            return
+        key = sk_map[0][0].id_data
+        drivers = (key.animation_data or key.animation_data_create()).drivers
+        existing = {fcurve.data_path: fcurve for fcurve in drivers}
+        driven = self.DRIVEN_PROPS if driver_mode == 'ALL' else ('value',)
+        paths = [(new_sk.path_from_id(), src_sk, src_sk.path_from_id()) for new_sk, src_sk in sk_map]
+        
+        if driver_mode != 'ALL':
+            for path, _, _ in paths:
+                for prop in self.DRIVEN_PROPS[1:]:
+                    fcurve = existing.pop(path + '.' + prop, None)
+                    if fcurve is not None:
+                        drivers.remove(fcurve)
+            mesh_data.copy_key_block_settings(sk_map)
+        
+        for path, src_sk, src_path in paths:
+            for prop in driven:
+                data_path = path + '.' + prop
+                fcurve = existing.get(data_path)
+                if fcurve is None:
+                    fcurve = drivers.new(data_path)
+                self.add_driver(context, fcurve, src_sk.id_data, src_path + '.' + prop)
+      
+    def mute_shapekey(self, context, obj, shapekey_name):
+        # Mute a key block and the drivers of its DRIVEN_PROPS, which would
+        # otherwise override the mute. Returns what unmute_shapekey restores,
+        # None when obj has no such key (other than the basis)
+        shape_keys = obj.data.shape_keys
+        key_block = shape_keys.key_blocks.get(shapekey_name) if shape_keys is not None else None
+        if key_block is None or key_block == shape_keys.reference_key:
+            return None
+        fcurves = []
+        if shape_keys.animation_data is not None:
+            for prop in self.DRIVEN_PROPS:
+                fcurve = shape_keys.animation_data.drivers.find(key_block.path_from_id(prop))
+                if fcurve is not None and not fcurve.mute:
+                    fcurve.mute = True
+                    fcurves.append(fcurve)
+        muted = key_block.mute
+        key_block.mute = True
+        return key_block, muted, fcurves
+    
+    def unmute_shapekey(self, context, state):
+        if state is None:
+            return
+        key_block, muted, fcurves = state
+        key_block.mute = muted
+        for fcurve in fcurves:
+            fcurve.mute = False
+    
+    def remove_shapekey(self, context, obj, shapekey_name):
+        with self.profiler.phase('remove_shapekey', obj.name, shapekey_name):
+            try:
+                obj.shape_key_remove(obj.data.shape_keys.key_blocks.get(shapekey_name))
+            except:
+                pass
+        
+    def save_as_shapekey(self, context, obj, key_block, mod_name):
+        key_block.value = 1.0
+        with self.profiler.phase('set_active', obj.name, key_block.name):
+            context.view_layer.objects.active = obj
+        with self.profiler.phase('modifier_apply_as_shapekey', obj.name, key_block.name):
+            apply_ret = bpy.ops.object.modifier_apply_as_shapekey(*self.NESTED_OP, keep_modifier=True,
+                                                                  modifier=mod_name, report=True)
+        key_block.value = 0.0
+        if 'FINISHED' not in apply_ret:
+            s = 'Error on applying modifier, Object: {0}, ShapeKey: {1}, apply modifier: {2}'
+            self.report({'ERROR'}, s.format(obj.name, key_block.name, apply_ret))
+            return None
+        else:
+            new_shape_key = obj.data.shape_keys.key_blocks[-1]
+            new_shape_key.name = key_block.name # rename
+            return new_shape_key
+    
+    def iter_save_as_shapekeys(self, context, obj, keys, mod_name, sk_map, skipped, overwrite, empty_threshold=0.0):
+        # save_as_shapekey for every key. Yields per key, returns False when
+        # a key could not be saved
+        ret = True
+        for kb in keys:
+            if overwrite: self.remove_shapekey(context, obj, kb.name)
+            
+            new_shape_key = self.save_as_shapekey(context, obj, kb, mod_name)
+            if new_shape_key is None:
+                ret = False
+            elif empty_threshold > 0.0 and self.is_empty_shapekey(context, new_shape_key, empty_threshold):
+                obj.shape_key_remove(new_shape_key)
+                skipped.append(kb)
+            else:
+                sk_map.append((new_shape_key, kb))
+            yield 1
+        return ret
+    
+    def isolate_modifier(self, context, obj, mod):
+        # Show only mod in the viewport, so the evaluated mesh is what
+        # modifier_apply_as_shapekey would save. Returns the previous state
+        shown = {m.name: m.show_viewport for m in obj.modifiers}
+        for m in obj.modifiers:
+            m.show_viewport = m == mod
+        return shown
+    
+    def restore_modifiers(self, context, obj, shown):
+        for m in obj.modifiers:
+            if m.name in shown:
+                m.show_viewport = shown[m.name]
+    
+    def iter_save_evaluated(self, context, obj_src, obj, keys, sk_map, skipped, overwrite, empty_threshold=0.0):
+        # save_as_shapekey without operators: switch each source key on, update
+        # the depsgraph and store the target's evaluated coordinates. The
+        # deform modifier must be the only one shown. A target key of the same
+        # name (e.g. from an earlier transfer, driven by this very source key)
+        # is muted meanwhile, so it doesn't end up in its own replacement.
+        # Yields per key, returns False when a key could not be saved
+        ret = True
+        depsgraph = context.evaluated_depsgraph_get()
+        rest = mesh_data.rest_coords(obj.data) if empty_threshold > 0.0 else None
+        for kb in keys:
+            existing = self.mute_shapekey(context, obj, kb.name)
+            kb.value = 1.0
+            try:
+                with self.profiler.phase('depsgraph_update', obj.name, kb.name):
+                    depsgraph.update()
+                with self.profiler.phase('read_evaluated', obj.name, kb.name):
+                    co = mesh_data.evaluated_coords(obj, depsgraph)
+            finally:
+                kb.value = 0.0
+                self.unmute_shapekey(context, existing)
+            
+            if co is None:
+                s = 'Error on evaluating modifier, Object: {0}, ShapeKey: {1}, vertex count changed'
+                self.report({'ERROR'}, s.format(obj.name, kb.name))
+                ret = False
+            elif rest is not None and pipeline.max_offsets((co - rest)[None])[0] < empty_threshold:
+                skipped.append(kb)
+            else:
+                with self.profiler.phase('write_key', obj.name, kb.name):
+                    new_shape_key = mesh_data.add_key_block(obj, kb.name, co, replace=overwrite)
+                sk_map.append((new_shape_key, kb))
+            yield 1
+        return ret
+    
+    def get_source_keys(self, context, src_key_blocks, ignore_muted):
+        keys = []
+        for i,kb in enumerate(src_key_blocks):
+            if i == 0: continue                     # Skip basis
+            if ignore_muted and kb.mute: continue   # Skip muted
+            keys.append(kb)
+        return keys
+    
+    def get_extra_sources(self, context, obj_src, names):
+        # Meshes with shape keys named in names (comma separated), other than the source
+        sources = []
+        for name in names.split(","):
+            name = name.strip()
+            if not name:
+                continue
+            obj = context.scene.objects.get(name)
+            if obj is None or obj.type != 'MESH' or obj.data.shape_keys is None:
+                self.report({"WARNING"}, "{0} is not a mesh with shape keys, not used as a source".format(name))
+            elif obj != obj_src and obj not in sources:
+                sources.append(obj)
+        return sources
+    
+    def merge_source_keys(self, context, sources, ignore_muted):
+        # Key stacks of several sources merged by name. Returns (keys, merged):
+        # keys has one key block per name, taken from the first source that
+        # has it, in the order of the sources and their keys. merged is
+        # [(source, {name: key block})], the keys of the same name together
+        # making one merged key
+        merged = []
+        keys = {}
+        for obj in sources:
+            stack = {kb.name: kb for kb in self.get_source_keys(context, obj.data.shape_keys.key_blocks, ignore_muted)}
+            merged.append((obj, stack))
+            for name, kb in stack.items():
+                keys.setdefault(name, kb)
+        return list(keys.values()), merged
+    
+    def find_empty_source_keys(self, context, obj_src, keys, threshold, chunk_size=32):
+        # Names of the keys that move no source vertex by threshold or more
+        empty = set()
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            offsets = pipeline.max_offsets(mesh_data.key_block_deltas(chunk, obj_src))
+            empty.update(kb.name for kb, offset in zip(chunk, offsets) if offset < threshold)
+        return empty
+    
+    def find_duplicate_source_keys(self, context, obj_src, keys, allow_scaled, chunk_size=32):
+        # {name: (key block, scale, False)} for keys whose offsets are those of
+        # an earlier key (times scale), so that only the earlier key is transferred
+        sketches = []
+        buffer = None
+        for start in range(0, len(keys), chunk_size):
+            buffer = mesh_data.key_block_deltas(keys[start:start + chunk_size], obj_src, out=buffer)
+            sketches.extend(pipeline.key_sketches(buffer))
+        
+        duplicates = {}
+        for i, (j, scale) in pipeline.duplicate_candidates(sketches, allow_scaled).items():
+            if pipeline.is_scaled_copy(mesh_data.key_block_delta(keys[i], obj_src),
+                                       mesh_data.key_block_delta(keys[j], obj_src), scale):
+                duplicates[keys[i].name] = (keys[j], scale, False)
+        self.debug("duplicate shape keys: {0}".format(len(duplicates)))
+        return duplicates
+    
+    def find_mirrored_source_keys(self, context, obj_src, keys):
+        # {name: (key block, 1.0, True)} for keys of a .L/.R pair whose offsets
+        # are the mirror image of the earlier key's, on a symmetric source
+        mirror_map = topology.mirror_vertex_map(mesh_data.rest_coords(obj_src.data))
+        if mirror_map is None:
+            self.debug("source is not symmetric")
+            return {}
+        by_name = {kb.name: i for i, kb in enumerate(keys)}
+        mirrored = {}
+        for i, kb in enumerate(keys):
+            j = by_name.get(topology.mirror_name(kb.name), -1)
+            if j <= i:
+                continue
+            delta = mesh_data.key_block_delta(kb, obj_src)
+            if pipeline.is_scaled_copy(mesh_data.key_block_delta(keys[j], obj_src),
+                                       topology.mirrored_offsets(delta, mirror_map), 1.0):
+                mirrored[keys[j].name] = (kb, 1.0, True)
+        self.debug("mirrored shape keys: {0}".format(len(mirrored)))
+        return mirrored
+    
+    def target_mirror_map(self, context, obj_src, obj, vg_name, vg_invert):
+        # obj's mirror vertex map if the source's mirrored keys can be mirrored
+        # on it too: obj is symmetric, with a symmetric vertex group, and has
+        # the same mirror plane as the source. None otherwise
+        matrix = mesh_data.matrix_to_array(obj.matrix_world.inverted() @ obj_src.matrix_world)
+        if not topology.is_mirror_symmetric(matrix):
+            return None
+        mirror_map = topology.mirror_vertex_map(mesh_data.rest_coords(obj.data))
+        if mirror_map is None:
+            return None
+        weights = mesh_data.vertex_group_weights(obj, vg_name, vg_invert)
+        if weights is not None and not pipeline.is_scaled_copy(weights[mirror_map], weights, 1.0):
+            return None
+        return mirror_map
+    
+    def target_duplicates(self, context, obj_src, obj, duplicates, mirrored, vg_name, vg_invert):
+        # (duplicates plus the mirrored keys obj can take, obj's mirror map or None)
+        if not mirrored:
+            return duplicates, None
+        with self.profiler.phase('mirror_map', obj.name):
+            mirror_map = self.target_mirror_map(context, obj_src, obj, vg_name, vg_invert)
+        if mirror_map is None:
+            self.debug("{0} is not symmetric like the source".format(obj.name))
+            return duplicates, None
+        derived = dict(duplicates)
+        for name, entry in mirrored.items():
+            # a key that is already made from another one isn't mirrored from
+            if name not in derived and entry[0].name not in derived:
+                derived[name] = entry
+        return derived, mirror_map
+    
+    def unique_source_keys(self, context, keys, duplicates):
+        # keys minus duplicates, followed by the keys they duplicate that are
+        # not among keys
+        if not duplicates:
+            return keys
+        originals = {}
+        for kb in keys:
+            if kb.name in duplicates:
+                original = duplicates[kb.name][0]
+                originals[original.name] = original
+        unique = [kb for kb in keys if kb.name not in duplicates]
+        names = {kb.name for kb in unique}
+        unique += [kb for name, kb in originals.items() if name not in names]
+        return unique
+    
+    def add_duplicate_shapekeys(self, context, obj, keys, duplicates, sk_map, skipped, overwrite, mirror_map=None):
+        # Duplicates get the transferred result of the key they duplicate,
+        # rescaled or mirrored through mirror_map
+        if not duplicates:
+            return
+        results = {src_sk.name: new_sk for new_sk, src_sk in sk_map}
+        skipped_names = {kb.name for kb in skipped}
+        rest = None
+        for kb in keys:
+            if kb.name not in duplicates or kb.name in results:
+                continue
+            original, scale, mirror = duplicates[kb.name]
+            if original.name in skipped_names:
+                skipped.append(kb)
+                continue
+            if original.name not in results:
+                continue    # failed, and reported as such
+            co = mesh_data.key_block_coords(results[original.name])
+            if scale != 1.0 or mirror:
+                if rest is None:
+                    rest = mesh_data.rest_coords(obj.data)
+                co -= rest
+                if mirror:
+                    co = topology.mirrored_offsets(co, mirror_map)
+                co *= scale
+                co += rest
+            with self.profiler.phase('write_key', obj.name, kb.name):
+                new_shape_key = mesh_data.add_key_block(obj, kb.name, co, replace=overwrite)
+            sk_map.append((new_shape_key, kb))
+    
+    def is_empty_shapekey(self, context, key_block, threshold):
+        delta = mesh_data.key_block_coords(key_block) - mesh_data.key_block_coords(key_block.relative_key)
+        return pipeline.max_offsets(delta[None])[0] < threshold
+    
+    def skip_empty_shapekeys(self, context, obj, obj_src, keys, skipped, overwrite):
+        # Keys without effect get no key block, so one from an earlier transfer would be stale.
+        # Their names are kept on the target (KEY_SKIPPED_PROP), so a missing key
+        # can be told apart from a failed one. Keys not transferred this time
+        # (keys and skipped are the ones that were) keep their earlier record
+        done = {kb.name for kb in keys} | {kb.name for kb in skipped}
+        all_skipped = obj[self.KEY_SKIPPED_PROP].to_dict() if self.KEY_SKIPPED_PROP in obj else {}
+        all_skipped[obj_src.name] = ([name for name in self.get_skipped_keys(context, obj, obj_src) if name not in done]
+                                     + [kb.name for kb in skipped])
+        obj[self.KEY_SKIPPED_PROP] = all_skipped
+        if not skipped:
+            return
+        if overwrite:
+            for kb in skipped: self.remove_shapekey(context, obj, kb.name)
+        self.report({"INFO"}, "{0}: skipped {1} shape keys without effect".format(obj.name, len(skipped)))
+        self.debug("skipped: {0}".format(", ".join(kb.name for kb in skipped)))
+    
+    def get_source_key_hash(self, context, obj, kb):
+        # Content hash of a source key: its coordinates, its relative key's and
+        # its vertex group's weights. Every part is hashed once per transfer
+        # (in self.source_hashes), however many targets there are
+        hashes = self.source_hashes
+        
+        def coords_hash(key_block):
+            name = ('co', obj.name, key_block.name)
+            if name not in hashes:
+                hashes[name] = bind_cache.hash_key(mesh_data.key_block_coords(key_block))
+            return hashes[name]
+        
+        def weights_hash(vg_name):
+            name = ('vg', obj.name, vg_name)
+            if name not in hashes:
+                hashes[name] = bind_cache.hash_key(mesh_data.vertex_group_weights(obj, vg_name))
+            return hashes[name]
+        
+        name = ('key', obj.name, kb.name)
+        if name not in hashes:
+            hashes[name] = bind_cache.hash_key(coords_hash(kb), kb.relative_key.name, coords_hash(kb.relative_key),
+                                               kb.vertex_group, weights_hash(kb.vertex_group) if kb.vertex_group else None)
+        return hashes[name]
+    
+    def get_key_hashes(self, context, obj_src, obj_tgt, keys, settings, merged=None):
+        # Content hash per source key. Anything that affects all keys (settings,
+        # rest shapes, relative transforms) goes into every hash. With merged
+        # sources (see merge_source_keys), a key hashes the keys of its name on all of them
+        merged = merged or [(obj_src, {kb.name: kb for kb in keys})]
+        common = bind_cache.hash_key(settings, mesh_data.rest_coords(obj_tgt.data))
+        for obj, _ in merged:
+            to_target = obj_tgt.matrix_world.inverted() @ obj.matrix_world
+            common = bind_cache.hash_key(common, obj.name, mesh_data.matrix_to_array(to_target),
+                                         mesh_data.rest_coords(obj.data))
+        hashes = {}
+        for kb in keys:
+            parts = []
+            for obj, stack in merged:
+                source_kb = stack.get(kb.name)
+                if source_kb is not None:
+                    parts += [obj.name, self.get_source_key_hash(context, obj, source_kb)]
+            hashes[kb.name] = bind_cache.hash_key(common, *parts)
+        return hashes
+    
+    def get_stored_key_hashes(self, context, obj, obj_src):
+        try:
+            return obj.data.shape_keys[self.KEY_HASHES_PROP][obj_src.name].to_dict()
+        except:
+            return {}
+    
+    def get_skipped_keys(self, context, obj, obj_src):
+        # Names of the keys of obj_src skipped on obj for having no effect
+        try:
+            return list(obj[self.KEY_SKIPPED_PROP][obj_src.name])
+        except:
+            return []
+    
+    def remove_stale_shapekeys(self, context, obj, obj_src, keys, hashes, merged=None):
+        # Remove keys transferred earlier whose source key is gone, and
+        # return the keys that are new or changed. A key with its stored hash
+        # is up to date when its key block exists or it was skipped. Keys only
+        # left out of this transfer (e.g. muted ones) are not removed
+        stored = self.get_stored_key_hashes(context, obj, obj_src)
+        sources = [obj_src] if merged is None else [o for o, _ in merged]
+        source_names = {kb.name for o in sources if o.data.shape_keys for kb in o.data.shape_keys.key_blocks}
+        for name in stored:
+            if name not in hashes and name not in source_names:
+                self.remove_shapekey(context, obj, name)
+        
+        existing = obj.data.shape_keys.key_blocks if obj.data.shape_keys else {}
+        skipped = set(self.get_skipped_keys(context, obj, obj_src))
+        return [kb for kb in keys if stored.get(kb.name) != hashes[kb.name]
+                or (kb.name not in existing and kb.name not in skipped)]
+    
+    def store_key_hashes(self, context, obj, obj_src, hashes, changed_keys, sk_map, skipped=()):
+        shape_keys = obj.data.shape_keys
+        if shape_keys is None:
+            return
+        # keys that failed to transfer keep no hash, so they are retried next time
+        transferred = {src_sk.name for new_sk, src_sk in sk_map} | {kb.name for kb in skipped}
+        failed = {kb.name for kb in changed_keys} - transferred
+        
+        all_hashes = shape_keys[self.KEY_HASHES_PROP].to_dict() if self.KEY_HASHES_PROP in shape_keys else {}
+        all_hashes[obj_src.name] = {name: h for name, h in hashes.items() if name not in failed}
+        shape_keys[self.KEY_HASHES_PROP] = all_hashes
+    
+    def find_matching_topology(self, context, obj_src, obj):
+        # (True, None) when obj has the source's topology, (True, index_map) when
+        # only its vertex order differs, (False, None) when keys can't be copied
+        src_mesh = obj_src.data
+        mesh = obj.data
+        if len(src_mesh.vertices) != len(mesh.vertices):
+            return False, None
+        if topology.same_topology(*mesh_data.loop_topology(src_mesh), *mesh_data.loop_topology(mesh)):
+            return True, None
+        to_target = obj.matrix_world.inverted() @ obj_src.matrix_world
+        index_map = topology.vertex_index_map(mesh_data.transform_coords(to_target, mesh_data.rest_coords(src_mesh)),
+                                              mesh_data.rest_coords(mesh))
+        return index_map is not None, index_map
+    
+    def transfer_by_copy(self, context, obj_src, obj, keys, index_map, weights, strength, overwrite,
+                         empty_threshold=0.0, chunk_size=32):
+        # Add the source keys' offsets to the target's rest shape, no deform involved.
+        # Returns (sk_map, keys skipped for moving nothing by empty_threshold)
+        to_target = mesh_data.matrix_to_array(obj.matrix_world.inverted() @ obj_src.matrix_world)
+        tgt_co = mesh_data.rest_coords(obj.data)
+        
+        sk_map = []
+        skipped = []
+        src_buffer = spare_buffer = None    # reused by every chunk
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            deltas = mesh_data.key_block_deltas(chunk, obj_src, out=src_buffer)
+            if src_buffer is None:
+                src_buffer, spare_buffer = deltas, deltas.copy()
+            coords = topology.copied_offsets(deltas, spare_buffer, to_target, index_map, weights, strength)
+            offsets = pipeline.max_offsets(coords) if empty_threshold > 0.0 else None
+            coords += tgt_co
+            
+            for i, (kb, co) in enumerate(zip(chunk, coords)):
+                if offsets is not None and offsets[i] < empty_threshold:
+                    skipped.append(kb)
+                    continue
+                new_shape_key = mesh_data.add_key_block(obj, kb.name, co, replace=overwrite)
+                sk_map.append((new_shape_key, kb))
+        return sk_map, skipped
+    
+    def transfer_matching_targets(self, context, obj_src, obj_tgts, ignore_muted, overwrite, incremental, settings,
+                                  add_drivers, vg_name, vg_invert, strength=1.0, empty_threshold=0.0, chunk_size=32,
+                                  driver_mode='ALL', duplicates=None):
+        # Targets with the source's topology get their keys copied directly.
+        # Yields the number of keys done per target, returns the targets
+        # that still need a deform
+        src_shape_keys = obj_src.data.shape_keys
+        remaining = []
+        for o in obj_tgts:
+            with self.profiler.phase('match_topology', o.name):
+                matches, index_map = self.find_matching_topology(context, obj_src, o)
+            if not matches:
+                remaining.append(o)
+                continue
+            
+            keys = self.get_source_keys(context, src_shape_keys.key_blocks, ignore_muted)
+            if incremental:
+                with self.profiler.phase('hash_keys', o.name):
+                    hashes = self.get_key_hashes(context, obj_src, o, keys, settings)
+                keys = self.remove_stale_shapekeys(context, o, obj_src, keys, hashes)
+            
+            with self.profiler.phase('copy_keys', o.name):
+                weights = mesh_data.vertex_group_weights(o, vg_name, vg_invert)
+                sk_map, skipped = self.transfer_by_copy(context, obj_src, o,
+                                                        self.unique_source_keys(context, keys, duplicates),
+                                                        index_map, weights, strength,
+                                                        overwrite or incremental, empty_threshold, chunk_size)
+                self.add_duplicate_shapekeys(context, o, keys, duplicates, sk_map, skipped, overwrite or incremental)
+            self.debug("copied {0} shape keys to {1}".format(len(sk_map), o.name))
+            self.skip_empty_shapekeys(context, o, obj_src, keys, skipped, overwrite or incremental)
+            
+            if add_drivers:
+                with self.profiler.phase('add_sk_drivers', o.name):
+                    self.add_sk_drivers(context, sk_map, driver_mode)
+            if incremental: self.store_key_hashes(context, o, obj_src, hashes, keys, sk_map, skipped)
+            yield len(src_shape_keys.key_blocks) - 1
+        return remaining
+    
+    def iter_transfer_via_arrays(self, context, obj_src, jobs, chunk_size, workers, overwrite, add_drivers,
+                                 mute_existing_mod, empty_threshold=0.0, driver_mode='ALL', merged=None):
+        def read_deltas(job, keys, out):
+            # jobs bound to merged sources have their matrices per source
+            if 'matrices' in job.target:
+                return mesh_data.merged_key_block_deltas(merged, [kb.name for kb in keys], job.target['matrices'],
+                                                         out)
+            return mesh_data.key_block_deltas(keys, obj_src, out=out)
+        
+        def write_keys(job, keys, coords):
+            obj = job.target['obj']
+            for kb, co in zip(keys, coords):
+                new_shape_key = mesh_data.add_key_block(obj, kb.name, co, replace=overwrite)
+                job.target['sk_map'].append((new_shape_key, kb))
+        
+        def on_target_done(job):
+            job.target['done'] = True
+            obj = job.target['obj']
+            sk_map = job.target['sk_map']
+            self.add_duplicate_shapekeys(context, obj, job.target['keys'], job.target['duplicates'], sk_map,
+                                         job.skipped, overwrite, job.target['mirror_map'])
+            self.debug("transferred {0} shape keys to {1}".format(len(sk_map), obj.name))
+            self.skip_empty_shapekeys(context, obj, obj_src, job.target['keys'], job.skipped, overwrite)
+            if add_drivers:
+                with self.profiler.phase('add_sk_drivers', obj.name):
+                    self.add_sk_drivers(context, sk_map, driver_mode)
+            if 'hashes' in job.target:
+                self.store_key_hashes(context, obj, obj_src, job.target['hashes'], job.target['keys'], sk_map,
+                                      job.skipped)
+            existing_mod = job.target['existing_mod']
+            if existing_mod is not None and mute_existing_mod:
+                existing_mod.show_viewport = False
+        
+        try:
+            yield from pipeline.iter_transfer(jobs, read_deltas, write_keys, chunk_size, workers, on_target_done,
+                                              self.profiler, empty_threshold)
+        finally:
+            # when cancelled, the keys written so far still get their drivers
+            for job in jobs:
+                if job.target['sk_map'] and not job.target.get('done'):
+                    on_target_done(job)
+    
+    def iter_array_engine(self, context, obj_src, obj_tgts, make_job, ignore_muted, incremental, settings,
+                          duplicates, mirrored, vg_name, vg_invert, chunk_size, workers, overwrite, add_drivers,
+                          mute_existing_mod, empty_threshold=0.0, driver_mode='ALL', parents=None, merged=None):
+        # Array engine: targets are bound and deformed in worker threads, only
+        # reading source keys and writing key blocks happens here.
+        # make_job(obj, keys, sources) -> pipeline.TargetJob of a target bound to sources.
+        # parents: {target name: target it is bound to instead of the source}
+        # merged: the source and further sources whose keys are merged with
+        # its own (see merge_source_keys), None for the source alone
+        src_key_blocks = obj_src.data.shape_keys.key_blocks
+        if merged is None:
+            sources = [obj_src]
+            num_keys = len(src_key_blocks) - 1
+        else:
+            sources = [obj for obj, _ in merged]
+            num_keys = len(self.merge_source_keys(context, sources, ignore_muted)[0])
+        parents = {name: parent for name, parent in (parents or {}).items()
+                   if any(o.name == parent.name for o in obj_tgts)}
+        
+        # targets come after the targets they are bound to
+        def depth(o):
+            return depth(parents[o.name]) + 1 if o.name in parents else 0
+        obj_tgts = sorted(obj_tgts, key=depth)
+        
+        jobs = {}
+        for o in obj_tgts:
+            if merged is None:
+                keys = self.get_source_keys(context, src_key_blocks, ignore_muted)
+            else:
+                keys = self.merge_source_keys(context, sources, ignore_muted)[0]
+            if incremental:
+                with self.profiler.phase('hash_keys', o.name):
+                    hashes = self.get_key_hashes(context, obj_src, o, keys, settings, merged)
+                keys = self.remove_stale_shapekeys(context, o, obj_src, keys, hashes, merged)
+                self.debug("changed shape keys: {0}".format(len(keys)))
+            derived, mirror_map = self.target_duplicates(context, obj_src, o, duplicates, mirrored, vg_name, vg_invert)
+            with self.profiler.phase('read_bind_inputs', o.name):
+                job = make_job(o, self.unique_source_keys(context, keys, derived),
+                               [parents[o.name]] if o.name in parents else sources)
+            job.target['keys'] = keys
+            job.target['duplicates'] = derived
+            job.target['mirror_map'] = mirror_map
+            if incremental: job.target['hashes'] = hashes
+            jobs[o.name] = job
+        
+        # a chained target's keys are computed from its parent's results, so
+        # the parent computes them too
+        order = {}
+        for obj in sources:
+            for kb in obj.data.shape_keys.key_blocks:
+                order.setdefault(kb.name, len(order))
+        for o in reversed(obj_tgts):
+            if o.name in parents:
+                job = jobs[o.name]
+                job.parent = jobs[parents[o.name].name]
+                names = {kb.name for kb in job.parent.keys}
+                job.parent.keys = sorted(job.parent.keys + [kb for kb in job.keys if kb.name not in names],
+                                         key=lambda kb: order[kb.name])
+        yield sum(num_keys - len(job.keys) for job in jobs.values())
+        
+        yield from self.iter_transfer_via_arrays(context, obj_src, list(jobs.values()), chunk_size, workers,
+                                                 overwrite or incremental, add_drivers, mute_existing_mod,
+                                                 empty_threshold, driver_mode, merged)
+    
+    def begin_profiling(self, profile, use_cprofile):
+        self.profiler = profiling.Profiler(use_cprofile) if profile else profiling.NULL_PROFILER
+        self.profiler.start()
+    
+    def end_profiling(self, trace_path):
+        profiler = self.profiler
+        profiler.stop()
+        self.profiler = profiling.NULL_PROFILER
+        if not profiler.enabled:
+            return
+        for line in profiler.summary(top=8):
+            self.report({"INFO"}, line)
+        if profiler.cprofile is not None:
+            for line in profiler.cprofile_summary(top=8):
+                self.report({"INFO"}, line)
+        if trace_path:
+            path = bpy.path.abspath(trace_path)
+            try:
+                profiler.write_trace(path)
+                self.report({"INFO"}, "Profile trace written to {0}".format(path))
+            except OSError as e:
+                self.report({"WARNING"}, "Could not write profile trace: {0}".format(e))
+    
+    def debug(self,msg):
+        if self.DEBUG:
+            self.report({"INFO"},msg)
+        return
+    
+    def get_objects(self, context, valid_tgt_types):
+        obj_src = context.active_object
+        obj_tgts = [x for x in context.selected_objects if x != obj_src and x.type in valid_tgt_types]
+        return obj_src, obj_tgts
+    
+    def group_shared_meshes(self, context, obj_src, obj_tgts):
+        # Linked duplicates share one mesh and so one set of shape keys: transfer
+        # to the first of them only, and only warn when the others would have
+        # come out differently
+        groups = {}
+        for o in obj_tgts:
+            if o.data == obj_src.data:
+                self.report({"WARNING"}, "{0} shares its mesh with the source, skipped".format(o.name))
+                continue
+            groups.setdefault(o.data, []).append(o)
+        
+        targets = []
+        for objs in groups.values():
+            o = objs[0]
+            targets.append(o)
+            if len(objs) == 1:
+                continue
+            to_target = o.matrix_world.inverted() @ obj_src.matrix_world
+            differ = [x.name for x in objs[1:] if not matrices_close(x.matrix_world.inverted() @ obj_src.matrix_world,
+                                                                     to_target)]
+            if differ:
+                s = "{0} share a mesh with {1} but are placed differently relative to the source; using {1}"
+                self.report({"WARNING"}, s.format(", ".join(differ), o.name))
+            self.debug("{0} share a mesh with {1}".format(", ".join(x.name for x in objs[1:]), o.name))
+        return targets
+
+
+def matrices_close(a, b, tolerance=1e-5):
+    return all(abs(x - y) <= tolerance for row_a, row_b in zip(a, b) for x, y in zip(row_a, row_b))
+
+
+def get_bind_cache(size_mb=None):
+    cache = bind_cache.BindCache(bind_cache.DEFAULT_DIRECTORY)
+    if size_mb is not None:
+        cache.max_bytes = size_mb * 1024 * 1024
+    return cache
+
+
+def vg_enum_callback(context):
+    vg_enum_callback.items.clear()
+    selected = context.selected_objects
+    active = context.active_object
+    
+    vg_names = {}
+    for obj in selected:
+        if obj == active:
+            continue
+        try:
+            for vg in obj.vertex_groups:
+                if vg.name not in vg_names:
+                    vg_names[vg.name] = []
+                vg_names[vg.name].append(obj.name)
+        except:
+            pass
+        
+    empty_item = ('NONE','(None)','',)
+    vg_enum_callback.items.append(empty_item)
+    
+    for vg_name,obj_list in vg_names.items():
+        tooltip = "Found in:\n"
+        tooltip += '\n'.join(obj_list)
+        item = (
+            vg_name + '_id',    # identifier
+            vg_name,            # name
+            tooltip,            # description
+        )
+        vg_enum_callback.items.append(item)
+vg_enum_callback.items = []     # "There is a known bug with using a callback, Python must 
+                                # keep a reference to the strings returned by the callback 
+                                # or Blender will misbehave or even crash."
+                                # https://docs.blender.org/api/current/bpy.props.html#bpy.props.EnumProperty
+                                
+
+class TransferShapeKeysViaSurfaceDeform(TransferShapeKeys):
+    """Transfer Shape Keys Via Surface Deform"""
+    bl_label = "Transfer Shape Keys Via Surface Deform"
+    bl_idname = "object.transfer_shape_keys_via_surface_deform"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    valid_tgt_types = ['MESH']
+    
+    use_existing_mod: bpy.props.BoolProperty(
+        name="Use Existing Modifier",
+        description="Try to find existing Surface Deform modifier on selected objects before creating a new (temporary) modifier.\nUseful for setting per-object deform falloff/strength/vertex group.\nExisting modifier does not need to be unmuted",
+        default=True,
+    )
+    mute_existing_mod: bpy.props.BoolProperty(
+        name="Mute Existing Mod After Transfer",
+        description="Mute existing Surface Deform modifier after transfering shape keys (otherwise shape keys can't be viewed properly)",
+        default=True,
+    )
+    move_to_first:  bpy.props.BoolProperty(
+        name="Move to first",
+        description="Move temporary deform modifier to the top of the modifier list. This is necessary when there are unapplied generative modifiers, as they break shape keys",
+        default=True,
+    )
+    falloff: bpy.props.FloatProperty(
+        name="Interpolation Falloff",
+        description="Controls how much nearby polygons influence deformation",
+        default=4.0,
+        min=2.0,
+        max=16.0,
+    )
+    strength: bpy.props.FloatProperty(
+        name = "Strength",
+        description = "Strength of modifier deformations",
+        default = 1.0,
+    )
+    vg_name: bpy.props.EnumProperty(
+        name = "Vertex Group (Optional)",
+        description = "Vertex group name for selecting/weighting the affected area. \nWill attempt to find the same vertex group in all selected objects",
+        items = lambda self, context: vg_enum_callback.items,
+    )
+    vg_invert: bpy.props.BoolProperty(
+        name="",
+        description="Invert\nInvert vertex group influence",
+        default=False,
+    )
+    add_drivers: bpy.props.BoolProperty(
+        name = "Add Drivers",
+        description = "Add drivers for created shape keys (shape keys will be driven by source object)",
+        default = True,
+    )
+    driver_mode: bpy.props.EnumProperty(
+        name = "Drive",
+        description = "What the drivers of created shape keys control",
+        items = [
+            ('ALL', "Value, Mute and Range", "Drive value, mute, slider min and slider max (four drivers per shape key)"),
+            ('VALUE', "Value Only", "Drive only the value, and copy mute and the slider range once. Faster to set up and to play back"),
+        ],
+        default = 'ALL',
+    )
+    ignore_muted: bpy.props.BoolProperty(
+        name = "Don't Copy Muted",
+        description = "Muted shape keys in source object will not be copied",
+        default = False,
+    )
+    suppress: bpy.props.BoolProperty(
+        name = "Suppress Other Shape Keys",
+        description = "Other shape keys on destination object will be suppressed so that they are not baked into copied shape keys",
+        default = True,
+    )
+    overwrite: bpy.props.BoolProperty(
+        name = "Overwrite Existing",
+        description = "Existing shape keys will be overwritten",
+        default = True,
+    )
+    incremental: bpy.props.BoolProperty(
+        name = "Only Changed",
+        description = "Only transfer shape keys that were added or changed since the last transfer, and remove transferred shape keys that no longer exist on the source.\nChanging any setting that affects the created shape keys or their drivers (including Add Drivers, Drive and Don't Copy Muted) transfers everything again",
+        default = False,
+    )
+    use_fast_path: bpy.props.BoolProperty(
+        name = "Copy Matching Topology",
+        description = "Targets with the same topology as the source (e.g. duplicates), or the same vertices in another order, get the shape keys copied directly without a deform modifier. The vertex group still applies",
+        default = True,
+    )
+    use_depsgraph: bpy.props.BoolProperty(
+        name = "Read Evaluated Mesh",
+        description = "Save shape keys by reading the target's evaluated mesh instead of running \"Apply as Shape Key\" for every key. Faster, and the active object is left alone. Other modifiers on the target are hidden while reading",
+        default = False,
+    )
+    dedupe: bpy.props.BoolProperty(
+        name = "Reuse Duplicate Shape Keys",
+        description = "Source shape keys with the same offsets as another one are transferred once and copied. With Mesh Deform, so are scaled copies (e.g. a key at half strength)",
+        default = False,
+    )
+    use_mirror: bpy.props.BoolProperty(
+        name = "Mirror Symmetric Shape Keys",
+        description = "For .L/.R pairs of source shape keys that are mirror images of each other, only transfer one and mirror the result, on targets that are symmetric in X like the source. Other targets get both transferred",
+        default = False,
+    )
+    skip_empty: bpy.props.BoolProperty(
+        name = "Skip Empty Shape Keys",
+        description = "Don't create shape keys (or drivers) that move no vertex of the target by more than the threshold, e.g. face shape keys on shoes. Skipped shape keys are reported",
+        default = False,
+    )
+    empty_threshold: bpy.props.FloatProperty(
+        name = "Threshold",
+        description = "Smallest vertex offset that counts as an effect",
+        default = 1e-5,
+        min = 0.0,
+        precision = 6,
+        subtype = 'DISTANCE',
+    )
+    redo_limit: bpy.props.IntProperty(
+        name = "Redo Limit",
+        description = "After transferring more shape keys than this, the redo panel only shows a summary, so that changing a setting can't rerun a long transfer. 0 for no limit",
+        default = 0,
+        min = 0,
+    )
+    keys_transferred: bpy.props.IntProperty(
+        options = {'HIDDEN', 'SKIP_SAVE'},
+    )
+    use_modal: bpy.props.BoolProperty(
+        name = "Show Progress",
+        description = "When run from the menu, transfer in the background with a progress bar, keys/s and time left in the status bar. Press Esc to cancel",
+        default = True,
+    )
+    profile: bpy.props.BoolProperty(
+        name = "Profile",
+        description = "Time every phase of the transfer per target and per shape key, and report a summary",
+        default = False,
+        options = {'SKIP_SAVE'},
+    )
+    use_cprofile: bpy.props.BoolProperty(
+        name = "cProfile",
+        description = "Also run the transfer under cProfile. The slowest functions are reported with the profile summary, and the full statistics are saved next to the trace file (.prof)",
+        default = False,
+        options = {'SKIP_SAVE'},
+    )
+    trace_path: bpy.props.StringProperty(
+        name = "Trace File",
+        description = "Write every timed call to this file (.csv or .json)",
+        default = "",
+        subtype = 'FILE_PATH',
+    )
+    engine: bpy.props.EnumProperty(
+        name = "Engine",
+        description = "How the deformed shape keys are computed",
+        items = [
+            ('MODIFIER', "Modifier", "Save every shape key through a temporary Surface Deform modifier"),
+            ('ARRAY', "Array", "Bind once per target and compute all shape keys with array math.\nUses the target's rest shape, so other shape keys are never baked in"),
+        ],
+        default = 'MODIFIER',
+    )
+    chunk_size: bpy.props.IntProperty(
+        name = "Keys Per Batch",
+        description = "Number of shape keys computed together in one array operation (Array engine).\nLower values reduce peak memory on dense meshes",
+        default = 32,
+        min = 1,
+        max = 1024,
+    )
+    use_bind_cache: bpy.props.BoolProperty(
+        name = "Use Bind Cache",
+        description = "Store bind data on disk and reuse it when source, target and settings are unchanged (Array engine)",
+        default = True,
+    )
+    cache_size: bpy.props.IntProperty(
+        name = "Cache Size (MB)",
+        description = "Maximum size of the bind cache. Least recently used binds are removed first",
+        default = 1024,
+        min = 16,
+    )
+    use_lod_chain: bpy.props.BoolProperty(
+        name = "Cascade LODs",
+        description = "Bind every level of detail to the next higher one instead of the source, and compute its shape keys from that level's (Array engine). Levels are targets whose names only differ by the number matched by the pattern, e.g. Shirt_LOD0, Shirt_LOD1",
+        default = False,
+    )
+    lod_pattern: bpy.props.StringProperty(
+        name = "LOD Pattern",
+        description = "Regular expression whose first group is the level of detail number in a target's name",
+        default = r"LOD(\d+)",
+    )
+    extra_sources: bpy.props.StringProperty(
+        name = "Extra Sources",
+        description = "Further source objects, by name and separated by commas, bound together with the active object as one mesh (Array engine). Their shape keys are merged with the active object's by name: keys of the same name become one shape key, each source moving its own vertices. Drivers and settings come from the first source that has the key, the active object first",
+        default = "",
+    )
+    memory_budget: bpy.props.IntProperty(
+        name = "Memory Budget (MB)",
+        description = "Choose the keys per batch so that the shape keys being computed fit in this much memory (Array engine and copied targets). 0 to use Keys Per Batch",
+        default = 0,
+        min = 0,
+    )
+    workers: bpy.props.IntProperty(
+        name = "Worker Threads",
+        description = "Number of threads binding targets and computing shape keys in parallel (Array engine).\nBlender data is only read and written on the main thread",
+        default = 4,
+        min = 1,
+        max = 64,
+    )
+    
+    def __find_existing_surface_deform_modifier(self, context, obj):
+        mod = None
+        for m in obj.modifiers:
+            if m.type == 'SURFACE_DEFORM':
+                if not m.is_bound:
+                    self.report({"WARNING"},"Existing Surface Deform Modifier found in unbound state. Did you forget to bind it?")
+                    continue
+                mod = m
+                break
+        return mod
+
+    def __add_and_bind_surface_deform_modifier(self, context, obj, target, move_to_first, falloff, strength, vg_name, vg_invert):
+        def_mod = None
+        try:
+            context.view_layer.objects.active = obj
+            
+            def_mod = obj.modifiers.new(type='SURFACE_DEFORM', name="TEMP_SurfaceDeform")
+            if move_to_first:
+                if hasattr(obj.modifiers, "move"):
+                    obj.modifiers.move(len(obj.modifiers) - 1, 0)
+                else:
+                    bpy.ops.object.modifier_move_to_index(*self.NESTED_OP, modifier=def_mod.name, index=0)
+            def_mod.target = target
+            def_mod.falloff = falloff
+            def_mod.strength = strength
+            if vg_name:
+                def_mod.vertex_group = vg_name
+            def_mod.invert_vertex_group = vg_invert
+            
+            bpy.ops.object.surfacedeform_bind(*self.NESTED_OP, modifier = def_mod.name)
+            context.view_layer.objects.active = target 
+        except:
+            pass
+        finally:
+            return def_mod
+        
+    def __get_surface_def_mod(self, context, use_existing_mod, obj, target, move_to_first, falloff, strength, vg_name, vg_invert):
+        existing_mod_found = False
+        def_mod = None
+        if use_existing_mod:
+            def_mod = self.__find_existing_surface_deform_modifier(context, obj)
+            if def_mod is not None:
+                existing_mod_found = True
+        if def_mod is None:
+            def_mod = self.__add_and_bind_surface_deform_modifier(context, obj, target, move_to_first, falloff, strength, vg_name, vg_invert)
+        
+        return def_mod, existing_mod_found
+    
+    
+    def __make_array_job(self, context, use_existing_mod, obj, sources, keys, falloff, strength, vg_name, vg_invert, cache=None):
+        # Same settings as the modifier would use: an existing bound modifier wins
+        existing_mod = None
+        if use_existing_mod:
+            existing_mod = self.__find_existing_surface_deform_modifier(context, obj)
+        if existing_mod is not None:
+            falloff = existing_mod.falloff
+            strength = existing_mod.strength
+            vg_name = existing_mod.vertex_group or None
+            vg_invert = existing_mod.invert_vertex_group
+        
+        # several sources are bound to as one mesh
+        matrices = [obj.matrix_world.inverted() @ source.matrix_world for source in sources]
+        src_co, tris = mesh_data.merged_rest_geometry(sources, matrices)
+        tgt_co = mesh_data.rest_coords(obj.data)
+        weights = mesh_data.vertex_group_weights(obj, vg_name, vg_invert)
+        if cache is not None:
+            bind_func = surface_deform.cached_bind_surface_deform
+            bind_args = (cache, src_co, tris, tgt_co, falloff, weights)
+        else:
+            bind_func = surface_deform.bind_surface_deform
+            bind_args = (src_co, tris, tgt_co, falloff, weights)
+        
+        target = {'obj': obj, 'existing_mod': existing_mod, 'sk_map': []}
+        matrix = mesh_data.matrix_to_array(matrices[0])
+        if len(sources) > 1:
+            # merged deltas are read in target space, source by source
+            target['matrices'] = matrices
+            matrix = None
+        return pipeline.TargetJob(target, keys, bind_func, bind_args, tgt_co, matrix, strength, obj.name)
+    
+    def iter_process(self, context, use_existing_mod, mute_existing_mod, move_to_first, falloff, strength, vg_name,
+                     vg_invert, add_drivers, ignore_muted, suppress, overwrite, engine='MODIFIER', chunk_size=32,
+                     use_bind_cache=False, cache_size=1024, incremental=False, workers=1,
+                     use_fast_path=True, skip_empty=False, empty_threshold=1e-5, use_depsgraph=False,
+                     memory_budget=0, driver_mode='ALL', dedupe=False, use_mirror=False, use_lod_chain=False,
+                     lod_pattern=r"LOD(\d+)", extra_sources=""):
+                    
+        ret = True
+        
+        # get objects' references
+        obj_src, obj_tgts = self.get_objects(context, self.valid_tgt_types)
+        extras = self.get_extra_sources(context, obj_src, extra_sources) if obj_src is not None else []
+        obj_tgts = [o for o in obj_tgts if o not in extras]
+        
+        if not self.validate_selection(context, obj_tgts, obj_src):
+            ret = False
+            return ret
+        obj_tgts = self.group_shared_meshes(context, obj_src, obj_tgts)
+        
+        self.debug("num shape keys : {0}".format(len(obj_src.data.shape_keys.key_blocks)))
+        
+        # memorize all shape keys' values and set them to 0
+        with self.profiler.phase('store_settings', obj_src.name):
+            stored_source_settings = self.store_shape_key_settings(context, obj_src)
+        self.zero_all_shape_keys(context, obj_src)
+        if not ignore_muted: self.unmute_all_shape_keys(context, obj_src)
+        
+        cache = get_bind_cache(cache_size) if use_bind_cache else None
+        self.source_hashes = {}
+        empty_threshold = empty_threshold if skip_empty else 0.0
+        # everything that changes the created keys or their drivers
+        settings = (self.bl_idname, engine, use_existing_mod, move_to_first, falloff, strength, vg_name, vg_invert,
+                    empty_threshold, use_lod_chain and engine == 'ARRAY', lod_pattern, add_drivers,
+                    add_drivers and driver_mode, ignore_muted, suppress, use_fast_path, use_depsgraph, use_mirror,
+                    extra_sources)
+        
+        src_key_blocks = obj_src.data.shape_keys.key_blocks
+        self.progress_total = len(obj_tgts) * (len(src_key_blocks) - 1)
+        
+        # extra sources are merged into one bind and one key stack per target
+        merged = None
+        if extras and engine == 'ARRAY':
+            merged_keys, merged = self.merge_source_keys(context, [obj_src] + extras, ignore_muted)
+            self.progress_total = len(obj_tgts) * len(merged_keys)
+            self.debug("merged shape keys: {0}".format(len(merged_keys)))
+        elif extras:
+            self.report({"WARNING"}, "Extra sources need the Array engine, only the active object is used")
+        
+        # a memory budget (MB) overrides the keys per batch
+        if memory_budget > 0 and obj_tgts:
+            chunk_size = pipeline.chunk_size_for_budget(memory_budget * 1024 * 1024, len(obj_src.data.vertices),
+                                                        max(len(o.data.vertices) for o in obj_tgts), workers)
+            self.debug("keys per batch: {0}".format(chunk_size))
+        
+        # duplicates, mirrored keys and matching topology are all found on the
+        # active object alone, so merged sources go without them
+        duplicates = {}
+        if dedupe and obj_tgts and merged is None:
+            with self.profiler.phase('find_duplicates', obj_src.name):
+                # the surface deform's normals don't scale with the offsets, only exact copies are reused
+                duplicates = self.find_duplicate_source_keys(context, obj_src,
+                                                             self.get_source_keys(context, src_key_blocks, ignore_muted),
+                                                             allow_scaled=False)
+        mirrored = {}
+        if use_mirror and obj_tgts and merged is None:
+            with self.profiler.phase('find_mirrored', obj_src.name):
+                mirrored = self.find_mirrored_source_keys(context, obj_src,
+                                                          self.get_source_keys(context, src_key_blocks, ignore_muted))
+        
+        try:
+            if use_fast_path and merged is None:
+                obj_tgts = yield from self.transfer_matching_targets(context, obj_src, obj_tgts, ignore_muted, overwrite,
+                                                                     incremental, settings, add_drivers, vg_name,
+                                                                     vg_invert, strength, empty_threshold, chunk_size,
+                                                                     driver_mode, duplicates)
+            
+            if engine == 'ARRAY':
+                def make_job(o, keys, sources):
+                    return self.__make_array_job(context, use_existing_mod, o, sources, keys,
+                                                 falloff, strength, vg_name, vg_invert, cache)
+                parents = {}
+                if use_lod_chain:
+                    by_name = {o.name: o for o in obj_tgts}
+                    try:
+                        for name, parent in pipeline.lod_parents(by_name, lod_pattern).items():
+                            parents[name] = by_name[parent]
+                    except (re.error, ValueError):
+                        self.report({"WARNING"}, "Invalid LOD pattern, levels of detail are not chained")
+                    self.debug("chained levels of detail: {0}".format(len(parents)))
+                yield from self.iter_array_engine(context, obj_src, obj_tgts, make_job, ignore_muted, incremental,
+                                                  settings, duplicates, mirrored, vg_name, vg_invert, chunk_size,
+                                                  workers, overwrite, add_drivers, mute_existing_mod,
+                                                  empty_threshold, driver_mode, parents, merged)
+                return ret
+            
+            # source keys that move nothing can't move the targets either
+            empty_keys = set()
+            if empty_threshold > 0.0 and obj_tgts:
+                with self.profiler.phase('find_empty_keys', obj_src.name):
+                    empty_keys = self.find_empty_source_keys(context, obj_src,
+                                                             self.get_source_keys(context, src_key_blocks, ignore_muted),
+                                                             empty_threshold)
+            
+            # loop over target objects
+            for o in obj_tgts:
+                keys = self.get_source_keys(context, src_key_blocks, ignore_muted)
+                if incremental:
+                    with self.profiler.phase('hash_keys', o.name):
+                        hashes = self.get_key_hashes(context, obj_src, o, keys, settings)
+                    keys = self.remove_stale_shapekeys(context, o, obj_src, keys, hashes)
+                    self.debug("changed shape keys: {0}".format(len(keys)))
+                skipped = [kb for kb in keys if kb.name in empty_keys]
+                if skipped:
+                    keys = [kb for kb in keys if kb.name not in empty_keys]
+                derived, mirror_map = self.target_duplicates(context, obj_src, o, duplicates, mirrored,
+                                                             vg_name, vg_invert)
+                unique_keys = self.unique_source_keys(context, keys, derived)
+                yield len(src_key_blocks) - 1 - len(unique_keys)
+                if not keys:
+                    self.skip_empty_shapekeys(context, o, obj_src, keys, skipped, overwrite or incremental)
+                    if incremental: self.store_key_hashes(context, o, obj_src, hashes, keys, [], skipped)
+                    continue
+                
+                with self.profiler.phase('store_settings', o.name):
+                    stored_tgt_settings = self.store_shape_key_settings(context, o)
+                    if suppress: self.mute_all_shape_keys(context, o)
+                with self.profiler.phase('bind', o.name):
+                    def_mod, existing_mod_found = self.__get_surface_def_mod(context, use_existing_mod, o, obj_src, 
+                                                                             move_to_first, falloff, strength, vg_name, vg_invert)
+
+                self.debug("modifier name: {0}".format(def_mod.name))
+                
+                sk_map = []
+                shown = self.isolate_modifier(context, o, def_mod) if use_depsgraph else None
+                try:
+                    if use_depsgraph:
+                        ok = yield from self.iter_save_evaluated(context, obj_src, o, unique_keys, sk_map, skipped,
+                                                                 overwrite or incremental, empty_threshold)
+                    else:
+                        ok = yield from self.iter_save_as_shapekeys(context, o, unique_keys, def_mod.name, sk_map,
+                                                                    skipped, overwrite or incremental, empty_threshold)
+                    ret = ret and ok
+                finally:
+                    # also when cancelled: finish the keys done so far and clean up
+                    if shown is not None: self.restore_modifiers(context, o, shown)
+                    self.add_duplicate_shapekeys(context, o, keys, derived, sk_map, skipped, overwrite or incremental,
+                                                 mirror_map)
+                    self.skip_empty_shapekeys(context, o, obj_src, keys, skipped, overwrite or incremental)
+                    if add_drivers:
+                        with self.profiler.phase('add_sk_drivers', o.name):
+                            self.add_sk_drivers(context, sk_map, driver_mode)
+                    if incremental: self.store_key_hashes(context, o, obj_src, hashes, keys, sk_map, skipped)
+                    if not existing_mod_found: o.modifiers.remove(def_mod)
+                    with self.profiler.phase('restore_settings', o.name):
+                        self.restore_shape_key_settings(context, o, stored_tgt_settings)
+                    if existing_mod_found and mute_existing_mod:
+                        def_mod.show_viewport = False
+        finally:
+            context.view_layer.objects.active = obj_src 
+            with self.profiler.phase('restore_settings', obj_src.name):
+                self.restore_shape_key_settings(context, obj_src, stored_source_settings)
+        
+        return ret
+        
+        
+    def start_process(self, context):
+        vg_enum_callback(context)
+        vg_n = None if self.vg_name == 'NONE' else self.vg_name[:-3]
+        
+        return self.iter_process(context, self.use_existing_mod, self.mute_existing_mod, 
+                                 self.move_to_first, self.falloff, self.strength, vg_n, self.vg_invert,
+                                 self.add_drivers, self.ignore_muted, self.suppress, self.overwrite,
+                                 self.engine, self.chunk_size, self.use_bind_cache, self.cache_size,
+                                 self.incremental, self.workers, self.use_fast_path, self.skip_empty,
+                                 self.empty_threshold, self.use_depsgraph, self.memory_budget, self.driver_mode,
+                                 self.dedupe, self.use_mirror, self.use_lod_chain, self.lod_pattern,
+                                 self.extra_sources)
+    
+    
+    def draw(self, context):
+        if self.redo_locked():
+            self.draw_redo_locked(context)
+            return
+        layout = self.layout
+        
+        layout.prop(self, "use_existing_mod")
+        ex_col = layout.column()
+        ex_col.enabled = self.use_existing_mod
+        ex_col.prop(self, "mute_existing_mod")
+
+        layout.separator(factor=1)
+        
+        layout.prop(self, "engine")
+        # copying matching topology batches its keys under either engine
+        budget_col = layout.column()
+        budget_col.enabled = self.engine == 'ARRAY' or self.use_fast_path
+        chunk_row = budget_col.row()
+        chunk_row.enabled = self.memory_budget == 0
+        chunk_row.prop(self, "chunk_size")
+        budget_col.prop(self, "memory_budget")
+        batch_col = layout.column()
+        batch_col.enabled = self.engine == 'ARRAY'
+        batch_col.prop(self, "workers")
+        batch_col.prop(self, "extra_sources")
+        lod_row = batch_col.row()
+        lod_row.prop(self, "use_lod_chain")
+        lod_sub = lod_row.row()
+        lod_sub.enabled = self.use_lod_chain
+        lod_sub.prop(self, "lod_pattern", text="")
+        cache_row = batch_col.row(align=True)
+        cache_row.prop(self, "use_bind_cache")
+        cache_row.prop(self, "cache_size", text="")
+        cache_row.operator(ClearBindCache.bl_idname, text="", icon='TRASH')
+        
+        layout.label(text = "Fallback Surface Deform Settings")
+        def_box = layout.box()
+        def_box.prop(self, "move_to_first")
+        def_box.prop(self, "falloff")
+        def_box.prop(self, "strength")
+        vg_row = def_box.row()
+        vg_row.prop(self, "vg_name")
+        vg_row.prop(self, "vg_invert", icon="ARROW_LEFTRIGHT")
+
+        layout.label(text = "Shape Key Settings")
+        sk_box = layout.box()
+        drv_row = sk_box.row()
+        drv_row.prop(self, "add_drivers")
+        drv_sub = drv_row.row()
+        drv_sub.enabled = self.add_drivers
+        drv_sub.prop(self, "driver_mode", text="")
+        sk_box.prop(self, "ignore_muted")
+        sk_box.prop(self, "suppress")
+        sk_box.prop(self, "overwrite")
+        sk_box.prop(self, "incremental")
+        sk_box.prop(self, "use_fast_path")
+        sk_box.prop(self, "use_depsgraph")
+        sk_box.prop(self, "dedupe")
+        sk_box.prop(self, "use_mirror")
+        empty_row = sk_box.row()
+        empty_row.prop(self, "skip_empty")
+        empty_sub = empty_row.row()
+        empty_sub.enabled = self.skip_empty
+        empty_sub.prop(self, "empty_threshold")
+        
+        modal_row = layout.row()
+        modal_row.prop(self, "use_modal")
+        modal_row.prop(self, "redo_limit")
+        layout.label(text = "Profiling")
+        prof_box = layout.box()
+        prof_row = prof_box.row()
+        prof_row.prop(self, "profile")
+        prof_row.prop(self, "use_cprofile")
+        prof_col = prof_box.column()
+        prof_col.enabled = self.profile
+        prof_col.prop(self, "trace_path")
+
+
+class TransferShapeKeysViaMeshDeform(TransferShapeKeys):
+    """Transfer Shape Keys Via Mesh Deform"""
+    bl_label = "Transfer Shape Keys Via Mesh Deform"
+    bl_idname = "object.transfer_shape_keys_via_mesh_deform"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    # Objects of type Curve and Surface can have Shape Keys and Mesh Deform modifiers, but:
+    # -the modifier can't be applied/saved as Shape Key so we can't copy Shape Keys to them
+    # -they can't be set as the target for a Surface/Mesh Deform modifier, so we can't copy
+    #  Shape Keys from them
+#    valid_tgt_types = ['MESH', 'SURFACE', 'CURVE']
+    valid_tgt_types = ['MESH']
+    
+    use_existing_mod: bpy.props.BoolProperty(
+        name="Use Existing Mesh Deform Modifier",
+        description="Try to find existing Mesh Deform modifier on selected objects before creating a new (temporary) modifier.\nUseful for setting per-object deform falloff/strength/vertex group.\nExisting modifier does not need to be unmuted",
+        default=True,
+    )
+    mute_existing_mod: bpy.props.BoolProperty(
+        name="Mute After Transfer",
+        description="Mute existing Surface Deform modifier after transfering shape keys (otherwise shape keys can't be viewed properly).",
+        default=True,
+    )
+    move_to_first:  bpy.props.BoolProperty(
+        name="Move to first",
+        description="Move temporary deform modifier to the top of the modifier list. This is necessary when there are unapplied generative modifiers, as they break shape keys",
+        default=True,
+    )
+    precision: bpy.props.IntProperty(
+        name = "Precision",
+        description = "The grid size for binding",
+        default = 4,
+        options = {'SKIP_SAVE'},
+        min = 2,
+        max = 10,
+    )
+    vg_name: bpy.props.EnumProperty(
+        name = "Vertex Group (Optional)",
+        description = "Vertex group name for selecting/weighting the affected area. \nWill attempt to find the same vertex group in all selected objects",
+        items = lambda self, context: vg_enum_callback.items,
+    )
+    vg_invert: bpy.props.BoolProperty(
+        name="",
+        description="Invert\nInvert vertex group influence",
+        default=False,
+    )
+    add_drivers: bpy.props.BoolProperty(
+        name = "Add Drivers",
+        description = "Add drivers for created shape keys (shape keys will be driven by source object)",
+        default = True,
+    )
+    driver_mode: bpy.props.EnumProperty(
+        name = "Drive",
+        description = "What the drivers of created shape keys control",
+        items = [
+            ('ALL', "Value, Mute and Range", "Drive value, mute, slider min and slider max (four drivers per shape key)"),
+            ('VALUE', "Value Only", "Drive only the value, and copy mute and the slider range once. Faster to set up and to play back"),
+        ],
+        default = 'ALL',
+    )
+    ignore_muted: bpy.props.BoolProperty(
+        name = "Don't Copy Muted",
+        description = "Muted shape keys in source object will not be copied",
+        default = False,
+    )
+    suppress: bpy.props.BoolProperty(
+        name = "Suppress Other Shape Keys",
+        description = "Other shape keys on destination object will be suppressed so that they are not baked into copied shape keys",
+        default = True,
+    )
+    overwrite: bpy.props.BoolProperty(
+        name = "Overwrite Existing",
+        description = "Existing shape keys will be overwritten",
+        default = True,
+    )
+    incremental: bpy.props.BoolProperty(
+        name = "Only Changed",
+        description = "Only transfer shape keys that were added or changed since the last transfer, and remove transferred shape keys that no longer exist on the source.\nChanging any setting that affects the created shape keys or their drivers (including Add Drivers, Drive and Don't Copy Muted) transfers everything again",
+        default = False,
+    )
+    use_fast_path: bpy.props.BoolProperty(
+        name = "Copy Matching Topology",
+        description = "Targets with the same topology as the source (e.g. duplicates), or the same vertices in another order, get the shape keys copied directly without a deform modifier. The vertex group still applies",
+        default = True,
+    )
+    use_depsgraph: bpy.props.BoolProperty(
+        name = "Read Evaluated Mesh",
+        description = "Save shape keys by reading the target's evaluated mesh instead of running \"Apply as Shape Key\" for every key. Faster, and the active object is left alone. Other modifiers on the target are hidden while reading",
+        default = False,
+    )
+    dedupe: bpy.props.BoolProperty(
+        name = "Reuse Duplicate Shape Keys",
+        description = "Source shape keys with the same offsets as another one are transferred once and copied. With Mesh Deform, so are scaled copies (e.g. a key at half strength)",
+        default = False,
+    )
+    use_mirror: bpy.props.BoolProperty(
+        name = "Mirror Symmetric Shape Keys",
+        description = "For .L/.R pairs of source shape keys that are mirror images of each other, only transfer one and mirror the result, on targets that are symmetric in X like the source. Other targets get both transferred",
+        default = False,
+    )
+    skip_empty: bpy.props.BoolProperty(
+        name = "Skip Empty Shape Keys",
+        description = "Don't create shape keys (or drivers) that move no vertex of the target by more than the threshold, e.g. face shape keys on shoes. Skipped shape keys are reported",
+        default = False,
+    )
+    empty_threshold: bpy.props.FloatProperty(
+        name = "Threshold",
+        description = "Smallest vertex offset that counts as an effect",
+        default = 1e-5,
+        min = 0.0,
+        precision = 6,
+        subtype = 'DISTANCE',
+    )
+    redo_limit: bpy.props.IntProperty(
+        name = "Redo Limit",
+        description = "After transferring more shape keys than this, the redo panel only shows a summary, so that changing a setting can't rerun a long transfer. 0 for no limit",
+        default = 0,
+        min = 0,
+    )
+    keys_transferred: bpy.props.IntProperty(
+        options = {'HIDDEN', 'SKIP_SAVE'},
+    )
+    use_modal: bpy.props.BoolProperty(
+        name = "Show Progress",
+        description = "When run from the menu, transfer in the background with a progress bar, keys/s and time left in the status bar. Press Esc to cancel",
+        default = True,
+    )
+    profile: bpy.props.BoolProperty(
+        name = "Profile",
+        description = "Time every phase of the transfer per target and per shape key, and report a summary",
+        default = False,
+        options = {'SKIP_SAVE'},
+    )
+    use_cprofile: bpy.props.BoolProperty(
+        name = "cProfile",
+        description = "Also run the transfer under cProfile. The slowest functions are reported with the profile summary, and the full statistics are saved next to the trace file (.prof)",
+        default = False,
+        options = {'SKIP_SAVE'},
+    )
+    trace_path: bpy.props.StringProperty(
+        name = "Trace File",
+        description = "Write every timed call to this file (.csv or .json)",
+        default = "",
+        subtype = 'FILE_PATH',
+    )
+    
+    engine: bpy.props.EnumProperty(
+        name = "Engine",
+        description = "How the deformed shape keys are computed",
+        items = [
+            ('MODIFIER', "Modifier", "Save every shape key through a temporary Mesh Deform modifier"),
+            ('ARRAY', "Array", "Bind once per target to the source as a cage (mean value coordinates instead of the modifier's harmonic bind, so no Precision) and compute all shape keys with array math.\nUses the target's rest shape, so other shape keys are never baked in"),
+        ],
+        default = 'MODIFIER',
+    )
+    chunk_size: bpy.props.IntProperty(
+        name = "Keys Per Batch",
+        description = "Number of shape keys computed together in one array operation (Array engine).\nLower values reduce peak memory on dense meshes",
+        default = 32,
+        min = 1,
+        max = 1024,
+    )
+    use_bind_cache: bpy.props.BoolProperty(
+        name = "Use Bind Cache",
+        description = "Store bind data on disk and reuse it when source, target and settings are unchanged (Array engine)",
+        default = True,
+    )
+    cache_size: bpy.props.IntProperty(
+        name = "Cache Size (MB)",
+        description = "Maximum size of the bind cache. Least recently used binds are removed first",
+        default = 1024,
+        min = 16,
+    )
+    memory_budget: bpy.props.IntProperty(
+        name = "Memory Budget (MB)",
+        description = "Choose the keys per batch so that the shape keys being computed fit in this much memory (Array engine and copied targets). 0 to use Keys Per Batch",
+        default = 0,
+        min = 0,
+    )
+    workers: bpy.props.IntProperty(
+        name = "Worker Threads",
+        description = "Number of threads binding targets and computing shape keys in parallel (Array engine).\nBlender data is only read and written on the main thread",
+        default = 4,
+        min = 1,
+        max = 64,
+    )
+    extra_sources: bpy.props.StringProperty(
+        name = "Extra Sources",
+        description = "Further source objects, by name and separated by commas, bound together with the active object as one mesh (Array engine). Their shape keys are merged with the active object's by name: keys of the same name become one shape key, each source moving its own vertices. Drivers and settings come from the first source that has the key, the active object first",
+        default = "",
+    )
+    
+    use_sld_mod: bpy.props.BoolProperty(
+        name = "Add Simple Solidify Modifier",
+        description = "Add a basic, temporary Solidify modifier on active object. The Mesh Deform modifier works best when the target object surrounds the deformed mesh. For more control, uncheck this option and manually add a Solidify modifier to the active object",
+        default = False,
+    )
+    sld_thickness: bpy.props.FloatProperty(
+        name = "Thickness",
+        description = "Thickness of the shell",
+        default = 0.5,
+    )
+    sld_offset: bpy.props.FloatProperty(
+        name = "Offset",
+        description = "Offset the thickness from the center",
+        default = 0.0,
+        min = -1.0,
+        max = 1.0,
+    )
+    
+    def __find_existing_solidify_modifier(self, context, obj):
+        for m in obj.modifiers:
+            if m.type == 'SOLIDIFY':
+                return m
+        
+    def __add_solidify_modifier(self, context, obj, thickness, offset):
+        solid_mod = None
+        try:
+            solid_mod = obj.modifiers.new(type='SOLIDIFY', name='TEMP_Solidify')
+            solid_mod.thickness = thickness
+            solid_mod.offset = offset
+        except:
+            pass
+        finally:
+            return solid_mod
+        
+    def __find_existing_mesh_deform_modifier(self, context, obj):
+        mod = None
+        for m in obj.modifiers:
+            if m.type == 'MESH_DEFORM':
+                if not m.is_bound:
+                    self.report({"WARNING"},"Existing Mesh Deform Modifier found in unbound state. Did you forget to bind it?")
+                    continue
+                mod = m
+                break
+        return mod
+
+    def __add_and_bind_mesh_deform_modifier(self, context, obj, target, move_to_first, precision, vg_name, vg_invert):
+        def_mod = None
+        try:
+            context.view_layer.objects.active = obj
+            
+            def_mod = obj.modifiers.new(type='MESH_DEFORM', name='TEMP_MeshDeform')
+            if move_to_first:
+                if hasattr(obj.modifiers, "move"):
+                    obj.modifiers.move(len(obj.modifiers) - 1, 0)
+                else:
+                    bpy.ops.object.modifier_move_to_index(*self.NESTED_OP, modifier=def_mod.name, index=0)
+            def_mod.object = target
+            def_mod.precision = precision
+            if vg_name:
+                def_mod.vertex_group = vg_name
+            def_mod.invert_vertex_group = vg_invert
+            
+            bpy.ops.object.meshdeform_bind(*self.NESTED_OP, modifier=def_mod.name)
+            context.view_layer.objects.active = target 
+        except:
+            pass
+        finally:
+            return def_mod
+        
+    def __get_mesh_def_mod(self, context, use_existing_mod, obj, target, move_to_first, precision, vg_name, vg_invert):
+        existing_mod_found = False
+        def_mod = None
+        if use_existing_mod:
+            def_mod = self.__find_existing_mesh_deform_modifier(context, obj)
+            if def_mod is not None:
+                existing_mod_found = True
+        if def_mod is None:
+            def_mod = self.__add_and_bind_mesh_deform_modifier(context, obj, target, move_to_first, precision, vg_name, vg_invert)
+        
+        return def_mod, existing_mod_found
+    
+    
+    def __make_array_job(self, context, use_existing_mod, obj, sources, keys, vg_name, vg_invert, thickness, offset,
+                         cache=None):
+        # Same vertex group as the modifier would use: an existing bound modifier wins
+        existing_mod = None
+        if use_existing_mod:
+            existing_mod = self.__find_existing_mesh_deform_modifier(context, obj)
+        if existing_mod is not None:
+            vg_name = existing_mod.vertex_group or None
+            vg_invert = existing_mod.invert_vertex_group
+        
+        # several sources are bound to as one cage
+        matrices = [obj.matrix_world.inverted() @ source.matrix_world for source in sources]
+        src_co, tris = mesh_data.merged_rest_geometry(sources, matrices)
+        tgt_co = mesh_data.rest_coords(obj.data)
+        weights = mesh_data.vertex_group_weights(obj, vg_name, vg_invert)
+        # the solidify thickness is in (first) source space, the bind in target space
+        thickness *= sum(matrices[0].to_scale()) / 3.0
+        if cache is not None:
+            bind_func = mesh_deform.cached_bind_mesh_deform
+            bind_args = (cache, src_co, tris, tgt_co, weights, thickness, offset)
+        else:
+            bind_func = mesh_deform.bind_mesh_deform
+            bind_args = (src_co, tris, tgt_co, weights, thickness, offset)
+        
+        target = {'obj': obj, 'existing_mod': existing_mod, 'sk_map': []}
+        matrix = mesh_data.matrix_to_array(matrices[0])
+        if len(sources) > 1:
+            # merged deltas are read in target space, source by source
+            target['matrices'] = matrices
+            matrix = None
+        return pipeline.TargetJob(target, keys, bind_func, bind_args, tgt_co, matrix, 1.0, obj.name)
+    
+    def iter_process(self, context, use_existing_mod, mute_existing_mod, move_to_first, precision, vg_name, vg_invert,
+                     add_drivers, ignore_muted, suppress, overwrite, use_sld_mod, sld_thickness, sld_offset,
+                     incremental=False, use_fast_path=True, skip_empty=False, empty_threshold=1e-5,
+                     use_depsgraph=False, driver_mode='ALL', dedupe=False, use_mirror=False, engine='MODIFIER',
+                     chunk_size=32, use_bind_cache=False, cache_size=1024, workers=1, extra_sources="",
+                     memory_budget=0):
+    
+        ret = True
+        
+        # get objects' references
+        obj_src, obj_tgts = self.get_objects(context, self.valid_tgt_types)
+        extras = self.get_extra_sources(context, obj_src, extra_sources) if obj_src is not None else []
+        obj_tgts = [o for o in obj_tgts if o not in extras]
+        
+        if not self.validate_selection(context, obj_tgts, obj_src):
+            ret = False
+            return ret
+        obj_tgts = self.group_shared_meshes(context, obj_src, obj_tgts)
+        
+        self.debug("num shape keys : {0}".format(len(obj_src.data.shape_keys.key_blocks)))
+        
+        # memorize all shape keys' values and set them to 0
+        with self.profiler.phase('store_settings', obj_src.name):
+            stored_source_settings = self.store_shape_key_settings(context, obj_src)
+        sld_mod = None
+        if use_sld_mod and engine == 'MODIFIER':
+            sld_mod = self.__add_solidify_modifier(context, obj_src, sld_thickness, sld_offset)
+        self.zero_all_shape_keys(context, obj_src)
+        if not ignore_muted: self.unmute_all_shape_keys(context, obj_src)
+        
+        empty_threshold = empty_threshold if skip_empty else 0.0
+        cache = get_bind_cache(cache_size) if use_bind_cache else None
+        self.source_hashes = {}
+        # everything that changes the created keys or their drivers
+        settings = (self.bl_idname, engine, use_existing_mod, move_to_first, precision, vg_name, vg_invert,
+                    use_sld_mod, sld_thickness, sld_offset, empty_threshold, add_drivers,
+                    add_drivers and driver_mode, ignore_muted, suppress, use_fast_path, use_depsgraph, use_mirror,
+                    extra_sources)
+        
+        src_key_blocks = obj_src.data.shape_keys.key_blocks
+        self.progress_total = len(obj_tgts) * (len(src_key_blocks) - 1)
+        
+        # extra sources are merged into one bind and one key stack per target
+        merged = None
+        if extras and engine == 'ARRAY':
+            merged_keys, merged = self.merge_source_keys(context, [obj_src] + extras, ignore_muted)
+            self.progress_total = len(obj_tgts) * len(merged_keys)
+            self.debug("merged shape keys: {0}".format(len(merged_keys)))
+        elif extras:
+            self.report({"WARNING"}, "Extra sources need the Array engine, only the active object is used")
+        
+        # a memory budget (MB) overrides the keys per batch
+        if memory_budget > 0 and obj_tgts:
+            chunk_size = pipeline.chunk_size_for_budget(memory_budget * 1024 * 1024, len(obj_src.data.vertices),
+                                                        max(len(o.data.vertices) for o in obj_tgts), workers)
+            self.debug("keys per batch: {0}".format(chunk_size))
+        
+        # duplicates, mirrored keys and matching topology are all found on the
+        # active object alone, so merged sources go without them
+        duplicates = {}
+        if dedupe and obj_tgts and merged is None:
+            with self.profiler.phase('find_duplicates', obj_src.name):
+                # mesh deform is linear in the cage offsets, so scaled copies are reused too.
+                # Not through a Solidify modifier (e.g. sld_mod) though: it rebuilds
+                # the cage along normals that change with the key
+                allow_scaled = engine == 'ARRAY' or not any(m.type == 'SOLIDIFY' and m.show_viewport
+                                                            for m in obj_src.modifiers)
+                duplicates = self.find_duplicate_source_keys(context, obj_src,
+                                                             self.get_source_keys(context, src_key_blocks, ignore_muted),
+                                                             allow_scaled)
+        mirrored = {}
+        if use_mirror and obj_tgts and merged is None:
+            with self.profiler.phase('find_mirrored', obj_src.name):
+                mirrored = self.find_mirrored_source_keys(context, obj_src,
+                                                          self.get_source_keys(context, src_key_blocks, ignore_muted))
+        
+        try:
+            if use_fast_path and merged is None:
+                obj_tgts = yield from self.transfer_matching_targets(context, obj_src, obj_tgts, ignore_muted, overwrite,
+                                                                     incremental, settings, add_drivers, vg_name,
+                                                                     vg_invert, empty_threshold=empty_threshold,
+                                                                     chunk_size=chunk_size, driver_mode=driver_mode,
+                                                                     duplicates=duplicates)
+            
+            if engine == 'ARRAY':
+                thickness = sld_thickness if use_sld_mod else 0.0
+                def make_job(o, keys, sources):
+                    return self.__make_array_job(context, use_existing_mod, o, sources, keys, vg_name, vg_invert,
+                                                 thickness, sld_offset, cache)
+                yield from self.iter_array_engine(context, obj_src, obj_tgts, make_job, ignore_muted, incremental,
+                                                  settings, duplicates, mirrored, vg_name, vg_invert, chunk_size,
+                                                  workers, overwrite, add_drivers, mute_existing_mod,
+                                                  empty_threshold, driver_mode, merged=merged)
+                return ret
+            
+            # source keys that move nothing can't move the targets either
+            empty_keys = set()
+            if empty_threshold > 0.0 and obj_tgts:
+                with self.profiler.phase('find_empty_keys', obj_src.name):
+                    empty_keys = self.find_empty_source_keys(context, obj_src,
+                                                             self.get_source_keys(context, src_key_blocks, ignore_muted),
+                                                             empty_threshold)
+            
+            # loop over target objects
+            for o in obj_tgts:
+                keys = self.get_source_keys(context, src_key_blocks, ignore_muted)
+                if incremental:
+                    with self.profiler.phase('hash_keys', o.name):
+                        hashes = self.get_key_hashes(context, obj_src, o, keys, settings)
+                    keys = self.remove_stale_shapekeys(context, o, obj_src, keys, hashes)
+                    self.debug("changed shape keys: {0}".format(len(keys)))
+                skipped = [kb for kb in keys if kb.name in empty_keys]
+                if skipped:
+                    keys = [kb for kb in keys if kb.name not in empty_keys]
+                derived, mirror_map = self.target_duplicates(context, obj_src, o, duplicates, mirrored,
+                                                             vg_name, vg_invert)
+                unique_keys = self.unique_source_keys(context, keys, derived)
+                yield len(src_key_blocks) - 1 - len(unique_keys)
+                if not keys:
+                    self.skip_empty_shapekeys(context, o, obj_src, keys, skipped, overwrite or incremental)
+                    if incremental: self.store_key_hashes(context, o, obj_src, hashes, keys, [], skipped)
+                    continue
+                
+                with self.profiler.phase('store_settings', o.name):
+                    stored_tgt_settings = self.store_shape_key_settings(context, o)
+                    if suppress: self.mute_all_shape_keys(context, o)
+                with self.profiler.phase('bind', o.name):
+                    def_mod, existing_mod_found = self.__get_mesh_def_mod(context, use_existing_mod, o, obj_src,
+                                                                          move_to_first, precision, vg_name, vg_invert)
+                
+                if existing_mod_found and sld_mod: sld_mod.show_viewport = False
+                self.debug("modifier name: {0}".format(def_mod.name))
+                
+                sk_map = []
+                shown = self.isolate_modifier(context, o, def_mod) if use_depsgraph else None
+                try:
+                    if use_depsgraph:
+                        ok = yield from self.iter_save_evaluated(context, obj_src, o, unique_keys, sk_map, skipped,
+                                                                 overwrite or incremental, empty_threshold)
+                    else:
+                        ok = yield from self.iter_save_as_shapekeys(context, o, unique_keys, def_mod.name, sk_map,
+                                                                    skipped, overwrite or incremental, empty_threshold)
+                    ret = ret and ok
+                finally:
+                    # also when cancelled: finish the keys done so far and clean up
+                    if shown is not None: self.restore_modifiers(context, o, shown)
+                    self.add_duplicate_shapekeys(context, o, keys, derived, sk_map, skipped, overwrite or incremental,
+                                                 mirror_map)
+                    self.skip_empty_shapekeys(context, o, obj_src, keys, skipped, overwrite or incremental)
+                    if add_drivers:
+                        with self.profiler.phase('add_sk_drivers', o.name):
+                            self.add_sk_drivers(context, sk_map, driver_mode)
+                    if incremental: self.store_key_hashes(context, o, obj_src, hashes, keys, sk_map, skipped)
+                    if not existing_mod_found: o.modifiers.remove(def_mod)
+                    with self.profiler.phase('restore_settings', o.name):
+                        self.restore_shape_key_settings(context, o, stored_tgt_settings)
+                    if existing_mod_found and mute_existing_mod:
+                        def_mod.show_viewport = False
+                    if sld_mod: sld_mod.show_viewport = True
+        finally:
+            if sld_mod: obj_src.modifiers.remove(sld_mod)
+            context.view_layer.objects.active = obj_src 
+            with self.profiler.phase('restore_settings', obj_src.name):
+                self.restore_shape_key_settings(context, obj_src, stored_source_settings)
+
+        return ret
+        
+        
+    def start_process(self, context):
+        vg_enum_callback(context)
+        vg_n = None if self.vg_name == 'NONE' else self.vg_name[:-3]
+        
+        return self.iter_process(context, self.use_existing_mod, self.mute_existing_mod,
+                                 self.move_to_first, self.precision, vg_n, self.vg_invert,
+                                 self.add_drivers, self.ignore_muted, self.suppress, self.overwrite,
+                                 self.use_sld_mod, self.sld_thickness, self.sld_offset, self.incremental,
+                                 self.use_fast_path, self.skip_empty, self.empty_threshold, self.use_depsgraph,
+                                 self.driver_mode, self.dedupe, self.use_mirror, self.engine, self.chunk_size,
+                                 self.use_bind_cache, self.cache_size, self.workers, self.extra_sources,
+                                 self.memory_budget)
+    
+    
+    def draw(self, context):
+        if self.redo_locked():
+            self.draw_redo_locked(context)
+            return
+        layout = self.layout
+        
+        layout.prop(self, "use_existing_mod")
+        ex_col = layout.column()
+        ex_col.enabled = self.use_existing_mod
+        ex_col.prop(self, "mute_existing_mod")
+        
+        layout.separator(factor=1)
+        
+        layout.prop(self, "engine")
+        # copying matching topology batches its keys under either engine
+        budget_col = layout.column()
+        budget_col.enabled = self.engine == 'ARRAY' or self.use_fast_path
+        chunk_row = budget_col.row()
+        chunk_row.enabled = self.memory_budget == 0
+        chunk_row.prop(self, "chunk_size")
+        budget_col.prop(self, "memory_budget")
+        batch_col = layout.column()
+        batch_col.enabled = self.engine == 'ARRAY'
+        batch_col.prop(self, "workers")
+        batch_col.prop(self, "extra_sources")
+        cache_row = batch_col.row(align=True)
+        cache_row.prop(self, "use_bind_cache")
+        cache_row.prop(self, "cache_size", text="")
+        cache_row.operator(ClearBindCache.bl_idname, text="", icon='TRASH')
+        
+        layout.label(text = "Fallback Mesh Deform Settings")
+        def_box = layout.box()
+        def_box.prop(self, "move_to_first")
+        def_box.prop(self, "precision")
+        vg_row = def_box.row()
+        vg_row.prop(self, "vg_name")
+        vg_row.prop(self, "vg_invert", icon="ARROW_LEFTRIGHT")
+
+        layout.label(text = "Shape Key Settings")
+        sk_box = layout.box()
+        drv_row = sk_box.row()
+        drv_row.prop(self, "add_drivers")
+        drv_sub = drv_row.row()
+        drv_sub.enabled = self.add_drivers
+        drv_sub.prop(self, "driver_mode", text="")
+        sk_box.prop(self, "ignore_muted")
+        sk_box.prop(self, "suppress")
+        sk_box.prop(self, "overwrite")
+        sk_box.prop(self, "incremental")
+        sk_box.prop(self, "use_fast_path")
+        sk_box.prop(self, "use_depsgraph")
+        sk_box.prop(self, "dedupe")
+        sk_box.prop(self, "use_mirror")
+        empty_row = sk_box.row()
+        empty_row.prop(self, "skip_empty")
+        empty_sub = empty_row.row()
+        empty_sub.enabled = self.skip_empty
+        empty_sub.prop(self, "empty_threshold")
+        
+        modal_row = layout.row()
+        modal_row.prop(self, "use_modal")
+        modal_row.prop(self, "redo_limit")
+        layout.label(text = "Profiling")
+        prof_box = layout.box()
+        prof_row = prof_box.row()
+        prof_row.prop(self, "profile")
+        prof_row.prop(self, "use_cprofile")
+        prof_col = prof_box.column()
+        prof_col.enabled = self.profile
+        prof_col.prop(self, "trace_path")
+        
+        layout.label(text = "Solidify Settings")
+        sld_box = layout.box()
+        sld_box.prop(self, "use_sld_mod")
+        sld_col = sld_box.column()
+        sld_col.enabled = self.use_sld_mod
+        sld_col.prop(self, "sld_thickness")
+        sld_col.prop(self, "sld_offset")
+    
+
+class ClearBindCache(bpy.types.Operator):
+    """Remove all bind data stored on disk by the Array engine"""
+    bl_label = "Clear Bind Cache"
+    bl_idname = "object.transfer_shape_keys_clear_bind_cache"
+    
+    def execute(self, context):
+        cache = get_bind_cache()
+        size = cache.size()
+        cache.clear()
+        self.report({"INFO"}, "Cleared bind cache ({0:.1f} MB)".format(size / (1024 * 1024)))
+        return {'FINISHED'}
+
+
+class ExportShapeKeys(bpy.types.Operator, ExportHelper):
+    """Write the shape keys of the active object to a file, to import them on the same mesh in other files"""
+    bl_label = "Export Shape Keys"
+    bl_idname = "object.transfer_shape_keys_export"
+    
+    filename_ext = ".tskd"
+    filter_glob: bpy.props.StringProperty(
+        default = "*.tskd",
+        options = {'HIDDEN'},
+    )
+    precision: bpy.props.EnumProperty(
+        name = "Precision",
+        description = "How vertex offsets are stored",
+        items = [
+            ('FLOAT32', "Full", "32 bit floats, offsets are stored exactly"),
+            ('FLOAT16', "Half", "16 bit floats, half the size. Offsets are rounded to about 3 significant digits"),
+        ],
+        default = 'FLOAT32',
+    )
+    threshold: bpy.props.FloatProperty(
+        name = "Threshold",
+        description = "Vertices a shape key moves by this much or less are not stored",
+        default = 0.0,
+        min = 0.0,
+        precision = 6,
+        subtype = 'DISTANCE',
+    )
+    
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj is not None and obj.type == 'MESH' and obj.data.shape_keys is not None
+    
+    def execute(self, context):
+        mesh = context.active_object.data
+        shape_keys = mesh.shape_keys
+        topology = key_file.topology_hash(len(mesh.vertices), *mesh_data.loop_topology(mesh))
+        
+        def keys():
+            # offsets from the relative key as they are, the vertex group is stored by name
+            for kb in shape_keys.key_blocks:
+                if kb == shape_keys.reference_key:
+                    continue
+                delta = mesh_data.key_block_coords(kb)
+                delta -= mesh_data.key_block_coords(kb.relative_key)
+                settings = {'name': kb.name, 'relative_key': kb.relative_key.name, 'vertex_group': kb.vertex_group,
+                            'slider_min': kb.slider_min, 'slider_max': kb.slider_max, 'value': kb.value,
+                            'mute': kb.mute}
+                yield settings, delta
+        
+        try:
+            count = key_file.write_key_file(self.filepath, len(mesh.vertices), topology, keys(), self.precision,
+                                            self.threshold)
+        except OSError as e:
+            self.report({"ERROR"}, "Could not write {0}: {1}".format(self.filepath, e))
+            return {'CANCELLED'}
+        self.report({"INFO"}, "Exported {0} shape keys to {1}".format(count, self.filepath))
+        return {'FINISHED'}
+
+
+class ImportShapeKeys(bpy.types.Operator, ImportHelper):
+    """Add the shape keys of an exported file to the selected meshes. Meshes whose topology differs from the exported one are skipped"""
+    bl_label = "Import Shape Keys"
+    bl_idname = "object.transfer_shape_keys_import"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    filename_ext = ".tskd"
+    filter_glob: bpy.props.StringProperty(
+        default = "*.tskd",
+        options = {'HIDDEN'},
+    )
+    overwrite: bpy.props.BoolProperty(
+        name = "Overwrite Existing",
+        description = "Existing shape keys will be overwritten",
+        default = True,
+    )
+    
+    @classmethod
+    def poll(cls, context):
+        return any(o.type == 'MESH' for o in context.selected_objects)
+    
+    def execute(self, context):
+        try:
+            keys = key_file.KeyFile(self.filepath)
+        except (OSError, ValueError) as e:
+            self.report({"ERROR"}, "Could not read {0}: {1}".format(self.filepath, e))
+            return {'CANCELLED'}
+        
+        for obj in context.selected_objects:
+            if obj.type != 'MESH':
+                continue
+            mesh = obj.data
+            if key_file.topology_hash(len(mesh.vertices), *mesh_data.loop_topology(mesh)) != keys.topology:
+                self.report({"ERROR"}, "{0} doesn't have the topology of the exported mesh, skipped".format(obj.name))
+                continue
+            self.import_keys(context, obj, keys)
+        return {'FINISHED'}
+    
+    def import_keys(self, context, obj, keys):
+        if obj.data.shape_keys is None:
+            obj.shape_key_add(name="Basis", from_mix=False)
+        shape_keys = obj.data.shape_keys
+        relative_co = co = None     # reused by every key
+        missing = set()
+        for i in key_file.import_order(keys.keys):
+            entry = keys.keys[i]
+            relative_key = shape_keys.key_blocks.get(entry['relative_key'])
+            if relative_key is None:
+                missing.add(entry['relative_key'])
+                relative_key = shape_keys.reference_key
+            relative_co = mesh_data.key_block_coords(relative_key, relative_co)
+            co = keys.key_coords(i, relative_co, co)
+            kb = mesh_data.add_key_block(obj, entry['name'], co, replace=self.overwrite)
+            if kb != relative_key:
+                kb.relative_key = relative_key
+            kb.vertex_group = entry['vertex_group']
+            # slider_min is clamped below slider_max, value to the range
+            kb.slider_min = entry['slider_min']
+            kb.slider_max = entry['slider_max']
+            kb.slider_min = entry['slider_min']
+            kb.value = entry['value']
+            kb.mute = entry['mute']
+        if missing:
+            s = "{0}: relative keys {1} not found, used the basis instead"
+            self.report({"WARNING"}, s.format(obj.name, ", ".join(sorted(missing))))
+        self.report({"INFO"}, "Imported {0} shape keys to {1}".format(len(keys.keys), obj.name))
+
+
+# 3Dview Header Menu
+class VIEW3D_MT_transfershapekeys_menu(bpy.types.Menu):
+    bl_label = "Transfer Shape Keys"
+    bl_idname = "VIEW3D_MT_transfershapekeys_menu"
+
+    def draw(self, context):
+        layout = self.layout
+        
+        layout.operator(TransferShapeKeysViaSurfaceDeform.bl_idname, text='Via Surface Deform', icon='MOD_MESHDEFORM')
+        layout.operator(TransferShapeKeysViaMeshDeform.bl_idname, text='Via Mesh Deform', icon='MOD_MESHDEFORM')
+        layout.separator()
+        layout.operator(ExportShapeKeys.bl_idname, text='Export Shape Keys...', icon='EXPORT')
+        layout.operator(ImportShapeKeys.bl_idname, text='Import Shape Keys...', icon='IMPORT')
+
+
+classes = [
+    VIEW3D_MT_transfershapekeys_menu,
+    TransferShapeKeysViaSurfaceDeform,
+    TransferShapeKeysViaMeshDeform,
+    ClearBindCache,
+    ExportShapeKeys,
+    ImportShapeKeys,
+]
+    
+def menu_func(self, context):
+    self.layout.menu(VIEW3D_MT_transfershapekeys_menu.bl_idname)
+
+def register():
+    for cls in classes:
+        bpy.utils.register_class(cls)
+    bpy.types.VIEW3D_MT_object.append(menu_func)
+
+def unregister():
+    for cls in classes:
+        bpy.utils.unregister_class(cls)
+    bpy.types.VIEW3D_MT_object.remove(menu_func)
+
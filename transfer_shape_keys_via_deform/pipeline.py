@@ -0,0 +1,287 @@
+#-*- coding: utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Scheduling of array transfers over several targets.
+#
+# Blender data may only be touched from the main thread, while binding and the
+# sparse products are plain NumPy, which releases the GIL. So the calling
+# thread reads source deltas and writes key blocks (through callbacks), and a
+# thread pool binds the targets and deforms chunks of keys in between. Chunks
+# are written back in key order and only a few are in flight at a time, so
+# memory stays bounded by the chunk size and worker count.
+
+import collections
+import concurrent.futures
+import re
+
+import numpy as np
+
+from . import profiling
+
+
+class TargetJob:
+    """One target of an array transfer"""
+
+    def __init__(self, target, keys, bind_func, bind_args, tgt_co, matrix=None, strength=1.0, name=None,
+                 parent=None):
+        self.target = target            # caller's data, passed back in the callbacks
+        self.name = name                # label for profiling
+        self.keys = keys                # source keys to transfer, in order
+        self.bind_func = bind_func      # bind_func(*bind_args) -> object with deform_batch()
+        self.bind_args = bind_args
+        self.tgt_co = tgt_co            # target rest coordinates the deltas are added to
+        self.matrix = matrix            # source to target space, or None
+        self.strength = strength
+        self.parent = parent            # job whose results are this job's source deltas, or None
+        self.bind = None
+        self.skipped = []               # keys dropped by run_transfer for having no effect
+
+    def chunks(self, chunk_size):
+        return [self.keys[start:start + chunk_size] for start in range(0, len(self.keys), chunk_size)]
+
+
+def deformed_coords(bind, tgt_co, src_deltas, matrix=None, strength=1.0):
+    # Target coordinates (keys, target verts, 3) of a batch of source deltas
+    if matrix is not None:
+        src_deltas = src_deltas @ np.asarray(matrix, dtype=np.float32)[:3, :3].T
+    coords = bind.deform_batch(src_deltas, strength)
+    coords += tgt_co
+    return coords
+
+
+def chunk_size_for_budget(budget, num_source_verts, num_target_verts, workers=1):
+    # Keys per chunk so that all chunks in flight fit in budget bytes. A key in
+    # flight holds its source deltas and a transformed copy, and about three
+    # target sized float32 arrays (bind result, scattered result, coordinates)
+    per_key = 12 * (2 * num_source_verts + 3 * num_target_verts)
+    in_flight = 2 * max(1, workers) + 1
+    return max(1, int(budget // (per_key * in_flight)))
+
+
+def max_offsets(deltas):
+    # Largest vertex displacement of every key in a (keys, verts, 3) array
+    if deltas.shape[1] == 0:
+        return np.zeros(len(deltas), dtype=np.float32)
+    return np.sqrt(np.einsum('kvi,kvi->kv', deltas, deltas).max(axis=1))
+
+
+def lod_parents(names, pattern=r"LOD(\d+)"):
+    """Chains of levels of detail among names.
+
+    Names that only differ by the number matched by pattern's group (e.g.
+    Shirt_LOD0, Shirt_LOD1, Shirt_LOD2) form a chain in that order. Returns
+    {name: name of the next higher level} for every level but the first.
+    """
+    regex = re.compile(pattern)
+    if regex.groups < 1:
+        raise ValueError("LOD pattern needs a group for the level number")
+    chains = {}
+    for name in names:
+        match = regex.search(name)
+        if match is None:
+            continue
+        base = name[:match.start()] + name[match.end():]
+        chains.setdefault(base, []).append((int(match.group(1)), name))
+    parents = {}
+    for levels in chains.values():
+        levels.sort()
+        for (_, parent), (_, name) in zip(levels, levels[1:]):
+            parents[name] = parent
+    return parents
+
+
+def key_sketches(deltas, size=4, seed=0):
+    # A few random projections of (keys, verts, 3) deltas, (keys, 3 * size).
+    # Keys that are scaled copies of each other have parallel sketches
+    rng = np.random.default_rng(seed)
+    projections = rng.standard_normal((size, deltas.shape[1])).astype(np.float32)
+    return np.einsum('sv,kvi->ksi', projections, deltas).reshape(len(deltas), -1)
+
+
+def duplicate_candidates(sketches, allow_scaled=True, tolerance=1e-4):
+    """Keys whose sketch is an earlier key's sketch times a scale.
+
+    Returns {key index: (index of the first such key, scale)}. These are
+    only candidates: check them on the full deltas with is_scaled_copy.
+    """
+    sketches = np.asarray(sketches, dtype=np.float64)
+    norms = np.linalg.norm(sketches, axis=1)
+    units = sketches / np.maximum(norms, 1e-30)[:, None]
+    # scaled copies with a negative scale point the other way
+    if len(units):
+        signs = np.sign(units[np.arange(len(units)), np.abs(units).argmax(axis=1)])
+        units *= np.where(signs == 0.0, 1.0, signs)[:, None]
+
+    first = {}
+    candidates = {}
+    for i, unit in enumerate(np.round(units / tolerance).astype(np.int64)):
+        signature = unit.tobytes() if norms[i] > 0.0 else b''
+        j = first.setdefault(signature, i)
+        if j == i:
+            continue
+        scale = float(sketches[i] @ sketches[j]) / float(norms[j] ** 2) if norms[j] > 0.0 else 1.0
+        if abs(scale - 1.0) <= tolerance:
+            candidates[i] = (j, 1.0)
+        elif allow_scaled:
+            candidates[i] = (j, scale)
+    return candidates
+
+
+def is_scaled_copy(delta, other, scale, tolerance=1e-4):
+    # delta == other * scale, up to tolerance relative to the larger offset
+    limit = tolerance * max(float(np.abs(delta).max(initial=0.0)), float(np.abs(other).max(initial=0.0)), 1e-12)
+    return float(np.abs(delta - other * np.float32(scale)).max(initial=0.0)) <= limit
+
+
+def _deform_chunk(job, src_deltas, threshold=0.0):
+    # (indices of the kept keys, their target coordinates). With a threshold,
+    # keys that move none of the source vertices the bind uses, or none of the
+    # target vertices, by at least threshold are dropped
+    if job.matrix is not None:
+        src_deltas = src_deltas @ np.asarray(job.matrix, dtype=np.float32)[:3, :3].T
+    keep = np.arange(len(src_deltas))
+    if len(keep) and threshold > 0.0:
+        used = getattr(job.bind, 'source_verts', None)
+        offsets = max_offsets(src_deltas if used is None else src_deltas[:, used])
+        keep = np.flatnonzero(offsets >= threshold)
+        src_deltas = src_deltas[keep]
+    if len(keep) == 0:
+        return keep, np.empty((0, len(job.tgt_co), 3), dtype=np.float32)
+
+    coords = job.bind.deform_batch(src_deltas, job.strength)
+    if threshold > 0.0:
+        moved = max_offsets(coords) >= threshold
+        keep = keep[moved]
+        coords = coords[moved]
+    coords += job.tgt_co
+    return keep, coords
+
+
+def _timed(profiler, name, target, func, *args):
+    with profiler.phase(name, target):
+        return func(*args)
+
+
+def run_transfer(jobs, read_deltas, write_keys, chunk_size=32, workers=1, on_target_done=None,
+                 profiler=profiling.NULL_PROFILER, threshold=0.0):
+    """Transfer the keys of every job.
+
+    read_deltas(job, keys, out) -> (keys, source verts, 3) and
+    write_keys(job, keys, coords) are called on the calling thread,
+    out being None or an earlier result of read_deltas to reuse,
+    on_target_done(job) once all keys of a job are written. Keys that
+    move no target vertex by threshold or more are not written but
+    collected in job.skipped.
+
+    A job with a parent is chained: it is bound to the parent's target and
+    its source deltas are the parent's results, which are never read back
+    from Blender. Its keys must be among the parent's, and jobs come after
+    their parents.
+    """
+    for _ in iter_transfer(jobs, read_deltas, write_keys, chunk_size, workers, on_target_done, profiler, threshold):
+        pass
+
+
+def iter_transfer(jobs, read_deltas, write_keys, chunk_size=32, workers=1, on_target_done=None,
+                  profiler=profiling.NULL_PROFILER, threshold=0.0):
+    # run_transfer that yields the number of keys done after every chunk.
+    # Closing it cancels the work that hasn't started and waits for the rest
+    workers = max(1, workers)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        bind_futures = {}
+        running = {}
+        buffers = []        # source delta arrays free for reuse
+        try:
+            for job in jobs:
+                if job.keys:
+                    bind_futures[job] = pool.submit(_timed, profiler, 'bind', job.name, job.bind_func, *job.bind_args)
+                elif on_target_done is not None:
+                    on_target_done(job)
+            children = collections.defaultdict(list)
+            for job in bind_futures:
+                if job.parent is not None:
+                    children[job.parent].append(job)
+
+            # (job, chunk index, keys, deltas), deltas None until read
+            tasks = collections.deque()
+            num_chunks = collections.Counter()
+            for job in bind_futures:
+                if job.parent is None:
+                    chunks = job.chunks(chunk_size)
+                    tasks.extend((job, index, keys, None) for index, keys in enumerate(chunks))
+                    num_chunks[job] = len(chunks)
+                else:
+                    num_chunks[job] = num_chunks[job.parent]
+            next_chunk = collections.Counter()
+            done_chunks = collections.defaultdict(dict)
+
+            while tasks or running:
+                # keep every worker busy, but never read far ahead of the writes
+                while tasks and len(running) < 2 * workers:
+                    job, index, keys, deltas = tasks.popleft()
+                    if job.bind is None:
+                        with profiler.phase('wait_bind', job.name):
+                            job.bind = bind_futures[job].result()
+                    read = deltas is None
+                    if read:
+                        with profiler.phase('read_deltas', job.name):
+                            deltas = read_deltas(job, keys, buffers.pop() if buffers else None)
+                    future = pool.submit(_timed, profiler, 'deform', job.name, _deform_chunk, job, deltas, threshold)
+                    running[future] = (job, index, keys, deltas, read)
+
+                finished, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in finished:
+                    job, index, keys, deltas, read = running.pop(future)
+                    keep, coords = future.result()
+                    done_chunks[job][index] = (keys, keep, coords)
+                    if read:
+                        buffers.append(deltas)
+
+                    # the next levels of a chain start from this chunk's results,
+                    # before anything else so the intermediate arrays are short lived
+                    for child in children[job]:
+                        wanted = set(child.keys)
+                        kept = set(keep.tolist())
+                        rows = [i for i, kb in enumerate(keys) if kb in wanted]
+                        child.skipped.extend(keys[i] for i in rows if i not in kept)
+                        rows = [i for i in rows if i in kept]
+                        positions = np.searchsorted(keep, rows)
+                        tasks.appendleft((child, index, [keys[i] for i in rows], coords[positions] - job.tgt_co))
+
+                    # write this job's chunks in order
+                    while next_chunk[job] in done_chunks[job]:
+                        keys, keep, coords = done_chunks[job].pop(next_chunk[job])
+                        num_keys = len(keys)
+                        if len(keep) < num_keys:
+                            kept = set(keep.tolist())
+                            job.skipped.extend(kb for i, kb in enumerate(keys) if i not in kept)
+                            keys = [keys[i] for i in keep]
+                        if keys:
+                            with profiler.phase('write_keys', job.name):
+                                write_keys(job, keys, coords)
+                        next_chunk[job] += 1
+                        yield num_keys
+                    if next_chunk[job] == num_chunks[job]:
+                        job.bind = None
+                        if on_target_done is not None:
+                            on_target_done(job)
+        finally:
+            for future in list(bind_futures.values()) + list(running):
+                future.cancel()
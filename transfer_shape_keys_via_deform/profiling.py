@@ -0,0 +1,164 @@
+#-*- coding: utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Per-phase timing of a transfer.
+#
+#   with profiler.phase('bind', target=obj.name):
+#       ...
+#
+# records wall time and call count per phase, and every call with its target
+# and key for the trace file. When profiling is off the operators use
+# NULL_PROFILER, whose phase() returns a shared no-op context manager.
+
+import cProfile
+import csv
+import io
+import json
+import pstats
+import threading
+import time
+
+
+class _NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class NullProfiler:
+    """Profiler that records nothing"""
+
+    enabled = False
+    _phase = _NullPhase()
+
+    def phase(self, name, target=None, key=None):
+        return self._phase
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class _Phase:
+    __slots__ = ('profiler', 'name', 'target', 'key', 'start')
+
+    def __init__(self, profiler, name, target, key):
+        self.profiler = profiler
+        self.name = name
+        self.target = target
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.target, self.key, self.start, time.perf_counter() - self.start)
+        return False
+
+
+class Profiler:
+    """Wall time and call counts per phase, per target and per key"""
+
+    enabled = True
+
+    def __init__(self, use_cprofile=False):
+        self.totals = {}        # name -> [calls, seconds]
+        self.events = []        # (name, target, key, start, seconds)
+        self.lock = threading.Lock()
+        self.cprofile = cProfile.Profile() if use_cprofile else None
+        self.start_time = None
+        self.wall_time = 0.0
+
+    def phase(self, name, target=None, key=None):
+        return _Phase(self, name, target, key)
+
+    def record(self, name, target, key, start, seconds):
+        # phases may end on worker threads
+        with self.lock:
+            total = self.totals.setdefault(name, [0, 0.0])
+            total[0] += 1
+            total[1] += seconds
+            self.events.append((name, target, key, start - self.start_time if self.start_time else start, seconds))
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        if self.cprofile is not None:
+            self.cprofile.enable()
+
+    def stop(self):
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        self.wall_time = time.perf_counter() - self.start_time
+
+    def per_target(self):
+        # {target: {phase: seconds}}
+        targets = {}
+        for name, target, key, start, seconds in self.events:
+            phases = targets.setdefault(target, {})
+            phases[name] = phases.get(name, 0.0) + seconds
+        return targets
+
+    def summary(self, top=None):
+        # Lines of "phase: seconds (calls)", slowest first. Phases that run on
+        # worker threads overlap, so they can add up to more than the wall time.
+        lines = ["Total: {0:.3f}s".format(self.wall_time)]
+        ordered = sorted(self.totals.items(), key=lambda item: -item[1][1])
+        for name, (calls, seconds) in ordered[:top]:
+            lines.append("{0}: {1:.3f}s ({2} calls)".format(name, seconds, calls))
+        return lines
+
+    def cprofile_summary(self, top=10):
+        # Lines of "function: cumulative seconds (calls)" of the top functions
+        # by cumulative time, one per line so they fit the operator reports
+        if self.cprofile is None:
+            return []
+        stats = pstats.Stats(self.cprofile, stream=io.StringIO()).sort_stats('cumulative')
+        lines = []
+        for func in stats.fcn_list[:top]:
+            calls, _, _, cumulative, _ = stats.stats[func]
+            lines.append("{0}: {1:.3f}s ({2} calls)".format(pstats.func_std_string(func), cumulative, calls))
+        return lines
+
+    def write_trace(self, path):
+        # .csv gets one row per call, anything else a JSON document
+        if path.lower().endswith('.csv'):
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(('phase', 'target', 'key', 'start', 'seconds'))
+                writer.writerows(self.events)
+        else:
+            trace = {
+                'wall_time': self.wall_time,
+                'phases': {name: {'calls': c, 'seconds': s} for name, (c, s) in self.totals.items()},
+                'targets': self.per_target(),
+                'events': [dict(zip(('phase', 'target', 'key', 'start', 'seconds'), e)) for e in self.events],
+            }
+            with open(path, 'w') as f:
+                json.dump(trace, f, indent=1)
+        if self.cprofile is not None:
+            self.cprofile.dump_stats(path + '.prof')
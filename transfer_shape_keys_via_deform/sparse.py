@@ -0,0 +1,100 @@
+#-*- coding: utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Minimal sparse matrix support. Blender ships NumPy but not SciPy, so the
+# bind matrices are stored in CSR form and multiplied with plain NumPy.
+
+import numpy as np
+
+
+DOT_CHUNK_ELEMENTS = 1 << 24    # bound on the temporary products of one dot() block
+
+
+class CSRMatrix:
+    """Compressed sparse row matrix (indptr, indices, data)"""
+
+    def __init__(self, indptr, indices, data, shape):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.data = np.asarray(data, dtype=np.float32)
+        self.shape = (int(shape[0]), int(shape[1]))
+
+    @classmethod
+    def from_coo(cls, rows, cols, data, shape):
+        # Build from (row, col, value) triplets. Duplicate entries are summed.
+        rows = np.asarray(rows, dtype=np.int64).ravel()
+        cols = np.asarray(cols, dtype=np.int64).ravel()
+        data = np.asarray(data, dtype=np.float64).ravel()
+
+        flat = rows * shape[1] + cols
+        flat, inverse = np.unique(flat, return_inverse=True)
+        data = np.bincount(inverse.ravel(), weights=data, minlength=len(flat))
+        rows = flat // shape[1]
+        cols = flat % shape[1]
+
+        indptr = np.zeros(shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=shape[0]), out=indptr[1:])
+        return cls(indptr, cols, data, shape)
+
+    def to_arrays(self, prefix):
+        # Named arrays for storage (see bind_cache), restored by from_arrays
+        return {
+            prefix + 'indptr': self.indptr,
+            prefix + 'indices': self.indices,
+            prefix + 'data': self.data,
+            prefix + 'shape': np.array(self.shape, dtype=np.int64),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix):
+        return cls(arrays[prefix + 'indptr'], arrays[prefix + 'indices'], arrays[prefix + 'data'],
+                   arrays[prefix + 'shape'])
+
+    @property
+    def nnz(self):
+        return len(self.indices)
+
+    def dot(self, x):
+        # x: (shape[1],) or (shape[1], n). Returns (shape[0],) or (shape[0], n)
+        x = np.asarray(x)
+        vector = x.ndim == 1
+        if vector:
+            x = x[:, None]
+
+        out = np.zeros((self.shape[0], x.shape[1]), dtype=np.result_type(x.dtype, self.data.dtype))
+        if self.nnz:
+            # rows are processed in blocks so the (nnz x n) products stay bounded
+            block_nnz = max(1, DOT_CHUNK_ELEMENTS // max(1, x.shape[1]))
+            bounds = np.searchsorted(self.indptr, np.arange(0, self.nnz, block_nnz), side='right') - 1
+            bounds = np.unique(np.append(bounds, self.shape[0]))
+            for row_start, row_end in zip(bounds[:-1], bounds[1:]):
+                self._dot_rows(x, out, row_start, row_end)
+
+        return out[:, 0] if vector else out
+
+    def _dot_rows(self, x, out, row_start, row_end):
+        lo, hi = self.indptr[row_start], self.indptr[row_end]
+        if lo == hi:
+            return
+        prod = x[self.indices[lo:hi]]
+        prod *= self.data[lo:hi, None]
+        starts = self.indptr[row_start:row_end]
+        nonempty = np.flatnonzero(self.indptr[row_start + 1:row_end + 1] > starts)
+        out[row_start + nonempty] = np.add.reduceat(prod, starts[nonempty] - lo, axis=0)
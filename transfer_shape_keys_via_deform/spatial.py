@@ -0,0 +1,161 @@
+#-*- coding: utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Batched nearest neighbour queries for binding.
+#
+# Blender's mathutils has a BVH tree, but it answers one query per Python
+# call and can't be used from the worker threads. PointGrid is a uniform
+# grid over a point set, sorted by cell, that answers k nearest queries for
+# whole arrays of points: every query looks at the cube of cells around its
+# own, grown ring by ring until the k-th nearest point found is provably
+# closer than anything outside the cube. Queries far from the points (more
+# than a few cells) go on to a grid with cells four times as large, and so
+# on. Building a grid is a sort, and each query touches a bounded number of
+# cells, so a bind is O(N log N) instead of O(target verts x source triangles).
+
+import numpy as np
+
+
+POINTS_PER_CELL = 4             # average points per occupied cell
+MAX_RING = 2                    # queries not settled within this many rings go to a coarser grid
+COARSER_FACTOR = 4              # cell size of the next coarser grid
+QUERY_CHUNK_ELEMENTS = 1 << 22  # query x candidate distances per chunk
+
+
+def brute_force_k_nearest(points, queries, k, chunk_elements=QUERY_CHUNK_ELEMENTS):
+    # Indices (queries, k) of the k nearest points, in no particular order.
+    # O(queries x points); the reference PointGrid is tested against
+    points = np.asarray(points, dtype=np.float64)
+    queries = np.asarray(queries, dtype=np.float64)
+    k = min(k, len(points))
+    out = np.empty((len(queries), k), dtype=np.int64)
+    p_sq = np.einsum('ij,ij->i', points, points)
+    chunk = max(1, chunk_elements // max(1, len(points)))
+    for start in range(0, len(queries), chunk):
+        q = queries[start:start + chunk]
+        d2 = p_sq[None, :] - 2.0 * q @ points.T
+        if k < len(points):
+            out[start:start + chunk] = np.argpartition(d2, k - 1, axis=1)[:, :k]
+        else:
+            out[start:start + chunk] = np.arange(k)[None, :]
+    return out
+
+
+class PointGrid:
+    """Uniform grid over a point set for batched k nearest queries"""
+
+    def __init__(self, points, cell_size=None):
+        self.points = np.asarray(points, dtype=np.float64)
+        n = len(self.points)
+        self.lo = self.points.min(axis=0) if n else np.zeros(3)
+        extent = (self.points.max(axis=0) - self.lo) if n else np.zeros(3)
+        if cell_size is None:
+            # the points of a bind lie on a surface, so cells are sized for a
+            # 2D distribution rather than a filled volume
+            cell_size = float(extent.max()) / max(1.0, np.sqrt(n / POINTS_PER_CELL))
+        self.cell_size = max(cell_size, 1e-12)
+        self.dims = np.minimum(np.floor(extent / self.cell_size).astype(np.int64) + 1, 1 << 20)
+        self.coarser = None
+
+        keys = self.cell_keys(self.cells(self.points))
+        self.order = np.argsort(keys, kind='stable')
+        self.keys, self.starts, self.counts = np.unique(keys[self.order], return_index=True, return_counts=True)
+
+    def cells(self, co):
+        # Cell of every point, clamped to the grid
+        cells = np.floor((co - self.lo) / self.cell_size).astype(np.int64)
+        return np.clip(cells, 0, self.dims - 1)
+
+    def cell_keys(self, cells):
+        return (cells[..., 0] * self.dims[1] + cells[..., 1]) * self.dims[2] + cells[..., 2]
+
+    def k_nearest(self, queries, k):
+        """Indices (queries, k) of the k nearest points to every query, in
+        no particular order.
+        """
+        queries = np.asarray(queries, dtype=np.float64)
+        k = min(k, len(self.points))
+        out = np.empty((len(queries), k), dtype=np.int64)
+        if k == 0:
+            return out
+
+        pending = np.arange(len(queries))
+        for ring in range(1, MAX_RING + 1):
+            if not len(pending):
+                break
+            r = np.arange(-ring, ring + 1)
+            offsets = np.stack(np.meshgrid(r, r, r, indexing='ij'), axis=-1).reshape(-1, 3)
+            # queries are chunked so the padded candidate matrix stays bounded
+            chunk = max(1, QUERY_CHUNK_ELEMENTS // (len(offsets) * POINTS_PER_CELL * 4))
+            settled = []
+            for start in range(0, len(pending), chunk):
+                ids = pending[start:start + chunk]
+                done = self.__query_ring(queries[ids], offsets, ring, k, out, ids)
+                settled.append(done)
+            pending = pending[~np.concatenate(settled)]
+
+        if len(pending):
+            if self.coarser is None:
+                self.coarser = PointGrid(self.points, self.cell_size * COARSER_FACTOR)
+            out[pending] = self.coarser.k_nearest(queries[pending], k)
+        return out
+
+    def __query_ring(self, queries, offsets, ring, k, out, ids):
+        # k nearest among the points in the cube of cells around every query.
+        # Writes the settled queries to out and returns which ones they are
+        cells = self.cells(queries)[:, None, :] + offsets[None, :, :]
+        valid = np.all((cells >= 0) & (cells < self.dims), axis=-1)
+        keys = self.cell_keys(cells)
+        pos = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        found = valid & (self.keys[pos] == keys)
+        counts = np.where(found, self.counts[pos], 0)
+        totals = counts.sum(axis=1)
+        enough = totals >= k
+        if not enough.any():
+            return enough
+
+        # every query's candidates in one padded (queries, most candidates) matrix
+        counts = counts[enough]
+        pos = pos[enough]
+        totals = totals[enough]
+        flat_counts = counts.ravel()
+        row = np.repeat(np.arange(len(counts)), totals)
+        first = np.repeat(self.starts[pos].ravel(), flat_counts)
+        within = np.arange(len(row)) - np.repeat(np.cumsum(flat_counts) - flat_counts, flat_counts)
+        column = np.arange(len(row)) - np.repeat(np.cumsum(totals) - totals, totals)
+        candidates = np.zeros((len(counts), totals.max()), dtype=np.int64)
+        candidates[row, column] = self.order[first + within]
+
+        q = queries[enough]
+        diff = self.points[candidates[row, column]] - q[row]
+        d2 = np.full(candidates.shape, np.inf)
+        d2[row, column] = np.einsum('ij,ij->i', diff, diff)
+        nearest = np.argpartition(d2, k - 1, axis=1)[:, :k]
+        kth = np.take_along_axis(d2, nearest, axis=1).max(axis=1)
+
+        # anything outside the cube is at least ring cells away, unless the
+        # cube covers the whole grid
+        settled = np.zeros(len(queries), dtype=bool)
+        sure = kth <= (ring * self.cell_size) ** 2
+        if ring >= self.dims.max():
+            sure[:] = True
+        settled[np.flatnonzero(enough)[sure]] = True
+        out[ids[settled]] = np.take_along_axis(candidates, nearest, axis=1)[sure]
+        return settled
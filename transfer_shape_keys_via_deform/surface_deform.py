@@ -0,0 +1,252 @@
+#-*- coding: utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Array implementation of the Surface Deform modifier.
+#
+# Every target vertex is bound to the few source triangles nearest to it. For
+# each of them the vertex is stored as the barycentric coordinates of its
+# projection onto the triangle plus an offset along the triangle normal, and
+# the triangles are blended with weights that fall off with distance, like the
+# modifier's "Interpolation Falloff". Reconstructing the rest pose from the
+# bind gives back the target exactly, so a source shape key turns into
+#
+#   target_delta = V @ source_delta + N @ (deformed_normals - rest_normals)
+#
+# where V (target verts x source verts) and N (target verts x bound
+# triangles) are sparse matrices that are computed once per target.
+#
+# No bpy in here: inputs and outputs are plain NumPy arrays.
+
+import numpy as np
+
+from . import bind_cache, spatial
+from .sparse import CSRMatrix
+
+
+DEFAULT_NUM_TRIANGLES = 4       # triangles each target vertex is bound to
+CANDIDATE_FACTOR = 4            # candidates (by centroid) per bound triangle
+BIND_CHUNK_ELEMENTS = 1 << 18   # target verts x candidate triangles per bind chunk
+
+
+def triangle_normals(tri_co):
+    # tri_co: (n, 3, 3) -> unit normals (n, 3)
+    normals = np.cross(tri_co[:, 1] - tri_co[:, 0], tri_co[:, 2] - tri_co[:, 0])
+    length = np.linalg.norm(normals, axis=-1, keepdims=True)
+    return normals / np.maximum(length, 1e-12)
+
+
+def _segment_distance(p, a, b):
+    ab = b - a
+    t = np.einsum('...i,...i->...', p - a, ab) / np.maximum(np.einsum('...i,...i->...', ab, ab), 1e-24)
+    t = np.clip(t, 0.0, 1.0)
+    return np.linalg.norm(p - (a + t[..., None] * ab), axis=-1)
+
+
+def project_on_triangles(p, a, b, c, n):
+    # Returns barycentric coordinates of p projected onto the plane of each
+    # triangle (unclamped), the signed offset along the normal and the
+    # distance from p to the triangle itself.
+    ab = b - a
+    ac = c - a
+    ap = p - a
+    d00 = np.einsum('...i,...i->...', ab, ab)
+    d01 = np.einsum('...i,...i->...', ab, ac)
+    d11 = np.einsum('...i,...i->...', ac, ac)
+    d20 = np.einsum('...i,...i->...', ap, ab)
+    d21 = np.einsum('...i,...i->...', ap, ac)
+    denom = d00 * d11 - d01 * d01
+    denom = np.where(np.abs(denom) > 1e-24, denom, 1e-24)
+    v = (d11 * d20 - d01 * d21) / denom
+    w = (d00 * d21 - d01 * d20) / denom
+    bary = np.stack((1.0 - v - w, v, w), axis=-1)
+    offset = np.einsum('...i,...i->...', ap, n)
+
+    inside = np.all(bary >= 0.0, axis=-1)
+    edge_dist = np.minimum(np.minimum(_segment_distance(p, a, b), _segment_distance(p, b, c)),
+                           _segment_distance(p, c, a))
+    dist = np.where(inside, np.abs(offset), edge_dist)
+    return bary, offset, dist
+
+
+class SurfaceDeformBind:
+    """Surface deform bind data of one target against one source surface"""
+
+    def __init__(self, tris, tri_rest, vert_weights, normal_weights, weights=None, target_verts=None,
+                 num_target_verts=None):
+        self.tris = tris                        # (t, 3) source vertex indices of the bound triangles
+        self.tri_rest = tri_rest                # (t, 3, 3) rest coordinates of the bound triangles
+        self.rest_normals = triangle_normals(tri_rest)
+        self.vert_weights = vert_weights        # CSR (bound target verts x source verts)
+        self.normal_weights = normal_weights    # CSR (bound target verts x t)
+        self.weights = weights                  # per bound target vertex influence (vertex group) or None
+        self.target_verts = target_verts        # indices of the bound target verts, None when all are bound
+        self.num_target_verts = vert_weights.shape[0] if num_target_verts is None else num_target_verts
+
+    def to_arrays(self):
+        arrays = {'tris': self.tris, 'tri_rest': self.tri_rest}
+        arrays.update(self.vert_weights.to_arrays('vert_weights_'))
+        arrays.update(self.normal_weights.to_arrays('normal_weights_'))
+        if self.weights is not None:
+            arrays['weights'] = self.weights
+        if self.target_verts is not None:
+            arrays['target_verts'] = self.target_verts
+            arrays['num_target_verts'] = np.array([self.num_target_verts])
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(arrays['tris'], arrays['tri_rest'],
+                   CSRMatrix.from_arrays(arrays, 'vert_weights_'),
+                   CSRMatrix.from_arrays(arrays, 'normal_weights_'),
+                   arrays.get('weights'), arrays.get('target_verts'),
+                   int(arrays['num_target_verts'][0]) if 'num_target_verts' in arrays else None)
+
+    @property
+    def num_source_verts(self):
+        return self.vert_weights.shape[1]
+
+    @property
+    def source_verts(self):
+        # Source vertices that can move the target at all
+        return np.unique(self.tris)
+
+    def deform(self, src_delta, strength=1.0):
+        # src_delta: (source verts, 3) -> target delta (target verts, 3)
+        return self.deform_batch(np.asarray(src_delta)[None], strength)[0]
+
+    def deform_batch(self, src_deltas, strength=1.0):
+        # src_deltas: (keys, source verts, 3) -> (keys, target verts, 3)
+        # All keys go through the bind as a single (source verts x 3 * keys) product
+        src_deltas = np.asarray(src_deltas, dtype=np.float32)
+        num_keys = len(src_deltas)
+        num_tris = len(self.tris)
+
+        tri_co = self.tri_rest[None] + src_deltas[:, self.tris]
+        normals = triangle_normals(tri_co.reshape(-1, 3, 3)).reshape(num_keys, num_tris, 3)
+        normals -= self.rest_normals
+
+        x = src_deltas.transpose(1, 0, 2).reshape(self.num_source_verts, 3 * num_keys)
+        n = normals.transpose(1, 0, 2).reshape(num_tris, 3 * num_keys).astype(np.float32)
+        tgt_deltas = self.vert_weights.dot(x)
+        tgt_deltas += self.normal_weights.dot(n)
+
+        tgt_deltas = tgt_deltas.reshape(self.vert_weights.shape[0], num_keys, 3).transpose(1, 0, 2)
+        tgt_deltas = self.apply_influence(tgt_deltas, strength)
+        if self.target_verts is None:
+            return tgt_deltas
+
+        # scatter the bound vertices into the full key, the rest doesn't move
+        full = np.zeros((num_keys, self.num_target_verts, 3), dtype=tgt_deltas.dtype)
+        full[:, self.target_verts] = tgt_deltas
+        return full
+
+    def apply_influence(self, tgt_delta, strength):
+        if strength != 1.0:
+            tgt_delta *= strength
+        if self.weights is not None:
+            tgt_delta *= self.weights[:, None]
+        return tgt_delta
+
+
+def bind_key(src_co, tris, tgt_co, falloff=4.0, weights=None, num_triangles=DEFAULT_NUM_TRIANGLES):
+    # Cache key of the bind computed by bind_surface_deform for these inputs
+    return bind_cache.hash_key('surface_deform', np.asarray(src_co, dtype=np.float32),
+                               np.asarray(tris, dtype=np.int32), np.asarray(tgt_co, dtype=np.float32),
+                               float(falloff), None if weights is None else np.asarray(weights, dtype=np.float32),
+                               int(num_triangles))
+
+
+def cached_bind_surface_deform(cache, src_co, tris, tgt_co, falloff=4.0, weights=None,
+                               num_triangles=DEFAULT_NUM_TRIANGLES):
+    # bind_surface_deform through a BindCache. Returns (bind, was_cached)
+    key = bind_key(src_co, tris, tgt_co, falloff, weights, num_triangles)
+    arrays = cache.get(key)
+    if arrays is not None:
+        return SurfaceDeformBind.from_arrays(arrays), True
+    bind = bind_surface_deform(src_co, tris, tgt_co, falloff, weights, num_triangles)
+    cache.put(key, bind.to_arrays())
+    return bind, False
+
+
+def bind_surface_deform(src_co, tris, tgt_co, falloff=4.0, weights=None, num_triangles=DEFAULT_NUM_TRIANGLES):
+    """Bind target vertices to a triangulated source surface.
+
+    src_co and tgt_co must be in the same space. weights are the optional
+    per target vertex influence (vertex group), like the modifier's. Only
+    vertices with nonzero weight are bound and deformed.
+    """
+    src_co = np.asarray(src_co, dtype=np.float64)
+    tgt_co = np.asarray(tgt_co, dtype=np.float64)
+    tris = np.asarray(tris, dtype=np.int64).reshape(-1, 3)
+    num_target_verts = len(tgt_co)
+
+    target_verts = None
+    if weights is not None:
+        weights = np.asarray(weights, dtype=np.float32)
+        if not weights.all():
+            target_verts = np.flatnonzero(weights)
+            tgt_co = tgt_co[target_verts]
+            weights = weights[target_verts]
+    num_tgt = len(tgt_co)
+
+    tri_co = src_co[tris]
+    normals = triangle_normals(tri_co)
+    centroids = tri_co.mean(axis=1)
+    num_triangles = min(num_triangles, len(tris))
+
+    eps = 1e-6 * max(float(np.ptp(src_co, axis=0).max()) if len(src_co) else 1.0, 1e-6)
+    num_candidates = num_triangles * CANDIDATE_FACTOR
+    chunk = max(1, BIND_CHUNK_ELEMENTS // num_candidates)
+    grid = spatial.PointGrid(centroids)
+
+    tri_ids = np.empty((num_tgt, num_triangles), dtype=np.int64)
+    bary = np.empty((num_tgt, num_triangles, 3), dtype=np.float64)
+    offset = np.empty((num_tgt, num_triangles), dtype=np.float64)
+    w = np.empty((num_tgt, num_triangles), dtype=np.float64)
+
+    for start in range(0, num_tgt, chunk):
+        sl = slice(start, start + chunk)
+        candidates = grid.k_nearest(tgt_co[sl], num_candidates)
+        c_bary, c_offset, c_dist = project_on_triangles(tgt_co[sl, None, :], tri_co[candidates, 0],
+                                                        tri_co[candidates, 1], tri_co[candidates, 2],
+                                                        normals[candidates])
+
+        # keep the nearest triangles by exact distance
+        order = np.argsort(c_dist, axis=1)[:, :num_triangles]
+        tri_ids[sl] = np.take_along_axis(candidates, order, axis=1)
+        bary[sl] = np.take_along_axis(c_bary, order[..., None], axis=1)
+        offset[sl] = np.take_along_axis(c_offset, order, axis=1)
+        dist = np.take_along_axis(c_dist, order, axis=1)
+
+        # distance falloff relative to the nearest triangle
+        c_w = ((dist[:, :1] + eps) / (dist + eps)) ** falloff
+        w[sl] = c_w / c_w.sum(axis=1, keepdims=True)
+
+    # only the triangles that are actually used are kept in the bind
+    used, local = np.unique(tri_ids, return_inverse=True)
+    local = local.reshape(tri_ids.shape)
+
+    rows = np.repeat(np.arange(num_tgt), num_triangles)
+    vert_weights = CSRMatrix.from_coo(np.repeat(rows, 3), tris[tri_ids].ravel(),
+                                      (w[..., None] * bary).ravel(), (num_tgt, len(src_co)))
+    normal_weights = CSRMatrix.from_coo(rows, local.ravel(), (w * offset).ravel(), (num_tgt, len(used)))
+
+    return SurfaceDeformBind(tris[used], tri_co[used].astype(np.float32), vert_weights, normal_weights, weights,
+                             target_verts, num_target_verts)
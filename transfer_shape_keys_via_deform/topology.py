@@ -0,0 +1,128 @@
+#-*- coding: utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Vertex correspondences between meshes, for targets whose keys can simply be
+# copied from the source instead of going through a deform bind.
+
+import numpy as np
+
+from . import spatial
+
+
+def same_topology(src_loops, src_loop_totals, tgt_loops, tgt_loop_totals):
+    # Same faces over the same vertex indices
+    return (len(src_loops) == len(tgt_loops) and len(src_loop_totals) == len(tgt_loop_totals)
+            and np.array_equal(src_loop_totals, tgt_loop_totals) and np.array_equal(src_loops, tgt_loops))
+
+
+def vertex_index_map(src_co, tgt_co, tolerance=1e-5):
+    """Source vertex index for every target vertex at the same position.
+
+    Returns None unless the vertices of both meshes pair up one to one
+    within tolerance, e.g. when the target only has its vertices in a
+    different order. Coincident vertices pair up in any order.
+    """
+    if len(src_co) != len(tgt_co):
+        return None
+    if not len(src_co):
+        return np.empty(0, dtype=np.int64)
+    src_co = np.asarray(src_co, dtype=np.float64)
+    tgt_co = np.asarray(tgt_co, dtype=np.float64)
+
+    grid = spatial.PointGrid(src_co)
+    index_map = grid.k_nearest(tgt_co, 1)[:, 0]
+
+    # coincident vertices all find the same nearest vertex; hand every group
+    # of them the vertices nearest to the first one
+    shared = np.flatnonzero(np.bincount(index_map, minlength=len(src_co))[index_map] > 1)
+    if len(shared):
+        shared = shared[np.argsort(index_map[shared], kind='stable')]
+        _, starts, counts = np.unique(index_map[shared], return_index=True, return_counts=True)
+        for start, count in zip(starts, counts):
+            ids = shared[start:start + count]
+            index_map[ids] = grid.k_nearest(tgt_co[ids[:1]], count)[0]
+
+    if len(np.unique(index_map)) != len(index_map):
+        return None
+    if np.abs(src_co[index_map] - tgt_co).max() > tolerance:
+        return None
+    return index_map
+
+
+def copied_offsets(deltas, out, matrix=None, index_map=None, weights=None, strength=1.0):
+    """Target offsets of source key deltas (keys, verts, 3) for a target with
+    the source's vertices.
+
+    deltas and out are buffers of the same shape and both get overwritten;
+    the result is one of them, so no arrays are allocated per key.
+    """
+    a, b = deltas, out[:len(deltas)]
+    if index_map is not None:
+        np.take(a, index_map, axis=1, out=b)
+        a, b = b, a
+    if matrix is not None:
+        np.matmul(a, np.asarray(matrix, dtype=np.float32)[:3, :3].T, out=b)
+        a, b = b, a
+    if strength != 1.0:
+        a *= strength
+    if weights is not None:
+        a *= weights[:, None]
+    return a
+
+
+# side suffixes of paired shape keys, as in "Smile.L" / "Smile.R"
+SIDE_SUFFIXES = (('.L', '.R'), ('_L', '_R'), ('.l', '.r'), ('_l', '_r'),
+                 ('Left', 'Right'), ('left', 'right'), ('LEFT', 'RIGHT'))
+
+
+def mirror_name(name):
+    # Name of the other side ("Smile.L" -> "Smile.R"), None without a side suffix
+    for left, right in SIDE_SUFFIXES:
+        if name.endswith(left):
+            return name[:-len(left)] + right
+        if name.endswith(right):
+            return name[:-len(right)] + left
+    return None
+
+
+def mirror_vertex_map(co, axis=0, tolerance=1e-4):
+    # Index of the vertex at the mirrored position of every vertex, through
+    # the plane at 0 on axis. None unless the mesh is symmetric
+    mirrored = np.array(co, dtype=np.float64)
+    mirrored[:, axis] *= -1.0
+    return vertex_index_map(co, mirrored, tolerance)
+
+
+def is_mirror_symmetric(matrix, axis=0, tolerance=1e-5):
+    # Whether a 4x4 transform maps the mirror plane onto itself and commutes
+    # with the mirror, so mirrored offsets stay mirrored after it
+    m = np.asarray(matrix, dtype=np.float64)
+    flip = np.ones(3)
+    flip[axis] = -1.0
+    rot = m[:3, :3]
+    return (np.abs(rot * flip[:, None] * flip[None, :] - rot).max() <= tolerance
+            and abs(m[axis, 3]) <= tolerance)
+
+
+def mirrored_offsets(offsets, mirror_map, axis=0):
+    # Offsets (verts, 3) mirrored to the other side of the mesh
+    mirrored = offsets[mirror_map]
+    mirrored[:, axis] *= -1.0
+    return mirrored